@@ -0,0 +1,183 @@
+"""
+Request-level smoke tests for the API app.
+"""
+
+import json
+
+from django.core.cache import cache
+from django.test import TestCase
+
+from apps.core.models import Genre, Movie, RecommendationResult, RecommendationSession, User, UserWatchHistory
+from apps.recommendations.cache import CATALOG, bump_version, get_user_version
+from apps.recommendations.precompute import write_precomputed
+from apps.recommendations.session_model import get_preferences
+
+
+class APITestCase(TestCase):
+    """Small catalog with the genres the feature store parses."""
+
+    def setUp(self):
+        cache.clear()
+        for name in ('Action', 'Comedy', 'Drama'):
+            Genre.objects.create(name=name, icon_name=name.lower(), color_primary='#000000')
+        self.movies = [
+            Movie.objects.create(
+                tmdb_id=100 + i,
+                title=f'Movie {i}',
+                overview='A funny hero saves the city' if i % 2 else 'A quiet family drama',
+                genres=['Action', 'Comedy'] if i % 2 else ['Drama'],
+                rating=5.0 + i % 5,
+                year=2000 + i,
+                country='Tanzania' if i % 3 == 0 else 'US',
+                language='sw' if i % 3 == 0 else 'en',
+                popularity=float(i),
+                vote_count=100 + i
+            )
+            for i in range(12)
+        ]
+        bump_version(CATALOG)
+        self.user = User.objects.create_user(username='viewer', password='secret')
+
+
+class RecommendationsTests(APITestCase):
+    def test_guest_recommendations(self):
+        response = self.client.get('/api/recommendations/', {
+            'mood': 'funny action', 'session_token': 'guest-token'
+        })
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertTrue(data['success'])
+        self.assertEqual(data['session_token'], 'guest-token')
+        self.assertTrue(data['movies'])
+
+        session = RecommendationSession.objects.get(session_token='guest-token')
+        self.assertIsNone(session.user)
+        self.assertEqual(session.mood_text, 'funny action')
+        self.assertEqual(
+            RecommendationResult.objects.filter(session=session).count(), len(data['movies'])
+        )
+
+    def test_user_recommendations(self):
+        self.client.force_login(self.user)
+        response = self.client.get('/api/recommendations/', {
+            'genres': 'Action', 'session_token': 'user-token'
+        })
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.json()['success'])
+        session = RecommendationSession.objects.get(session_token='user-token')
+        self.assertEqual(session.user, self.user)
+        self.assertEqual(session.genres, ['Action'])
+
+    def test_user_recommendations_served_from_precomputed_rows(self):
+        ranked = self.movies[:5]
+        write_precomputed([(
+            self.user.id,
+            get_user_version(self.user.id),
+            [(movie.id, 1.0 - rank / 10, ['Precomputed']) for rank, movie in enumerate(ranked)]
+        )])
+        self.client.force_login(self.user)
+        response = self.client.get('/api/recommendations/', {'limit': 3})
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual([movie['id'] for movie in data['movies']], [movie.id for movie in ranked[:3]])
+        self.assertEqual(data['movies'][0]['reasons'], ['Precomputed'])
+        self.assertIsNotNone(data['next_cursor'])
+
+    def test_stream_ends_without_error(self):
+        response = self.client.get('/api/recommendations/stream/', {'mood': 'funny action'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.is_async)
+        body = b''.join(response.streaming_content).decode()
+        self.assertIn('event: final', body)
+        self.assertIn('event: done', body)
+        self.assertNotIn('event: error', body)
+
+    async def test_stream_is_async_under_asgi(self):
+        response = await self.async_client.get('/api/recommendations/stream/', {'mood': 'funny action'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.is_async)
+        events = [chunk async for chunk in response.streaming_content]
+        self.assertTrue(events[0].startswith(b'event: popular'))
+        self.assertTrue(events[-1].startswith(b'event: done'))
+        self.assertFalse(any(chunk.startswith(b'event: error') for chunk in events))
+
+
+class MovieDetailsTests(APITestCase):
+    def test_guest_details(self):
+        movie = self.movies[1]
+        response = self.client.get(f'/api/movie/{movie.id}/')
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()['movie']
+        self.assertEqual(data['title'], movie.title)
+        self.assertEqual(data['genres'], ['Action', 'Comedy'])
+        self.assertFalse(data['is_local'])
+        self.assertIsNone(data['user_rating'])
+        self.assertNotIn(movie.id, [similar['id'] for similar in data['similar_movies']])
+
+    def test_user_rating_included(self):
+        movie = self.movies[0]
+        UserWatchHistory.objects.create(user=self.user, movie=movie, rating=4, notes='Loved it')
+        self.client.force_login(self.user)
+        response = self.client.get(f'/api/movie/{movie.id}/')
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()['movie']
+        self.assertTrue(data['is_local'])
+        self.assertEqual(data['user_rating']['rating'], 4)
+        self.assertEqual(data['user_rating']['notes'], 'Loved it')
+
+    def test_unknown_movie(self):
+        response = self.client.get('/api/movie/999999/')
+
+        self.assertEqual(response.status_code, 404)
+
+
+class FeedbackTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.get('/api/recommendations/', {'mood': 'funny action', 'session_token': 'feedback-token'})
+
+    def post_feedback(self, **data):
+        return self.client.post('/api/feedback/', json.dumps(data), content_type='application/json')
+
+    def test_feedback_round_trip(self):
+        movie = self.movies[1]
+        response = self.post_feedback(session_token='feedback-token', movie_id=movie.id, action='liked')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.json()['success'])
+        session = RecommendationSession.objects.get(session_token='feedback-token')
+        self.assertEqual(
+            [(event['movie_id'], event['action']) for event in session.user_feedback],
+            [(movie.id, 'liked')]
+        )
+        self.assertEqual(get_preferences('feedback-token').events, 1)
+
+    def test_resubmitted_feedback_counted_once(self):
+        movie = self.movies[1]
+        self.post_feedback(session_token='feedback-token', movie_id=movie.id, action='watched')
+        response = self.post_feedback(session_token='feedback-token', movie_id=movie.id, action='watched')
+
+        self.assertEqual(response.status_code, 200)
+        session = RecommendationSession.objects.get(session_token='feedback-token')
+        self.assertEqual(len(session.user_feedback), 1)
+        self.assertEqual(get_preferences('feedback-token').excluded, {movie.id})
+
+    def test_invalid_feedback(self):
+        movie = self.movies[1]
+        self.assertEqual(
+            self.post_feedback(session_token='unknown', movie_id=movie.id, action='liked').status_code, 400
+        )
+        self.assertEqual(
+            self.post_feedback(session_token='feedback-token', movie_id=999999, action='liked').status_code, 404
+        )
+        self.assertEqual(
+            self.post_feedback(session_token='feedback-token', movie_id='abc', action='liked').status_code, 400
+        )
+        self.assertEqual(self.post_feedback(session_token='feedback-token').status_code, 400)
@@ -10,6 +10,7 @@ app_name = 'api'
 urlpatterns = [
     # Recommendations
     path('recommendations/', views.get_recommendations, name='recommendations'),
+    path('recommendations/stream/', views.stream_recommendations, name='recommendations_stream'),
     
     # Search
     path('search/', views.search_movies, name='search'),
@@ -18,6 +19,7 @@ urlpatterns = [
     path('movie/<int:movie_id>/', views.get_movie_details, name='movie_details'),
     path('movie/<int:movie_id>/rate/', views.rate_movie_api, name='rate_movie'),
     path('movie/<int:movie_id>/watchlist/', views.add_to_watchlist_api, name='add_to_watchlist'),
+    path('movie/tmdb/<int:tmdb_id>/also-saved/', views.get_also_saved, name='also_saved'),
     
     # User data
     path('watchlist/', views.get_user_watchlist, name='watchlist'),
@@ -29,7 +31,9 @@ urlpatterns = [
     path('genres/', views.get_genres, name='genres'),
     path('featured/', views.get_featured_movies, name='featured'),
     path('local/', views.get_local_movies, name='local'),
+    path('trending/', views.get_trending, name='trending'),
     path('stats/', views.get_movie_stats, name='stats'),
+    path('stats/cache/', views.get_cache_stats, name='cache_stats'),
     
     # Feedback
     path('feedback/', views.provide_feedback, name='feedback'),
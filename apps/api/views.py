@@ -2,34 +2,214 @@
 API views for AJAX functionality in the Movie Recommender application.
 """
 
-from django.http import JsonResponse
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.http import JsonResponse, StreamingHttpResponse
 from django.contrib.auth.decorators import login_required
+from django.contrib.admin.views.decorators import staff_member_required
 from django.views.decorators.http import require_http_methods
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
 from django.views import View
 from django.shortcuts import get_object_or_404
+from django.db import transaction
 from django.db.models import Q
 import json
+import os
+import secrets
 from django.utils import timezone
 
 from apps.core.models import Movie, Genre, UserWatchHistory, RecommendationSession
-# from apps.recommendations.engine import RecommendationEngine
+from apps.recommendations.engine import RecommendationEngine
+from apps.recommendations.cache import cache_stats
+from apps.recommendations import trending
+from apps.recommendations.cooccurrence import also_saved
+from apps.recommendations.counters import total_ratings
+from apps.recommendations.feature_store import get_feature_store
+from apps.recommendations.features import is_local_country, movie_genre_names
+from apps.recommendations.pagination import RANKING_SIZE, CursorError, first_page, page_from_cursor
+from apps.recommendations.response_cache import filter_signature
+from apps.recommendations.session_model import ACTION_WEIGHTS, is_new_feedback, record_feedback
+
+MAX_PAGE_SIZE = 50
+
+
+def _int_param(request, name, default=None):
+    try:
+        return int(request.GET[name])
+    except (KeyError, ValueError):
+        return default
+
+
+def _float_param(request, name, default=None):
+    try:
+        return float(request.GET[name])
+    except (KeyError, ValueError):
+        return default
+
+
+def _recommendation_filters(request):
+    """Engine filter arguments from the recommendation query parameters."""
+    return {
+        'genres': [name for value in request.GET.getlist('genres') for name in value.split(',') if name],
+        'mood_text': request.GET.get('mood', ''),
+        'year_start': _int_param(request, 'year_start'),
+        'year_end': _int_param(request, 'year_end'),
+        'runtime_preference': request.GET.get('runtime') or None,
+        'include_local': request.GET.get('include_local', 'true').lower() != 'false',
+        'diversity': _float_param(request, 'diversity'),
+    }
+
+
+def _guest_region(request):
+    """Language and country picking a guest's cold-start recommendations."""
+    return {
+        'language': request.GET.get('language') or getattr(request, 'LANGUAGE_CODE', None),
+        'country': request.GET.get('country') or None,
+    }
+
+
+def _recommendation_data(rec):
+    # Only fields of the loaded row, so serializing a page runs no queries
+    movie = rec['movie']
+    overview = movie.overview or ''
+    return {
+        'id': movie.id,
+        'tmdb_id': movie.tmdb_id,
+        'title': movie.title,
+        'year': movie.year,
+        'overview': overview[:200] + '...' if len(overview) > 200 else overview,
+        'poster_path': movie.poster_path,
+        'genres': movie_genre_names(movie.genres),
+        'rating': movie.rating,
+        'is_local': is_local_country(movie.country),
+        'score': rec['score'],
+        'reasons': rec['reasons'],
+        'detail_url': f'/movie/{movie.id}/'
+    }
 
 
 @require_http_methods(["GET"])
 def get_recommendations(request):
-    """Get movie recommendations via AJAX."""
+    """
+    Get movie recommendations via AJAX, one page at a time.
+    
+    The first request (no ``cursor``) scores and caches the full ranking for
+    its session token; pass the returned ``next_cursor`` to get the next page.
+    """
+    
+    page_size = min(max(_int_param(request, 'limit', 20), 1), MAX_PAGE_SIZE)
+    cursor = request.GET.get('cursor')
+    
+    if cursor:
+        try:
+            recommendations, next_cursor, session_token = page_from_cursor(cursor, page_size)
+        except CursorError as e:
+            return JsonResponse({
+                'success': False,
+                'message': str(e)
+            }, status=400)
+    else:
+        filters = _recommendation_filters(request)
+        session_token = request.GET.get('session_token') or secrets.token_urlsafe(16)
+        user = request.user if request.user.is_authenticated else None
+        
+        engine = RecommendationEngine()
+        ranking = engine.get_recommendations(
+            user=user, session_token=session_token, limit=RANKING_SIZE,
+            **_guest_region(request), **filters
+        )
+        signature = filter_signature(limit=RANKING_SIZE, **filters)
+        recommendations, next_cursor = first_page(session_token, signature, ranking, page_size)
     
-    # Temporary placeholder - will be implemented later
     return JsonResponse({
         'success': True,
-        'movies': [],
-        'total': 0,
-        'message': 'Recommendations temporarily disabled'
+        'movies': [_recommendation_data(rec) for rec in recommendations],
+        'total': len(recommendations),
+        'session_token': session_token,
+        'next_cursor': next_cursor
     })
 
 
+def _authenticated_user(request):
+    return request.user if request.user.is_authenticated else None
+
+
+def _next_stage_event(stages):
+    """Run the next engine stage and format it as a server-sent event."""
+    try:
+        stage, recommendations = next(stages)
+    except StopIteration:
+        return None
+    payload = {
+        'stage': stage,
+        'movies': [_recommendation_data(rec) for rec in recommendations],
+        'total': len(recommendations)
+    }
+    return f"event: {stage}\ndata: {json.dumps(payload)}\n\n"
+
+
+@require_http_methods(["GET"])
+def stream_recommendations(request):
+    """
+    Stream recommendations as server-sent events, cheapest stage first.
+    
+    Emits a 'popular' event right away, a 'content' event for logged-in
+    users, then 'final' and 'done'. Under WSGI (gunicorn's sync workers) the
+    events come from a plain generator, sent chunk by chunk. Django reads a
+    sync iterator to the end before sending it over ASGI, so ASGI requests
+    get an async generator that runs each stage in a worker thread.
+    """
+    user = _authenticated_user(request)
+    filters = _recommendation_filters(request)
+    region = _guest_region(request)
+    session_token = request.GET.get('session_token') or secrets.token_urlsafe(16)
+    limit = min(max(_int_param(request, 'limit', 20), 1), MAX_PAGE_SIZE)
+    
+    def stages():
+        engine = RecommendationEngine()
+        return engine.iter_recommendation_stages(
+            user=user, session_token=session_token, limit=limit, **region, **filters
+        )
+    
+    def error_event(e):
+        return f"event: error\ndata: {json.dumps({'message': str(e)})}\n\n"
+    
+    done_event = f"event: done\ndata: {json.dumps({'session_token': session_token})}\n\n"
+    
+    def events():
+        try:
+            remaining = stages()
+            while True:
+                event = _next_stage_event(remaining)
+                if event is None:
+                    break
+                yield event
+        except Exception as e:
+            yield error_event(e)
+        yield done_event
+    
+    async def async_events():
+        # One thread for every stage, so they share its database connection
+        next_event = sync_to_async(_next_stage_event, thread_sensitive=True)
+        try:
+            remaining = await sync_to_async(stages, thread_sensitive=True)()
+            while True:
+                event = await next_event(remaining)
+                if event is None:
+                    break
+                yield event
+        except Exception as e:
+            yield error_event(e)
+        yield done_event
+    
+    content = async_events() if isinstance(request, ASGIRequest) else events()
+    response = StreamingHttpResponse(content, content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # Don't let nginx buffer the stream
+    return response
+
+
 @require_http_methods(["GET"])
 def search_movies(request):
     """Search movies via AJAX."""
@@ -70,6 +250,76 @@ def search_movies(request):
     })
 
 
+@require_http_methods(["GET"])
+def get_also_saved(request, tmdb_id):
+    """Get movies most often saved together with a TMDB movie."""
+    
+    limit = min(max(_int_param(request, 'limit', 12), 1), MAX_PAGE_SIZE)
+    partners = also_saved(tmdb_id, limit)
+    
+    # Link partners that are in the local catalog
+    catalog = {
+        movie.tmdb_id: movie
+        for movie in Movie.objects.filter(tmdb_id__in=[other for other, _ in partners])
+    }
+    strongest = partners[0][1] if partners else 1
+    
+    movies_data = []
+    for other, count in partners:
+        movie = catalog.get(other)
+        movies_data.append({
+            'tmdb_id': other,
+            'count': count,
+            'score': count / strongest,
+            'id': movie.id if movie else None,
+            'title': movie.title if movie else None,
+            'poster_path': movie.poster_path if movie else None,
+            'detail_url': f'/movie/{movie.id}/' if movie else None
+        })
+    
+    return JsonResponse({
+        'success': True,
+        'tmdb_id': tmdb_id,
+        'movies': movies_data,
+        'total': len(movies_data)
+    })
+
+
+@require_http_methods(["GET"])
+def get_trending(request):
+    """Get the movies trending on the site over a sliding window."""
+    
+    window = request.GET.get('window', '24h')
+    if window not in trending.WINDOWS:
+        return JsonResponse({
+            'success': False,
+            'message': f"Unknown window. Use one of: {', '.join(trending.WINDOWS)}."
+        }, status=400)
+    limit = min(max(_int_param(request, 'limit', 20), 1), MAX_PAGE_SIZE)
+    local_only = request.GET.get('local') == 'true'
+    
+    ranked = trending.get_trending(window)
+    if local_only:
+        store = get_feature_store()
+        rows = store.rows_of([movie_id for movie_id, _ in ranked])
+        ranked = [item for item, row in zip(ranked, rows) if row >= 0 and store.is_local[row]]
+    ranked = ranked[:limit]
+    
+    movies = Movie.objects.in_bulk([movie_id for movie_id, _ in ranked])
+    strongest = ranked[0][1] if ranked else 1
+    movies_data = [
+        _recommendation_data({'movie': movies[movie_id], 'score': score / strongest, 'reasons': []})
+        for movie_id, score in ranked if movie_id in movies
+    ]
+    
+    return JsonResponse({
+        'success': True,
+        'window': window,
+        'movies': movies_data,
+        'total': len(movies_data)
+    })
+
+
 @require_http_methods(["GET"])
 def get_genres(request):
     """Get all available genres."""
@@ -100,23 +350,21 @@ def get_genres(request):
 def get_movie_details(request, movie_id):
     """Get detailed movie information."""
     
-    movie = get_object_or_404(Movie, id=movie_id)
+    movie = get_object_or_404(Movie.objects.select_related('stats'), id=movie_id)
     
     # Get user rating if logged in
     user_rating = None
     if request.user.is_authenticated:
-        try:
-            watch_history = UserWatchHistory.objects.get(
-                user=request.user,
-                movie=movie
-            )
+        watch_history = UserWatchHistory.objects.filter(
+            user=request.user,
+            movie=movie
+        ).order_by('-watched_at').first()
+        if watch_history:
             user_rating = {
                 'rating': watch_history.rating,
                 'notes': watch_history.notes,
                 'watched_at': watch_history.watched_at.isoformat()
             }
-        except UserWatchHistory.DoesNotExist:
-            pass
     
     # Get similar movies
     engine = RecommendationEngine()
@@ -136,31 +384,24 @@ def get_movie_details(request, movie_id):
     
     movie_data = {
         'id': movie.id,
+        'tmdb_id': movie.tmdb_id,
         'title': movie.title,
-        'title_sw': movie.title_sw,
         'year': movie.year,
+        'type': movie.type,
         'overview': movie.overview,
-        'overview_sw': movie.overview_sw,
         'poster_path': movie.poster_path,
         'backdrop_path': movie.backdrop_path,
-        'runtime': movie.runtime,
-        'genres': [{'id': g.id, 'name': g.name, 'name_sw': g.name_sw} for g in movie.genres.all()],
-        'tmdb_rating': movie.tmdb_rating,
-        'imdb_rating': movie.imdb_rating,
-        'local_rating': movie.local_rating,
-        'average_rating': movie.average_rating,
-        'is_local': movie.is_local,
-        'is_featured': movie.is_featured,
-        'content_rating': movie.content_rating,
-        'budget': movie.budget,
-        'revenue': movie.revenue,
-        'production_companies': movie.production_companies,
-        'production_countries': movie.production_countries,
-        'cast': [{'name': c.name, 'character': c.character, 'profile_path': c.profile_path} for c in movie.cast.all()],
-        'crew': [{'name': c.name, 'job': c.job, 'department': c.department} for c in movie.crew.all()],
+        'release_date': movie.release_date,
+        'genres': movie_genre_names(movie.genres),
+        'rating': movie.rating,
+        'vote_count': movie.vote_count,
+        'popularity': movie.popularity,
+        'country': movie.country,
+        'language': movie.language,
+        'is_local': is_local_country(movie.country),
         'user_rating': user_rating,
         'similar_movies': similar_data,
-        'total_ratings': UserWatchHistory.objects.filter(movie=movie, rating__isnull=False).count()
+        'total_ratings': total_ratings(movie)
     }
     
     return JsonResponse({
@@ -377,6 +618,18 @@ def get_movie_stats(request):
     })
 
 
+@staff_member_required
+@require_http_methods(["GET"])
+def get_cache_stats(request):
+    """Get similarity cache hit/miss counters of the worker serving the request."""
+    
+    return JsonResponse({
+        'success': True,
+        'pid': os.getpid(),
+        'caches': cache_stats()
+    })
+
+
 @require_http_methods(["POST"])
 def provide_feedback(request):
     """Provide feedback on recommendations."""
@@ -393,24 +646,50 @@ def provide_feedback(request):
                 'message': 'Missing required parameters.'
             }, status=400)
         
-        # Find the recommendation session
         try:
-            session = RecommendationSession.objects.get(session_token=session_token)
-        except RecommendationSession.DoesNotExist:
+            movie_id = int(movie_id)
+        except (TypeError, ValueError):
             return JsonResponse({
                 'success': False,
-                'message': 'Invalid session token.'
+                'message': 'Invalid movie id.'
             }, status=400)
         
-        # Update user feedback
-        feedback = session.user_feedback or []
-        feedback.append({
-            'movie_id': movie_id,
-            'action': action,
-            'timestamp': timezone.now().isoformat()
-        })
-        session.user_feedback = feedback
-        session.save()
+        if not Movie.objects.filter(id=movie_id).exists():
+            return JsonResponse({
+                'success': False,
+                'message': 'Movie not found.'
+            }, status=404)
+        
+        # Append under a row lock so concurrent events are not lost
+        with transaction.atomic():
+            try:
+                session = RecommendationSession.objects.select_for_update().get(session_token=session_token)
+            except RecommendationSession.DoesNotExist:
+                return JsonResponse({
+                    'success': False,
+                    'message': 'Invalid session token.'
+                }, status=400)
+            
+            # A resubmitted event is acknowledged but not counted again
+            if not is_new_feedback(session_token, movie_id, action):
+                return JsonResponse({
+                    'success': True,
+                    'message': 'Feedback already recorded.'
+                })
+            
+            # Update user feedback
+            session.user_feedback = (session.user_feedback or []) + [{
+                'movie_id': movie_id,
+                'action': action,
+                'timestamp': timezone.now().isoformat()
+            }]
+            session.save(update_fields=['user_feedback'])
+        
+        # Rerank the session's next pages around this feedback
+        if action in ACTION_WEIGHTS:
+            record_feedback(session_token, movie_id, action)
+        if action in trending.FEEDBACK_EVENTS:
+            trending.record_event(movie_id, action)
         
         return JsonResponse({
             'success': True,
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.recommendations.ann import ANN_INDEX, LSHIndex
+from apps.recommendations.artifacts import new_version, publish
+from apps.recommendations.factorization import EmbeddingStore
+
+
+class Command(BaseCommand):
+    help = 'Build the approximate nearest-neighbour index over the trained movie embeddings.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tables', type=int, default=8)
+        parser.add_argument('--bits', type=int, default=12)
+
+    def handle(self, *args, **options):
+        store = EmbeddingStore.load()
+        if store is None:
+            raise CommandError('No trained embeddings found; run train_factors first.')
+
+        self.stdout.write(self.style.NOTICE(
+            f'Indexing {len(store.movie_ids)} movie vectors (version {store.version})...'
+        ))
+        index = LSHIndex.build(
+            store.movie_ids, store.item_factors,
+            n_tables=options['tables'], n_bits=options['bits']
+        )
+
+        # Published only once fully written, so workers never map a partial index
+        target = new_version(ANN_INDEX)
+        index.save(target)
+        publish(ANN_INDEX, target)
+
+        self.stdout.write(self.style.SUCCESS(f'Wrote ANN index to {target}'))
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from apps.recommendations.cache import COLD_START, bump_version
+from apps.recommendations.cold_start import build_cold_start_table, cold_start_path
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the cold-start guest recommendations per language, country and mood.'
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.NOTICE('Ranking cold-start cells...'))
+        table = build_cold_start_table()
+        path = cold_start_path()
+        table.save(path)
+
+        # Workers reload their copy when they see the new version
+        bump_version(COLD_START)
+        self.stdout.write(self.style.SUCCESS(f'Wrote {len(table)} cold-start cells to {path}'))
@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand
+
+from apps.recommendations.similarity_index import (
+    DEFAULT_TOP_K,
+    build_similarity_index,
+    update_similarity_index,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Build the precomputed item-item similarity index used by the movie detail endpoint. '
+        'Run with --incremental after catalog imports (or on a schedule) to index new and edited movies.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--incremental',
+            action='store_true',
+            help='Only index new or edited movies and update the lists they enter.'
+        )
+        parser.add_argument(
+            '--movie-id',
+            type=int,
+            action='append',
+            dest='movie_ids',
+            help='Index specific movies incrementally (can be repeated).'
+        )
+        parser.add_argument('--top-k', type=int, default=DEFAULT_TOP_K)
+
+    def handle(self, *args, **options):
+        top_k = options['top_k']
+
+        if options['incremental'] or options['movie_ids']:
+            self.stdout.write(self.style.NOTICE('Updating similarity index...'))
+            written = update_similarity_index(options['movie_ids'], top_k=top_k)
+        else:
+            self.stdout.write(self.style.NOTICE('Rebuilding similarity index...'))
+            written = build_similarity_index(top_k=top_k)
+
+        self.stdout.write(self.style.SUCCESS(f'Wrote {written} similarity entries.'))
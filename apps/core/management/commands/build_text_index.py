@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from apps.recommendations.artifacts import new_version, publish
+from apps.recommendations.text_similarity import TEXT_INDEX, build_text_index
+
+
+class Command(BaseCommand):
+    help = 'Build the TF-IDF index over movie overviews.'
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.NOTICE('Vectorizing movie overviews...'))
+        index = build_text_index()
+
+        # Published only once fully written, so workers never map a partial index
+        target = new_version(TEXT_INDEX)
+        index.save(target)
+        publish(TEXT_INDEX, target)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Wrote text index of {len(index)} overviews ({len(index.data)} weights) to {target}'
+        ))
@@ -0,0 +1,32 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from apps.recommendations.profiling import collect, format_table, reset_all
+
+
+class Command(BaseCommand):
+    help = 'Print the engine stage timings published by every worker (RECOMMENDER_PROFILING).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--json', action='store_true', help='Print the raw histograms as JSON.')
+        parser.add_argument(
+            '--reset',
+            action='store_true',
+            help='Clear the histograms of every worker after printing them.'
+        )
+
+    def handle(self, *args, **options):
+        stats = collect()
+        if options['json']:
+            self.stdout.write(json.dumps(stats, indent=2))
+        elif stats:
+            self.stdout.write(format_table(stats))
+        else:
+            self.stdout.write(self.style.NOTICE(
+                'No stage timings published yet; is RECOMMENDER_PROFILING on?'
+            ))
+
+        if options['reset']:
+            reset_all()
+            self.stdout.write(self.style.SUCCESS('Reset the stage timings of every worker.'))
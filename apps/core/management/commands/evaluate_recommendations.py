@@ -0,0 +1,65 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.recommendations.evaluation import MODES, RatingDataset, compare, evaluate, format_table
+from apps.recommendations.feature_store import get_feature_store
+
+
+class Command(BaseCommand):
+    help = 'Evaluate ranking quality and latency of each engine mode on a temporal train/test split.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--source', choices=('database', 'synthetic'), default='database')
+        parser.add_argument('--modes', nargs='+', choices=MODES, default=list(MODES))
+        parser.add_argument('--k', type=int, default=10)
+        parser.add_argument('--test-fraction', type=float, default=0.2)
+        parser.add_argument('--max-users', type=int, default=500)
+        parser.add_argument('--synthetic-users', type=int, default=500)
+        parser.add_argument('--ratings-per-user', type=int, default=30)
+        parser.add_argument('--seed', type=int, default=7)
+        parser.add_argument(
+            '--end-to-end', action='store_true',
+            help='Rank through get_recommendations, as a request does (real users only)'
+        )
+        parser.add_argument('--save', help='Write the results as JSON, to use as a later baseline')
+        parser.add_argument('--baseline', help='JSON results of an earlier run; fail on regressions')
+
+    def handle(self, *args, **options):
+        store = get_feature_store()
+        if options['source'] == 'synthetic':
+            dataset = RatingDataset.synthetic(
+                store, n_users=options['synthetic_users'],
+                ratings_per_user=options['ratings_per_user'], seed=options['seed']
+            )
+        else:
+            dataset = RatingDataset.from_database()
+        if not len(dataset):
+            raise CommandError('No ratings to evaluate; use --source synthetic on an empty history.')
+        if options['end_to_end'] and options['source'] == 'synthetic':
+            raise CommandError('--end-to-end serves real users; use --source database.')
+
+        self.stdout.write(self.style.NOTICE(
+            f'Evaluating {", ".join(options["modes"])} on {len(dataset)} ratings '
+            f'of {len(dataset.users())} users over {len(store)} movies...'
+        ))
+        results = evaluate(
+            dataset, store, modes=options['modes'], k=options['k'],
+            test_fraction=options['test_fraction'], max_users=options['max_users'],
+            seed=options['seed'], end_to_end=options['end_to_end']
+        )
+        self.stdout.write(format_table(results, options['k']))
+
+        if options['save']:
+            with open(options['save'], 'w') as f:
+                json.dump(results, f, indent=2)
+            self.stdout.write(self.style.SUCCESS(f'Saved results to {options["save"]}'))
+
+        if options['baseline']:
+            with open(options['baseline']) as f:
+                regressions = compare(results, json.load(f))
+            if regressions:
+                for regression in regressions:
+                    self.stdout.write(self.style.ERROR(regression))
+                raise CommandError(f'{len(regressions)} regression(s) against {options["baseline"]}')
+            self.stdout.write(self.style.SUCCESS('No regressions against the baseline'))
@@ -0,0 +1,44 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.recommendations.precompute import CHUNK_SIZE, precompute_recommendations
+
+
+class Command(BaseCommand):
+    help = 'Precompute top-N recommendations for active users (run nightly).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+        parser.add_argument('--top-n', type=int, default=None, help='Defaults to RECOMMENDER_PRECOMPUTE_TOP_N.')
+        parser.add_argument(
+            '--active-days',
+            type=int,
+            default=None,
+            help='Only users who logged in within this many days.'
+        )
+        parser.add_argument(
+            '--user-id',
+            type=int,
+            action='append',
+            dest='user_ids',
+            help='Only precompute specific users (can be repeated).'
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.NOTICE(
+            f'Precomputing recommendations with {options["workers"]} workers...'
+        ))
+        started = time.monotonic()
+        written = precompute_recommendations(
+            user_ids=options['user_ids'],
+            top_n=options['top_n'],
+            workers=options['workers'],
+            chunk_size=options['chunk_size'],
+            active_days=options['active_days'],
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Precomputed recommendations for {written} users in {time.monotonic() - started:.1f}s.'
+        ))
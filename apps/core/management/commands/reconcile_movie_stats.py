@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from apps.recommendations.counters import reconcile
+
+
+class Command(BaseCommand):
+    help = 'Recompute the materialized per-movie popularity counters from the source tables.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--movie-id',
+            type=int,
+            action='append',
+            dest='movie_ids',
+            help='Only reconcile specific movies (can be repeated).'
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.NOTICE('Reconciling movie stats...'))
+        written = reconcile(options['movie_ids'])
+        self.stdout.write(self.style.SUCCESS(f'Reconciled stats for {written} movies.'))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from apps.recommendations.trending import WINDOWS, get_trending, refresh_trending
+
+
+class Command(BaseCommand):
+    help = 'Recompute the precomputed trending lists from the sliding-window event counters.'
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.NOTICE('Refreshing trending movies...'))
+        refresh_trending()
+        for window in WINDOWS:
+            self.stdout.write(f'  {window}: {len(get_trending(window))} movies')
+        self.stdout.write(self.style.SUCCESS('Trending lists refreshed.'))
@@ -0,0 +1,52 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.recommendations.factorization import load_interactions, save_factors, train_als
+
+
+class Command(BaseCommand):
+    help = 'Train implicit-feedback ALS factors from watch history and saved movies.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--factors', type=int, default=32)
+        parser.add_argument('--iterations', type=int, default=15)
+        parser.add_argument('--regularization', type=float, default=0.1)
+        parser.add_argument('--alpha', type=float, default=40.0)
+        parser.add_argument('--keep', type=int, default=3, help='Number of embedding versions to keep.')
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.NOTICE('Loading interactions...'))
+        matrix, user_ids, movie_ids = load_interactions()
+        if matrix.nnz == 0:
+            self.stdout.write(self.style.WARNING('No interactions found; nothing to train.'))
+            return
+
+        self.stdout.write(self.style.NOTICE(
+            f'Training {options["factors"]} factors on {matrix.shape[0]} users x '
+            f'{matrix.shape[1]} movies ({matrix.nnz} interactions)...'
+        ))
+        started = time.monotonic()
+        user_factors, item_factors = train_als(
+            matrix,
+            factors=options['factors'],
+            iterations=options['iterations'],
+            regularization=options['regularization'],
+            alpha=options['alpha'],
+        )
+
+        path = save_factors(
+            user_ids, movie_ids, user_factors, item_factors,
+            metadata={
+                'factors': options['factors'],
+                'iterations': options['iterations'],
+                'regularization': options['regularization'],
+                'alpha': options['alpha'],
+                'users': int(matrix.shape[0]),
+                'movies': int(matrix.shape[1]),
+                'interactions': int(matrix.nnz),
+                'training_seconds': round(time.monotonic() - started, 2),
+            },
+            keep=options['keep'],
+        )
+        self.stdout.write(self.style.SUCCESS(f'Wrote embeddings to {path}'))
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from apps.recommendations.cooccurrence import BATCH_SIZE, update_cooccurrence
+
+
+class Command(BaseCommand):
+    help = 'Fold movies saved since the last run into the "also saved" co-occurrence counts.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+        parser.add_argument(
+            '--rebuild',
+            action='store_true',
+            help='Drop all counts and recount every saved movie.'
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.NOTICE('Updating saved movie co-occurrence...'))
+        processed = update_cooccurrence(batch_size=options['batch_size'], rebuild=options['rebuild'])
+        self.stdout.write(self.style.SUCCESS(f'Processed {processed} new saves.'))
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from apps.recommendations.implicit_signals import BATCH_SIZE, update_user_signals
+
+
+class Command(BaseCommand):
+    help = 'Fold watches and saves made since the last run into the time-decayed user signals.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+        parser.add_argument(
+            '--rebuild',
+            action='store_true',
+            help='Drop all signals and replay the whole watch and save history.'
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.NOTICE('Updating time-decayed user signals...'))
+        processed = update_user_signals(batch_size=options['batch_size'], rebuild=options['rebuild'])
+        self.stdout.write(self.style.SUCCESS(f'Processed {processed} new events.'))
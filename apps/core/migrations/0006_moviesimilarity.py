@@ -0,0 +1,31 @@
+# Generated by Django 4.2.11 on 2026-10-17 02:12
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_anonymoussavedmovie_savedmovie'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MovieSimilarity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rank', models.PositiveSmallIntegerField()),
+                ('score', models.FloatField()),
+                ('reasons', models.JSONField(blank=True, default=list)),
+                ('movie', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='similarity_entries', to='core.movie')),
+                ('similar_movie', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.movie')),
+            ],
+            options={
+                'verbose_name': 'Movie Similarity',
+                'verbose_name_plural': 'Movie Similarities',
+                'ordering': ['movie', 'rank'],
+                'unique_together': {('movie', 'rank')},
+            },
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 4.2.11 on 2026-10-17 02:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_precomputedrecommendation'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProcessingCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+                ('position', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Processing Checkpoint',
+                'verbose_name_plural': 'Processing Checkpoints',
+            },
+        ),
+        migrations.CreateModel(
+            name='SavedMovieCooccurrence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tmdb_id', models.IntegerField()),
+                ('other_tmdb_id', models.IntegerField()),
+                ('count', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Saved Movie Co-occurrence',
+                'verbose_name_plural': 'Saved Movie Co-occurrences',
+                'unique_together': {('tmdb_id', 'other_tmdb_id')},
+            },
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 4.2.11 on 2026-10-17 02:37
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_savedmoviecooccurrence_processingcheckpoint'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserMovieSignal',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('weight', models.FloatField(default=0.0)),
+                ('updated_at', models.DateTimeField()),
+                ('movie', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.movie')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='movie_signals', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'User Movie Signal',
+                'verbose_name_plural': 'User Movie Signals',
+                'unique_together': {('user', 'movie')},
+            },
+        ),
+        migrations.CreateModel(
+            name='UserGenreSignal',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('weight', models.FloatField(default=0.0)),
+                ('updated_at', models.DateTimeField()),
+                ('genre', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.genre')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='genre_signals', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'User Genre Signal',
+                'verbose_name_plural': 'User Genre Signals',
+                'indexes': [models.Index(fields=['user', '-weight'], name='core_userge_user_id_3cf53a_idx')],
+                'unique_together': {('user', 'genre')},
+            },
+        ),
+    ]
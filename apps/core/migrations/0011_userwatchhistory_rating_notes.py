@@ -0,0 +1,23 @@
+# Generated by Django 4.2.11 on 2026-10-17 02:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_usergenresignal_usermoviesignal'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userwatchhistory',
+            name='notes',
+            field=models.TextField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='userwatchhistory',
+            name='rating',
+            field=models.FloatField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 4.2.11 on 2026-10-17 02:55
+
+from django.db import migrations, models
+import django.db.models.deletion
+from django.utils import timezone
+
+
+def mark_indexed_movies(apps, schema_editor):
+    # Movies already in the index count as computed now, so the first
+    # incremental run only picks up movies added or edited from here on
+    MovieSimilarity = apps.get_model('core', 'MovieSimilarity')
+    MovieSimilarityState = apps.get_model('core', 'MovieSimilarityState')
+    now = timezone.now()
+    movie_ids = MovieSimilarity.objects.values_list('movie_id', flat=True).distinct()
+    MovieSimilarityState.objects.bulk_create(
+        [MovieSimilarityState(movie_id=movie_id, computed_at=now) for movie_id in movie_ids],
+        batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_userwatchhistory_rating_notes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MovieSimilarityState',
+            fields=[
+                ('movie', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='similarity_state', serialize=False, to='core.movie')),
+                ('computed_at', models.DateTimeField()),
+            ],
+        ),
+        migrations.RunPython(mark_indexed_movies, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.11 on 2026-10-17 03:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_moviesimilaritystate'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recommendationresult',
+            name='reasons',
+            field=models.JSONField(blank=True, default=list),
+        ),
+    ]
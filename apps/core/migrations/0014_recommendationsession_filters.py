@@ -0,0 +1,60 @@
+# Generated by Django 4.2.11 on 2026-10-17 03:13
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_recommendationresult_reasons'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recommendationsession',
+            name='genres',
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.AddField(
+            model_name='recommendationsession',
+            name='include_local',
+            field=models.BooleanField(default=True),
+        ),
+        migrations.AddField(
+            model_name='recommendationsession',
+            name='mood_text',
+            field=models.TextField(blank=True, default=''),
+        ),
+        migrations.AddField(
+            model_name='recommendationsession',
+            name='runtime_preference',
+            field=models.CharField(blank=True, default='', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='recommendationsession',
+            name='session_token',
+            field=models.CharField(blank=True, max_length=100, null=True, unique=True),
+        ),
+        migrations.AddField(
+            model_name='recommendationsession',
+            name='user_feedback',
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.AddField(
+            model_name='recommendationsession',
+            name='year_end',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='recommendationsession',
+            name='year_start',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='recommendationsession',
+            name='user',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL),
+        ),
+    ]
@@ -62,6 +62,8 @@ class UserWatchHistory(models.Model):
     user = models.ForeignKey('User', on_delete=models.CASCADE)
     movie = models.ForeignKey('Movie', on_delete=models.CASCADE)
     watched_at = models.DateTimeField(auto_now_add=True)
+    rating = models.FloatField(null=True, blank=True)  # 1-5, null when watched but not rated
+    notes = models.TextField(blank=True, null=True)
     # Add other fields as needed
 
     def __str__(self):
@@ -69,14 +71,22 @@ class UserWatchHistory(models.Model):
 
 class RecommendationSession(models.Model):
     """
-    Represents a recommendation session for a user.
+    Represents a recommendation session for a user or a guest.
     """
-    user = models.ForeignKey('User', on_delete=models.CASCADE)
+    user = models.ForeignKey('User', on_delete=models.CASCADE, null=True, blank=True)
+    session_token = models.CharField(max_length=100, unique=True, null=True, blank=True)
+    genres = models.JSONField(default=list, blank=True)
+    mood_text = models.TextField(blank=True, default='')
+    year_start = models.IntegerField(null=True, blank=True)
+    year_end = models.IntegerField(null=True, blank=True)
+    runtime_preference = models.CharField(max_length=20, blank=True, default='')
+    include_local = models.BooleanField(default=True)
+    user_feedback = models.JSONField(default=list, blank=True)
     created_at = models.DateTimeField(auto_now_add=True, null=True, blank=True)
-    # Add fields as needed, e.g. session data, results, etc.
 
     def __str__(self):
-        return f"Session {self.id} for {self.user.username}"
+        owner = self.user.username if self.user_id else 'guest'
+        return f"Session {self.id} for {owner}"
 
 class RecommendationResult(models.Model):
     """
@@ -85,7 +95,7 @@ class RecommendationResult(models.Model):
     session = models.ForeignKey('RecommendationSession', on_delete=models.CASCADE, related_name='results')
     movie = models.ForeignKey('Movie', on_delete=models.CASCADE)
     score = models.FloatField(default=0.0)
-    # Add other fields as needed
+    reasons = models.JSONField(default=list, blank=True)
 
     def __str__(self):
         return f"{self.movie.title} (score: {self.score}) for session {self.session.id}"
@@ -192,4 +202,151 @@ class AnonymousSavedMovie(models.Model):
 
     def is_expired(self):
         from django.utils import timezone
-        return timezone.now() > self.expires_at
\ No newline at end of file
+        return timezone.now() > self.expires_at
+
+
+class MovieSimilarity(models.Model):
+    """
+    Precomputed top-K similar movies for each movie (item-item index).
+    """
+    movie = models.ForeignKey('Movie', on_delete=models.CASCADE, related_name='similarity_entries')
+    similar_movie = models.ForeignKey('Movie', on_delete=models.CASCADE, related_name='+')
+    rank = models.PositiveSmallIntegerField()
+    score = models.FloatField()
+    reasons = models.JSONField(default=list, blank=True)
+
+    class Meta:
+        verbose_name = "Movie Similarity"
+        verbose_name_plural = "Movie Similarities"
+        unique_together = ['movie', 'rank']
+        ordering = ['movie', 'rank']
+
+    def __str__(self):
+        return f"{self.similar_movie_id} similar to {self.movie_id} (score: {self.score:.2f})"
+
+class MovieSimilarityState(models.Model):
+    """
+    When a movie's similarity list was last computed, so incremental
+    builds pick up new and edited movies (even those with no neighbours).
+    """
+    movie = models.OneToOneField('Movie', on_delete=models.CASCADE, primary_key=True, related_name='similarity_state')
+    computed_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"Similarities of {self.movie_id} computed at {self.computed_at}"
+
+class PrecomputedRecommendation(models.Model):
+    """
+    Batch-computed top-N recommendations for a user (see the
+    precompute_recommendations command).
+    """
+    user = models.ForeignKey('User', on_delete=models.CASCADE, related_name='precomputed_recommendations')
+    movie = models.ForeignKey('Movie', on_delete=models.CASCADE, related_name='+')
+    rank = models.PositiveSmallIntegerField()
+    score = models.FloatField()
+    reasons = models.JSONField(default=list, blank=True)
+    user_version = models.PositiveIntegerField(default=1)
+    computed_at = models.DateTimeField()
+
+    class Meta:
+        verbose_name = "Precomputed Recommendation"
+        verbose_name_plural = "Precomputed Recommendations"
+        unique_together = ['user', 'rank']
+        ordering = ['user', 'rank']
+
+    def __str__(self):
+        return f"#{self.rank} {self.movie_id} for user {self.user_id} (score: {self.score:.2f})"
+
+class SavedMovieCooccurrence(models.Model):
+    """
+    How many users/sessions saved both movies (TMDB ids), pruned to the
+    top-N partners of each movie (see the update_cooccurrence command).
+    """
+    tmdb_id = models.IntegerField()
+    other_tmdb_id = models.IntegerField()
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Saved Movie Co-occurrence"
+        verbose_name_plural = "Saved Movie Co-occurrences"
+        unique_together = ['tmdb_id', 'other_tmdb_id']
+
+    def __str__(self):
+        return f"{self.tmdb_id} saved with {self.other_tmdb_id} ({self.count} times)"
+
+class ProcessingCheckpoint(models.Model):
+    """
+    High-water mark of an incremental batch job (last processed row id).
+    """
+    name = models.CharField(max_length=100, unique=True)
+    position = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Processing Checkpoint"
+        verbose_name_plural = "Processing Checkpoints"
+
+    def __str__(self):
+        return f"{self.name} at {self.position}"
+
+class MovieStats(models.Model):
+    """
+    Denormalized per-movie counters, kept up to date on writes and
+    periodically reconciled (see the reconcile_movie_stats command).
+    """
+    movie = models.OneToOneField('Movie', on_delete=models.CASCADE, primary_key=True, related_name='stats')
+    watch_count = models.IntegerField(default=0)
+    rating_count = models.IntegerField(default=0)
+    rating_sum = models.FloatField(default=0.0)
+    saved_count = models.IntegerField(default=0)
+    reconciled_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = "Movie Stats"
+        verbose_name_plural = "Movie Stats"
+
+    def __str__(self):
+        return f"Stats for movie {self.movie_id}"
+
+    @property
+    def average_rating(self):
+        return self.rating_sum / self.rating_count if self.rating_count else None
+
+class UserGenreSignal(models.Model):
+    """
+    Exponentially time-decayed genre preference of a user, as of
+    ``updated_at`` (see the update_user_signals command).
+    """
+    user = models.ForeignKey('User', on_delete=models.CASCADE, related_name='genre_signals')
+    genre = models.ForeignKey('Genre', on_delete=models.CASCADE, related_name='+')
+    weight = models.FloatField(default=0.0)
+    updated_at = models.DateTimeField()
+
+    class Meta:
+        verbose_name = "User Genre Signal"
+        verbose_name_plural = "User Genre Signals"
+        unique_together = ['user', 'genre']
+        indexes = [
+            models.Index(fields=['user', '-weight']),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} likes genre {self.genre_id} ({self.weight:.2f})"
+
+class UserMovieSignal(models.Model):
+    """
+    Exponentially time-decayed interest of a user in a movie (watched,
+    rated, liked or saved for later), as of ``updated_at``.
+    """
+    user = models.ForeignKey('User', on_delete=models.CASCADE, related_name='movie_signals')
+    movie = models.ForeignKey('Movie', on_delete=models.CASCADE, related_name='+')
+    weight = models.FloatField(default=0.0)
+    updated_at = models.DateTimeField()
+
+    class Meta:
+        verbose_name = "User Movie Signal"
+        verbose_name_plural = "User Movie Signals"
+        unique_together = ['user', 'movie']
+
+    def __str__(self):
+        return f"{self.user_id} interest in movie {self.movie_id} ({self.weight:.2f})"
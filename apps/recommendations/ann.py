@@ -0,0 +1,184 @@
+"""
+Approximate nearest-neighbour search over movie vectors.
+
+A pure-NumPy random-projection LSH index for cosine similarity. Each of
+``n_tables`` tables hashes a vector to a ``n_bits`` code (the signs of its
+projections on random hyperplanes) and keeps item ids sorted by code, so a
+bucket is a ``searchsorted`` range. Queries probe their own bucket plus
+the buckets one bit-flip away (all probes of all tables are found with
+one ``searchsorted``), then rerank the union of candidates exactly. Below
+``EXACT_SEARCH_BELOW`` vectors a brute-force scan is both faster and
+exact, so small indexes skip the buckets. Arrays are saved as ``.npy`` files in a versioned artifact
+directory (see ``artifacts``) and memory-mapped on load.
+"""
+
+from __future__ import annotations
+import json
+import logging
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from .artifacts import artifact_loader
+
+logger = logging.getLogger(__name__)
+
+ANN_INDEX = 'ann'  # Artifact name
+ARRAYS = ('ids', 'vectors', 'planes', 'codes', 'order')
+EXACT_SEARCH_BELOW = 10000  # Index size where bucket probing starts to beat a full scan
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+class LSHIndex:
+    """Multi-table random-hyperplane LSH index with exact reranking."""
+
+    def __init__(
+        self,
+        ids: np.ndarray,
+        vectors: np.ndarray,
+        planes: np.ndarray,
+        codes: np.ndarray,
+        order: np.ndarray
+    ):
+        self.ids = ids              # (n,) movie ids
+        self.vectors = vectors      # (n, dim) unit vectors
+        self.planes = planes        # (n_tables, n_bits, dim)
+        self.codes = codes          # (n_tables, n) bucket codes, sorted per table
+        self.order = order          # (n_tables, n) rows in bucket order
+        self.n_tables, self.n_bits = planes.shape[:2]
+        self._bit_weights = (1 << np.arange(self.n_bits, dtype=np.int64))
+        self._row_of = None
+        self._keys = None
+
+    @classmethod
+    def build(
+        cls,
+        ids: np.ndarray,
+        vectors: np.ndarray,
+        n_tables: int = 8,
+        n_bits: int = 12,
+        seed: int = 42
+    ) -> "LSHIndex":
+        if n_bits > 62:
+            raise ValueError("n_bits must be at most 62")
+        vectors = _normalize(vectors)
+        rng = np.random.default_rng(seed)
+        planes = rng.standard_normal((n_tables, n_bits, vectors.shape[1])).astype(np.float32)
+
+        codes = np.empty((n_tables, len(ids)), dtype=np.int64)
+        order = np.empty((n_tables, len(ids)), dtype=np.int64)
+        bit_weights = 1 << np.arange(n_bits, dtype=np.int64)
+        for table in range(n_tables):
+            table_codes = ((vectors @ planes[table].T) > 0) @ bit_weights
+            order[table] = np.argsort(table_codes, kind='stable')
+            codes[table] = table_codes[order[table]]
+
+        return cls(np.asarray(ids, dtype=np.int64), vectors, planes, codes, order)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def save(self, path: Path):
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        for name in ARRAYS:
+            np.save(path / f'{name}.npy', np.ascontiguousarray(getattr(self, name)))
+        (path / 'meta.json').write_text(json.dumps({
+            'size': len(self), 'n_tables': self.n_tables, 'n_bits': self.n_bits,
+        }))
+
+    @classmethod
+    def load(cls, path: Path, mmap: bool = True) -> "LSHIndex":
+        path = Path(path)
+        mode = 'r' if mmap else None
+        arrays = {name: np.load(path / f'{name}.npy', mmap_mode=mode) for name in ARRAYS}
+        return cls(**arrays)
+
+    def row_of(self, movie_id: int) -> Optional[int]:
+        if self._row_of is None:
+            self._row_of = {int(movie_id): row for row, movie_id in enumerate(self.ids)}
+        return self._row_of.get(int(movie_id))
+
+    def _bucket_keys(self) -> np.ndarray:
+        """Codes of all tables as one sorted array: the table number in the high bits."""
+        if self._keys is None:
+            tables = np.arange(self.n_tables, dtype=np.int64)[:, None] << self.n_bits
+            self._keys = (tables | self.codes).ravel()
+        return self._keys
+
+    def _candidates(self, query: np.ndarray, probe_radius: int) -> np.ndarray:
+        """Rows sharing a bucket (or a bucket ``probe_radius`` bit-flips away)."""
+        # Every table's code, then every probe of every table, in one searchsorted
+        codes = ((self.planes @ query) > 0) @ self._bit_weights
+        flips = np.zeros(1, dtype=np.int64)
+        if probe_radius >= 1:
+            flips = np.concatenate([flips, self._bit_weights])
+        tables = np.arange(self.n_tables, dtype=np.int64)[:, None] << self.n_bits
+        probes = (tables | (codes[:, None] ^ flips)).ravel()
+
+        keys = self._bucket_keys()
+        starts = np.searchsorted(keys, probes, side='left')
+        ends = np.searchsorted(keys, probes, side='right')
+        sizes = ends - starts
+        total = int(sizes.sum())
+        if total == 0:
+            return np.zeros(0, dtype=np.int64)
+
+        # Positions of all bucket ranges, concatenated without a Python loop
+        offsets = np.repeat(starts - (np.cumsum(sizes) - sizes), sizes)
+        positions = np.arange(total, dtype=np.int64) + offsets
+        return np.unique(np.asarray(self.order).ravel()[positions])
+
+    def query(
+        self,
+        vector: np.ndarray,
+        k: int = 10,
+        probe_radius: int = 1,
+        exclude_row: Optional[int] = None
+    ) -> List[Tuple[int, float]]:
+        """Approximate top-``k`` (movie_id, cosine similarity) pairs."""
+        query = _normalize(vector)
+        if len(self) < EXACT_SEARCH_BELOW:
+            rows = np.arange(len(self), dtype=np.int64)
+        else:
+            rows = self._candidates(query, probe_radius)
+        if exclude_row is not None:
+            rows = rows[rows != exclude_row]
+        if rows.size == 0:
+            return []
+
+        scores = self.vectors[rows] @ query
+        if rows.size > k:
+            top = np.argpartition(-scores, k - 1)[:k]
+            rows, scores = rows[top], scores[top]
+        best = np.argsort(-scores, kind='stable')
+        return [(int(self.ids[rows[i]]), float(scores[i])) for i in best]
+
+    def query_movie(self, movie_id: int, k: int = 10, probe_radius: int = 1) -> List[Tuple[int, float]]:
+        """Neighbours of an indexed movie, excluding the movie itself."""
+        row = self.row_of(movie_id)
+        if row is None:
+            return []
+        return self.query(self.vectors[row], k=k, probe_radius=probe_radius, exclude_row=row)
+
+
+def exact_top_k(vectors: np.ndarray, query: np.ndarray, k: int) -> np.ndarray:
+    """Brute-force cosine top-``k`` rows (``vectors`` must be unit-normalized)."""
+    scores = vectors @ _normalize(query)
+    top = np.argpartition(-scores, k - 1)[:k]
+    return top[np.argsort(-scores[top], kind='stable')]
+
+
+_index_loader = artifact_loader(ANN_INDEX, LSHIndex.load)
+
+
+def get_ann_index() -> Optional[LSHIndex]:
+    """Process-wide movie ANN index, remapped after each build (``None`` if unbuilt)."""
+    return _index_loader.get()
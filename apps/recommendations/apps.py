@@ -0,0 +1,16 @@
+from django.apps import AppConfig
+
+
+class RecommendationsConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'apps.recommendations'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+
+        # Map the trained embeddings at worker start rather than on the
+        # first request
+        from django.conf import settings
+        if getattr(settings, 'RECOMMENDER_ENGINE_MODE', 'hybrid') == 'factors':
+            from .factorization import get_embedding_store
+            get_embedding_store()
@@ -0,0 +1,95 @@
+"""
+Versioned on-disk artifacts built offline and memory-mapped by workers.
+
+A build writes into a fresh ``<name>/<version>`` directory under
+``RECOMMENDER_ARTIFACT_DIR`` and then publishes it: the ``CURRENT`` file
+naming the version is replaced with an atomic ``os.replace`` and the
+artifact's cache version is bumped. A worker therefore maps either the
+previous or the new version, never a partial one, and remaps after the
+bump. An artifact that is not built yet is looked for again every
+``MISSING_RETRY`` seconds rather than cached as missing. The last ``keep``
+versions stay on disk for workers still mapping an older one.
+"""
+
+from __future__ import annotations
+import logging
+import os
+import shutil
+import time
+from pathlib import Path
+from typing import Callable, Optional, TypeVar
+
+from django.conf import settings
+
+from .cache import VersionedLoader, bump_version
+
+logger = logging.getLogger(__name__)
+
+CURRENT_FILE = 'CURRENT'
+DEFAULT_KEEP = 3
+MISSING_RETRY = 60  # Seconds before a worker looks again for an unbuilt artifact
+
+T = TypeVar('T')
+
+
+def artifact_root(name: str) -> Path:
+    return Path(settings.RECOMMENDER_ARTIFACT_DIR) / name
+
+
+def artifact_scope(name: str) -> str:
+    """Cache version scope bumped on each publish of ``name``."""
+    return f'artifact:{name}'
+
+
+def current_path(name: str) -> Optional[Path]:
+    """Directory of the published version, ``None`` if nothing was built."""
+    root = artifact_root(name)
+    try:
+        version = (root / CURRENT_FILE).read_text().strip()
+    except FileNotFoundError:
+        return None
+    path = root / version
+    return path if version and path.is_dir() else None
+
+
+def new_version(name: str) -> Path:
+    """Fresh, empty directory for a build to write into."""
+    root = artifact_root(name)
+    root.mkdir(parents=True, exist_ok=True)
+    while True:
+        # Fixed-width timestamps sort in build order and are never reused
+        now = time.time()
+        path = root / f"{time.strftime('%Y%m%d%H%M%S', time.localtime(now))}.{int(now * 1e6) % 1000000:06d}"
+        try:
+            path.mkdir()
+            return path
+        except FileExistsError:
+            continue
+
+
+def publish(name: str, path: Path, keep: int = DEFAULT_KEEP) -> int:
+    """Make ``path`` the current version of ``name``. Returns the new cache version."""
+    root = artifact_root(name)
+    pointer = root / f'{CURRENT_FILE}.{os.getpid()}.tmp'
+    pointer.write_text(path.name)
+    os.replace(pointer, root / CURRENT_FILE)
+
+    versions = sorted(p for p in root.iterdir() if p.is_dir())
+    for old in versions[:-keep]:
+        if old != path:
+            shutil.rmtree(old, ignore_errors=True)
+    return bump_version(artifact_scope(name))
+
+
+def artifact_loader(name: str, load: Callable[[Path], T]) -> VersionedLoader[T]:
+    """Process-wide copy of the current version of ``name``, loaded by ``load(path)``."""
+
+    def load_current(version: int) -> Optional[T]:
+        path = current_path(name)
+        if path is None:
+            return None
+        artifact = load(path)
+        logger.info("Mapped %s artifact version %s (v%d)", name, path.name, version)
+        return artifact
+
+    return VersionedLoader(artifact_scope(name), load_current, retry_after=MISSING_RETRY)
@@ -0,0 +1,303 @@
+"""
+Cache helpers for the recommendation engine.
+
+Cached data lives under versioned keys. A version is bumped when the data
+it was derived from changes (a user's ratings, the movie catalog), which
+invalidates every key built from the old version without having to find
+and delete them.
+
+``SimilarityCache`` is a two-level cache: a bounded in-process LRU in
+front of the configured Django cache (Redis in production, locmem
+otherwise), so similarities computed by one gunicorn worker are reused by
+the others and across requests.
+
+``get_or_compute_locked`` protects expensive entries against stampedes: a
+cold key is computed by one thread in one worker while the others wait for
+its result. ``locked`` serializes read-modify-write updates of one key
+across threads and workers.
+
+``VersionedLoader`` holds a process-wide object (a matrix, an index) and
+reloads it when the version of the scope it was built from changes.
+"""
+
+from __future__ import annotations
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Generic, Hashable, Iterator, Optional, Tuple, TypeVar
+
+from django.core.cache import cache
+
+KEY_PREFIX = 'recommendations'
+VERSION_TIMEOUT = None  # Versions never expire
+LOCAL_VERSION_TTL = 5  # Seconds a worker trusts its copy of a version
+LOCK_TIMEOUT = 30  # Seconds a compute lock is held before others give up waiting
+LOCK_POLL_INTERVAL = 0.05
+
+CATALOG = 'catalog'
+COLD_START = 'cold_start'  # Bumped by each cold-start table rebuild
+RATINGS = 'ratings'  # Bumped when any watch history rating changes
+
+T = TypeVar('T')
+
+_MISSING = object()
+_local_versions: Dict[str, tuple] = {}
+_compute_locks = [threading.Lock() for _ in range(64)]
+
+
+def _version_key(scope: str) -> str:
+    return f'{KEY_PREFIX}:version:{scope}'
+
+
+def get_version(scope: str) -> int:
+    """Current version of a data scope (1 until it first changes)."""
+    cached = _local_versions.get(scope)
+    if cached and time.monotonic() - cached[1] < LOCAL_VERSION_TTL:
+        return cached[0]
+
+    version = cache.get_or_set(_version_key(scope), 1, VERSION_TIMEOUT)
+    _local_versions[scope] = (version, time.monotonic())
+    return version
+
+
+def bump_version(scope: str) -> int:
+    """Invalidate every cached entry derived from ``scope``."""
+    key = _version_key(scope)
+    cache.add(key, 1, VERSION_TIMEOUT)
+    try:
+        version = cache.incr(key)
+    except ValueError:
+        # Key evicted between add() and incr()
+        version = 2
+        cache.set(key, version, VERSION_TIMEOUT)
+    _local_versions[scope] = (version, time.monotonic())
+    return version
+
+
+def user_scope(user_id: int) -> str:
+    return f'user:{user_id}'
+
+
+def get_user_version(user_id: int) -> int:
+    """Current data version of a user (1 until their ratings first change)."""
+    return get_version(user_scope(user_id))
+
+
+def bump_user_version(user_id: int) -> int:
+    """Invalidate every cached entry derived from the user's ratings."""
+    return bump_version(user_scope(user_id))
+
+
+def user_key(name: str, user_id: int) -> str:
+    """Versioned cache key for per-user data."""
+    return f'{KEY_PREFIX}:{name}:{user_id}:v{get_user_version(user_id)}'
+
+
+def catalog_key(name: str, *parts: Any) -> str:
+    """Versioned cache key for data derived from the movie catalog."""
+    suffix = ':'.join(str(part) for part in parts)
+    return f'{KEY_PREFIX}:{name}:{suffix}:c{get_version(CATALOG)}'
+
+
+def get_or_compute_locked(
+    key: str,
+    compute: Callable[[], Any],
+    timeout: Optional[int],
+    lock_timeout: int = LOCK_TIMEOUT
+) -> Any:
+    """
+    Cached value of ``key``, computed at most once when the key is cold.
+
+    Threads of a worker serialize on a striped local lock; workers race for
+    a ``cache.add`` lock and the losers poll for the winner's value. If the
+    winner fails or the lock expires, the waiter computes the value itself.
+    """
+    value = cache.get(key, _MISSING)
+    if value is not _MISSING:
+        return value
+
+    with _compute_locks[hash(key) % len(_compute_locks)]:
+        value = cache.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+
+        lock_key = f'{key}:lock'
+        acquired = cache.add(lock_key, 1, lock_timeout)
+        if not acquired:
+            deadline = time.monotonic() + lock_timeout
+            while time.monotonic() < deadline:
+                time.sleep(LOCK_POLL_INTERVAL)
+                value = cache.get(key, _MISSING)
+                if value is not _MISSING:
+                    return value
+                if cache.get(lock_key) is None:
+                    break
+
+        try:
+            value = compute()
+            cache.set(key, value, timeout)
+        finally:
+            if acquired:
+                cache.delete(lock_key)
+        return value
+
+
+@contextmanager
+def locked(key: str, timeout: int = LOCK_TIMEOUT) -> Iterator[None]:
+    """
+    Hold the lock of ``key`` in this thread and across workers.
+
+    The cross-worker lock is a ``cache.add`` entry expiring after
+    ``timeout`` seconds. A waiter gives up after the same time and proceeds
+    unlocked rather than failing, as the holder has most likely died.
+    """
+    with _compute_locks[hash(key) % len(_compute_locks)]:
+        lock_key = f'{key}:lock'
+        deadline = time.monotonic() + timeout
+        acquired = cache.add(lock_key, 1, timeout)
+        while not acquired and time.monotonic() < deadline:
+            time.sleep(LOCK_POLL_INTERVAL)
+            acquired = cache.add(lock_key, 1, timeout)
+        try:
+            yield
+        finally:
+            if acquired:
+                cache.delete(lock_key)
+
+
+class VersionedLoader(Generic[T]):
+    """
+    Process-wide object loaded by ``load(version)`` and reloaded when the
+    version of ``scope`` changes.
+
+    ``min_age`` keeps a loaded object for at least that many seconds, so
+    a scope bumped on every write reloads at most once per interval;
+    ``max_age`` reloads even without a bump. ``load`` may return ``None``
+    for a missing artifact, which is retried after ``retry_after`` seconds
+    instead of being kept until the next bump.
+    """
+
+    def __init__(
+        self,
+        scope: str,
+        load: Callable[[int], Optional[T]],
+        min_age: float = 0,
+        max_age: Optional[float] = None,
+        retry_after: float = 60
+    ):
+        self.scope = scope
+        self.load = load
+        self.min_age = min_age
+        self.max_age = max_age
+        self.retry_after = retry_after
+        self._lock = threading.Lock()
+        # (object, version, monotonic load time)
+        self._entry: Optional[Tuple[Optional[T], int, float]] = None
+
+    def _is_current(self, entry: Optional[Tuple[Optional[T], int, float]], version: int) -> bool:
+        if entry is None:
+            return False
+        value, loaded_version, loaded_at = entry
+        age = time.monotonic() - loaded_at
+        if value is None:
+            return loaded_version == version and age < self.retry_after
+        if age < self.min_age:
+            return True
+        return loaded_version == version and (self.max_age is None or age < self.max_age)
+
+    def get(self) -> Optional[T]:
+        version = get_version(self.scope)
+        entry = self._entry
+        if self._is_current(entry, version):
+            return entry[0]
+
+        with self._lock:
+            entry = self._entry
+            if not self._is_current(entry, version):
+                # Tagged with the version read before loading, so a bump during
+                # the load triggers another reload
+                entry = (self.load(version), version, time.monotonic())
+                self._entry = entry
+            return entry[0]
+
+    def clear(self):
+        """Drop the loaded object; the next ``get`` loads it again."""
+        with self._lock:
+            self._entry = None
+
+
+class SimilarityCache:
+    """Bounded in-process LRU in front of the shared Django cache."""
+
+    registry: Dict[str, "SimilarityCache"] = {}
+
+    def __init__(self, name: str, max_entries: int = 2048, timeout: int = 60 * 60):
+        self.name = name
+        self.max_entries = max_entries
+        self.timeout = timeout
+        self._local: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.local_hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        SimilarityCache.registry[name] = self
+
+    def _remember(self, key: Hashable, value: Any):
+        with self._lock:
+            self._local[key] = value
+            self._local.move_to_end(key)
+            while len(self._local) > self.max_entries:
+                self._local.popitem(last=False)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        with self._lock:
+            value = self._local.get(key, _MISSING)
+            if value is not _MISSING:
+                self._local.move_to_end(key)
+                self.local_hits += 1
+                return value
+
+        value = cache.get(key, _MISSING)
+        if value is not _MISSING:
+            self.shared_hits += 1
+            self._remember(key, value)
+            return value
+
+        self.misses += 1
+        return default
+
+    def set(self, key: str, value: Any):
+        self._remember(key, value)
+        cache.set(key, value, self.timeout)
+
+    def get_or_compute(self, key: str, compute: Callable[[], Any]) -> Any:
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = compute()
+            self.set(key, value)
+        return value
+
+    def clear_local(self):
+        with self._lock:
+            self._local.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.local_hits + self.shared_hits + self.misses
+        return {
+            'local_hits': self.local_hits,
+            'shared_hits': self.shared_hits,
+            'misses': self.misses,
+            'hit_rate': (self.local_hits + self.shared_hits) / lookups if lookups else 0.0,
+            'local_size': len(self._local),
+            'max_entries': self.max_entries,
+        }
+
+
+def cache_stats() -> Dict[str, Dict[str, Any]]:
+    """Hit/miss counters of every similarity cache in this worker."""
+    return {name: c.stats() for name, c in SimilarityCache.registry.items()}
+
+
+user_similarity_cache = SimilarityCache('user_similarity', max_entries=1024)
+movie_similarity_cache = SimilarityCache('movie_similarity', max_entries=8192)
@@ -0,0 +1,42 @@
+"""
+High-water marks of incremental batch jobs, stored in ``ProcessingCheckpoint``.
+
+Ids are allocated on insert but rows become visible on commit, so a slow
+transaction can commit a row below an id a job has already passed. Jobs
+read ``settled_rows`` instead: only rows written more than ``SETTLE_LAG``
+ago, and never past a newer one, so the mark waits for rows that may
+still appear.
+"""
+
+from datetime import timedelta
+
+from django.utils import timezone
+
+from apps.core.models import ProcessingCheckpoint
+
+SETTLE_LAG = timedelta(minutes=5)  # Longer than any transaction writing the tracked rows
+
+
+def get_position(name: str) -> int:
+    """Last processed position of a job (0 if it never ran)."""
+    position = ProcessingCheckpoint.objects.filter(name=name).values_list('position', flat=True).first()
+    return position or 0
+
+
+def set_position(name: str, position: int):
+    ProcessingCheckpoint.objects.update_or_create(name=name, defaults={'position': position})
+
+
+def reset(*names: str):
+    ProcessingCheckpoint.objects.filter(name__in=names).delete()
+
+
+def settled_rows(queryset, high_water: int, time_field: str):
+    """Rows of ``queryset`` after ``high_water`` up to the first one written within ``SETTLE_LAG``."""
+    rows = queryset.filter(id__gt=high_water)
+    unsettled = rows.filter(
+        **{f'{time_field}__gt': timezone.now() - SETTLE_LAG}
+    ).order_by('id').values_list('id', flat=True).first()
+    if unsettled is not None:
+        rows = rows.filter(id__lt=unsettled)
+    return rows
@@ -0,0 +1,180 @@
+"""
+Precomputed recommendations for guests the engine knows nothing about.
+
+A guest with no filters gets the same popularity ranking as everyone
+else, restricted at most by one mood. The cold-start table precomputes
+that ranking per (language, country, mood) cell from ``Movie.language``,
+``Movie.country`` and the guest scoring formula, so a first visit is a
+dictionary lookup plus one query for the winners' rows.
+
+Cells with too few movies are not stored; ``lookup`` falls back from the
+exact cell to language only, country only and then the whole catalog.
+The ``build_cold_start`` command writes the table to the artifact
+directory and bumps its version, and each worker reloads its copy when it
+sees the new version (a missing table is looked for again every minute).
+"""
+
+from __future__ import annotations
+import json
+import logging
+import os
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from django.conf import settings
+
+from apps.core.models import Movie
+from .cache import COLD_START, VersionedLoader
+from .constants import MOOD_KEYWORDS
+from .pagination import RANKING_SIZE
+from .utils import top_k_indices
+
+logger = logging.getLogger(__name__)
+
+TOP_N = RANKING_SIZE  # Movies kept per cell, a full first ranking
+MIN_CELL_MOVIES = 20  # Smaller cells fall back to a broader one
+MIN_SCORE = 0.3  # Same threshold as live guest scoring
+
+# (movie id, score, reasons)
+Entry = Tuple[int, float, List[str]]
+Cell = Tuple[str, str, str]
+
+
+def normalize_language(language: Optional[str]) -> str:
+    """Primary language subtag, e.g. 'sw' for 'sw-TZ'."""
+    return (language or '').strip().lower().replace('_', '-').split('-')[0]
+
+
+def normalize_country(country: Optional[str]) -> str:
+    return (country or '').strip().lower()
+
+
+def _cell_key(language: str, country: str, mood: str) -> str:
+    return f'{language}|{country}|{mood}'
+
+
+class ColdStartTable:
+    """Ranked movie lists per (language, country, mood); '' stands for any."""
+
+    def __init__(self, cells: Dict[Cell, List[Entry]], built_at: float, version: int = 0):
+        self.cells = cells
+        self.built_at = built_at
+        self.version = version
+
+    def __len__(self) -> int:
+        return len(self.cells)
+
+    def lookup(self, language: Optional[str], country: Optional[str], mood: str = '') -> Optional[List[Entry]]:
+        """Most specific stored ranking for the guest, ``None`` if the mood has none."""
+        language, country = normalize_language(language), normalize_country(country)
+        for cell in ((language, country, mood), (language, '', mood), ('', country, mood), ('', '', mood)):
+            entries = self.cells.get(cell)
+            if entries is not None:
+                return entries
+        return None
+
+    def save(self, path: Path):
+        """Write the table, replacing the previous file atomically."""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        staging = path.with_name(path.name + '.new')
+        with open(staging, 'w', encoding='utf-8') as handle:
+            json.dump({
+                'built_at': self.built_at,
+                'cells': {_cell_key(*cell): entries for cell, entries in self.cells.items()},
+            }, handle, separators=(',', ':'))
+        os.replace(staging, path)
+
+    @classmethod
+    def load(cls, path: Path, version: int = 0) -> Optional["ColdStartTable"]:
+        if not path.exists():
+            return None
+        with open(path, encoding='utf-8') as handle:
+            data = json.load(handle)
+        cells = {
+            tuple(key.split('|')): [(int(movie_id), float(score), reasons) for movie_id, score, reasons in entries]
+            for key, entries in data['cells'].items()
+        }
+        return cls(cells, data['built_at'], version)
+
+
+def cold_start_path() -> Path:
+    return Path(settings.RECOMMENDER_ARTIFACT_DIR) / 'cold_start.json'
+
+
+def _groups(values: Iterable[Tuple[str, str]]) -> Dict[Tuple[str, str], np.ndarray]:
+    """Candidate rows of every (language, country) region, wildcards included."""
+    groups: Dict[Tuple[str, str], List[int]] = defaultdict(list)
+    for row, (language, country) in enumerate(values):
+        groups[('', '')].append(row)
+        if language:
+            groups[(language, '')].append(row)
+        if country:
+            groups[('', country)].append(row)
+        if language and country:
+            groups[(language, country)].append(row)
+    return {
+        region: np.array(rows, dtype=np.int64)
+        for region, rows in groups.items()
+        if region == ('', '') or len(rows) >= MIN_CELL_MOVIES
+    }
+
+
+def build_cold_start_table(engine=None) -> ColdStartTable:
+    """Rank every region and mood cell of the catalog with the guest scoring formula."""
+    from .engine import RecommendationEngine
+
+    engine = engine or RecommendationEngine()
+    features = engine._candidate_features({})
+    regions = {
+        movie_id: (normalize_language(language), normalize_country(country))
+        for movie_id, language, country in Movie.objects.values_list('id', 'language', 'country')
+    }
+
+    # Same terms and weights as ``_get_guest_recommendations``
+    popularity = engine._calculate_popularity_scores(features)
+    base = popularity * 0.5 + features.is_featured * 0.3
+    mood_scores = {'': None}
+    for mood in MOOD_KEYWORDS:
+        mood_scores[mood] = engine._calculate_mood_scores(features, {mood: 1.0})
+
+    cells: Dict[Cell, List[Entry]] = {}
+    groups = _groups(regions.get(int(movie_id), ('', '')) for movie_id in features.ids)
+    for (language, country), rows in groups.items():
+        for mood, matches in mood_scores.items():
+            scores = base[rows] if matches is None else base[rows] + matches[rows] * 0.5
+            eligible = np.flatnonzero(scores > MIN_SCORE)
+            if (language or country) and len(eligible) < MIN_CELL_MOVIES:
+                continue
+            winners = eligible[top_k_indices(scores[eligible], TOP_N)]
+
+            entries = []
+            for i in winners:
+                row = rows[i]
+                reasons = []
+                if popularity[row] > 0.7:
+                    reasons.append("Highly rated by users")
+                if matches is not None and matches[row] > 0.5:
+                    reasons.append("Matches your mood")
+                if features.is_featured[row]:
+                    reasons.append("Featured movie")
+                entries.append((int(features.ids[row]), round(float(scores[i]), 4), reasons))
+            cells[(language, country, mood)] = entries
+    return ColdStartTable(cells, time.time())
+
+
+def _load_table(version: int) -> Optional[ColdStartTable]:
+    table = ColdStartTable.load(cold_start_path(), version)
+    if table is not None:
+        logger.info("Loaded cold-start table with %d cells (v%d)", len(table), version)
+    return table
+
+
+_table_loader = VersionedLoader(COLD_START, _load_table)
+
+
+def get_cold_start_table() -> Optional[ColdStartTable]:
+    """Process-wide table (``None`` if unbuilt), reloaded after each rebuild."""
+    return _table_loader.get()
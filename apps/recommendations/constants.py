@@ -13,13 +13,81 @@ GENRE_MAPPINGS = {
     'family': 'Family',
 }
 
+# Single source of mood keywords (English and Swahili) for mood analysis.
+# Keywords match whole words or phrases, case-insensitively.
 MOOD_KEYWORDS = {
-    'action': ['action', 'exciting', 'adventure', 'fight', 'battle'],
-    'comedy': ['funny', 'comedy', 'laugh', 'humor', 'hilarious'],
-    'drama': ['drama', 'emotional', 'serious', 'deep', 'story'],
-    'romance': ['romance', 'love', 'relationship', 'heart'],
-    'thriller': ['thriller', 'suspense', 'mystery', 'crime'],
-    'horror': ['horror', 'scary', 'fright', 'ghost', 'terror'],
-    'sci-fi': ['sci-fi', 'science', 'future', 'space', 'alien'],
-    'family': ['family', 'kids', 'children', 'friendly']
-} 
\ No newline at end of file
+    'action': [
+        'action', 'exciting', 'thrilling', 'adventure', 'fight', 'fighting', 'battle',
+        'vitendo', 'mapigano', 'kusisimua', 'vita',
+    ],
+    'comedy': [
+        'funny', 'humorous', 'humor', 'humour', 'comedy', 'laugh', 'laughing', 'hilarious',
+        'vichekesho', 'kuchekesha', 'cheka', 'kicheko',
+    ],
+    'drama': [
+        'drama', 'dramatic', 'emotional', 'serious', 'deep', 'story',
+        'tamthilia', 'hisia', 'hadithi',
+    ],
+    'romance': [
+        'romance', 'romantic', 'love', 'relationship', 'heart',
+        'mapenzi', 'upendo', 'penzi', 'kimapenzi',
+    ],
+    'thriller': [
+        'thriller', 'suspense', 'thrilling', 'mystery', 'crime',
+        'msisimko', 'siri', 'uhalifu', 'upelelezi',
+    ],
+    'horror': [
+        'horror', 'scary', 'fright', 'frightening', 'terrifying', 'ghost', 'ghosts', 'terror',
+        'kutisha', 'hofu', 'woga', 'mizimu', 'mzimu',
+    ],
+    'sci-fi': [
+        'sci-fi', 'science fiction', 'science', 'futuristic', 'future', 'space', 'alien', 'aliens',
+        'sayansi', 'siku zijazo', 'anga za juu', 'viumbe wa angani',
+    ],
+    'family': [
+        'family', 'kids', 'children', 'friendly',
+        'familia', 'kifamilia', 'watoto',
+    ],
+}
+
+# Keywords that hint at a mood less strongly than the default weight of 1.0
+MOOD_KEYWORD_WEIGHTS = {
+    'story': 0.5,
+    'hadithi': 0.5,
+    'deep': 0.5,
+    'heart': 0.5,
+    'science': 0.5,
+    'sayansi': 0.5,
+    'friendly': 0.5,
+}
+
+# TMDB genre ids, as stored in ``Movie.genres`` by movies imported from TMDB
+TMDB_GENRES = {
+    28: 'Action',
+    12: 'Adventure',
+    16: 'Animation',
+    35: 'Comedy',
+    80: 'Crime',
+    99: 'Documentary',
+    18: 'Drama',
+    10751: 'Family',
+    14: 'Fantasy',
+    36: 'History',
+    27: 'Horror',
+    10402: 'Music',
+    9648: 'Mystery',
+    10749: 'Romance',
+    878: 'Science Fiction',
+    10770: 'TV Movie',
+    53: 'Thriller',
+    10752: 'War',
+    37: 'Western',
+}
+
+# TMDB genre names that differ from our ``Genre`` names (lower case)
+GENRE_ALIASES = {
+    'science fiction': 'sci-fi',
+}
+
+# ``Movie.country`` values (lower case) of local Tanzanian movies
+LOCAL_COUNTRIES = ('tanzania', 'tz')
@@ -0,0 +1,160 @@
+"""
+"People who saved this also saved" co-occurrence between TMDB ids.
+
+Saved movies of a user (``SavedMovie``) or of an anonymous session
+(``AnonymousSavedMovie``) form a basket. ``update_cooccurrence`` reads only
+the rows saved since its last run (a per-source high-water mark, trailing
+by ``checkpoints.SETTLE_LAG`` so late commits are not skipped), turns
+them into pair count deltas against the rest of their basket, and merges
+the deltas into ``SavedMovieCooccurrence``, keeping the top
+``MAX_PARTNERS`` partners of each movie. A lookup is then one indexed
+query per seed movie, fronted by a shared cache.
+
+Only ``media_type='movie'`` saves are counted, since TMDB movie and TV ids
+overlap. Unsaving a movie does not decrement its counts.
+"""
+
+from __future__ import annotations
+import heapq
+import logging
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, Tuple
+
+from django.db import transaction
+
+from apps.core.models import AnonymousSavedMovie, SavedMovie, SavedMovieCooccurrence
+from . import checkpoints
+from .cache import KEY_PREFIX, SimilarityCache, bump_version, get_version
+
+logger = logging.getLogger(__name__)
+
+COOCCURRENCE = 'cooccurrence'
+MAX_PARTNERS = 100  # Partners stored per movie
+MAX_BASKET = 200  # Most recent saves of a basket paired with a new save
+BATCH_SIZE = 5000  # New saves read per batch
+SEED_CHUNK = 1000
+
+# (model, basket field, checkpoint name)
+SOURCES = (
+    (SavedMovie, 'user_id', 'cooccurrence:saved_movie'),
+    (AnonymousSavedMovie, 'session_id', 'cooccurrence:anonymous_saved_movie'),
+)
+
+cooccurrence_cache = SimilarityCache('cooccurrence', max_entries=4096)
+
+
+def _basket_deltas(baskets: Dict[object, List[Tuple[int, int]]], high_water: int) -> Counter:
+    """Pair count increments for the saves above ``high_water``."""
+    deltas: Counter = Counter()
+    for items in baskets.values():
+        earlier: List[int] = []
+        for row_id, tmdb_id in items:
+            if row_id > high_water:
+                # Each pair is counted once, when its later save arrives
+                for other in earlier[-MAX_BASKET:]:
+                    if other != tmdb_id:
+                        deltas[(tmdb_id, other)] += 1
+                        deltas[(other, tmdb_id)] += 1
+            earlier.append(tmdb_id)
+    return deltas
+
+
+def _source_batch(model, basket_field: str, high_water: int, batch_size: int) -> Tuple[Counter, int, int]:
+    """Deltas of the next batch of new saves, its size and the new high-water mark."""
+    new_rows = list(
+        checkpoints.settled_rows(
+            model.objects.filter(media_type='movie'), high_water, 'saved_at'
+        ).order_by('id').values_list('id', basket_field)[:batch_size]
+    )
+    if not new_rows:
+        return Counter(), 0, high_water
+
+    last_id = new_rows[-1][0]
+    baskets = defaultdict(list)
+    for row_id, basket, tmdb_id in model.objects.filter(
+        **{f'{basket_field}__in': {basket for _, basket in new_rows}},
+        id__lte=last_id,
+        media_type='movie'
+    ).order_by('id').values_list('id', basket_field, 'tmdb_id'):
+        baskets[basket].append((row_id, tmdb_id))
+    return _basket_deltas(baskets, high_water), len(new_rows), last_id
+
+
+def _apply_deltas(deltas: Counter):
+    """Merge pair increments into the stored counts and re-prune the seeds."""
+    by_seed = defaultdict(dict)
+    for (seed, other), delta in deltas.items():
+        by_seed[seed][other] = delta
+
+    seeds = list(by_seed)
+    for start in range(0, len(seeds), SEED_CHUNK):
+        chunk = seeds[start:start + SEED_CHUNK]
+        counts = {seed: dict(by_seed[seed]) for seed in chunk}
+        for seed, other, count in SavedMovieCooccurrence.objects.filter(tmdb_id__in=chunk).values_list(
+            'tmdb_id', 'other_tmdb_id', 'count'
+        ):
+            counts[seed][other] = counts[seed].get(other, 0) + count
+
+        rows = [
+            SavedMovieCooccurrence(tmdb_id=seed, other_tmdb_id=other, count=count)
+            for seed, partners in counts.items()
+            for other, count in heapq.nlargest(MAX_PARTNERS, partners.items(), key=lambda item: item[1])
+        ]
+        SavedMovieCooccurrence.objects.filter(tmdb_id__in=chunk).delete()
+        SavedMovieCooccurrence.objects.bulk_create(rows, batch_size=1000)
+
+
+def update_cooccurrence(batch_size: int = BATCH_SIZE, rebuild: bool = False) -> int:
+    """Fold saves made since the last run into the counts. Returns saves processed."""
+    if rebuild:
+        SavedMovieCooccurrence.objects.all().delete()
+        checkpoints.reset(*(name for _, _, name in SOURCES))
+
+    processed = 0
+    for model, basket_field, checkpoint in SOURCES:
+        high_water = checkpoints.get_position(checkpoint)
+        while True:
+            deltas, saves, last_id = _source_batch(model, basket_field, high_water, batch_size)
+            if not saves:
+                break
+            # Counts and high-water mark move together
+            with transaction.atomic():
+                _apply_deltas(deltas)
+                checkpoints.set_position(checkpoint, last_id)
+            logger.info("Co-occurrence: %s rows %d-%d, %d pair updates",
+                        model.__name__, high_water + 1, last_id, len(deltas))
+            processed += saves
+            high_water = last_id
+
+    if processed:
+        bump_version(COOCCURRENCE)
+    return processed
+
+
+def also_saved(tmdb_id: int, limit: int = 20) -> List[Tuple[int, int]]:
+    """``(tmdb_id, count)`` of the movies most often saved with ``tmdb_id``."""
+    key = f'{KEY_PREFIX}:{COOCCURRENCE}:{tmdb_id}:v{get_version(COOCCURRENCE)}'
+    partners = cooccurrence_cache.get_or_compute(key, lambda: [
+        (other, count) for other, count in SavedMovieCooccurrence.objects.filter(
+            tmdb_id=tmdb_id
+        ).order_by('-count', 'other_tmdb_id').values_list('other_tmdb_id', 'count')[:MAX_PARTNERS]
+    ])
+    return partners[:limit]
+
+
+def cooccurrence_scores(seed_tmdb_ids: Iterable[int], limit: int = 50) -> Dict[int, float]:
+    """
+    TMDB id -> 0-1 score of movies saved together with any of the seeds
+    (count relative to the seed's strongest partner, best seed wins).
+    """
+    seeds = set(seed_tmdb_ids)
+    scores: Dict[int, float] = {}
+    for seed in seeds:
+        partners = also_saved(seed, limit)
+        if not partners:
+            continue
+        strongest = partners[0][1]
+        for other, count in partners:
+            if other not in seeds:
+                scores[other] = max(scores.get(other, 0.0), count / strongest)
+    return scores
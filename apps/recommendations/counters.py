@@ -0,0 +1,94 @@
+"""
+Materialized per-movie popularity counters (``MovieStats``).
+
+Counters are adjusted with ``F()`` expressions as watch history and saved
+movies are written, so scoring and detail endpoints read one precomputed
+row per movie instead of aggregating on each request. ``reconcile`` rebuilds
+every row from the source tables to correct any drift (e.g. bulk writes
+that bypass signals).
+"""
+
+from __future__ import annotations
+from typing import Dict, Iterable, Optional
+
+from django.db.models import Count, F, Sum
+from django.utils import timezone
+
+from apps.core.models import Movie, MovieStats, SavedMovie, UserWatchHistory
+
+COUNTER_FIELDS = ('watch_count', 'rating_count', 'rating_sum', 'saved_count')
+
+
+def adjust(movie_id: int, **deltas):
+    """Add ``deltas`` to a movie's counters, creating its row if needed."""
+    deltas = {field: delta for field, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    MovieStats.objects.get_or_create(movie_id=movie_id)
+    MovieStats.objects.filter(movie_id=movie_id).update(
+        **{field: F(field) + delta for field, delta in deltas.items()}
+    )
+
+
+def rating_deltas(old_rating: Optional[float], new_rating: Optional[float]) -> Dict[str, float]:
+    """Counter changes when a watch history rating goes from old to new."""
+    return {
+        'rating_count': (new_rating is not None) - (old_rating is not None),
+        'rating_sum': (new_rating or 0) - (old_rating or 0),
+    }
+
+
+def adjust_saved(tmdb_id: int, delta: int):
+    """Adjust the saved count of the catalog movie with ``tmdb_id``, if any."""
+    movie_id = Movie.objects.filter(tmdb_id=tmdb_id).values_list('id', flat=True).first()
+    if movie_id is not None:
+        adjust(movie_id, saved_count=delta)
+
+
+def reconcile(movie_ids: Optional[Iterable[int]] = None) -> int:
+    """Recompute counters from the source tables. Returns rows written."""
+    movies = Movie.objects.all()
+    if movie_ids is not None:
+        movies = movies.filter(id__in=list(movie_ids))
+    ids = list(movies.values_list('id', flat=True))
+
+    stats = {movie_id: dict.fromkeys(COUNTER_FIELDS, 0) for movie_id in ids}
+
+    history = UserWatchHistory.objects.filter(movie_id__in=ids).values('movie_id').annotate(
+        watches=Count('id'), ratings=Count('rating'), total=Sum('rating')
+    )
+    for row in history:
+        stats[row['movie_id']].update(
+            watch_count=row['watches'],
+            rating_count=row['ratings'],
+            rating_sum=row['total'] or 0,
+        )
+
+    saved = SavedMovie.objects.filter(
+        tmdb_id__in=movies.exclude(tmdb_id__isnull=True).values('tmdb_id')
+    ).values('tmdb_id').annotate(saves=Count('id'))
+    saves_by_tmdb = {row['tmdb_id']: row['saves'] for row in saved}
+    for movie_id, tmdb_id in movies.exclude(tmdb_id__isnull=True).values_list('id', 'tmdb_id'):
+        stats[movie_id]['saved_count'] = saves_by_tmdb.get(tmdb_id, 0)
+
+    now = timezone.now()
+    rows = [
+        MovieStats(movie_id=movie_id, reconciled_at=now, **counters)
+        for movie_id, counters in stats.items()
+    ]
+    MovieStats.objects.bulk_create(
+        rows,
+        batch_size=1000,
+        update_conflicts=True,
+        unique_fields=['movie'],
+        update_fields=list(COUNTER_FIELDS) + ['reconciled_at'],
+    )
+    return len(rows)
+
+
+def total_ratings(movie: Movie) -> int:
+    """Number of ratings of a movie from its counters row."""
+    try:
+        return movie.stats.rating_count
+    except MovieStats.DoesNotExist:
+        return 0
@@ -3,14 +3,34 @@ Core recommendation engine for the Movie Recommender application.
 """
 
 from __future__ import annotations
-import math
-import time
-from typing import List, Dict, Any, Optional
-from django.db.models import Q, Avg, Count
+import secrets
+from typing import Callable, Iterable, Iterator, List, Dict, Any, Optional, Tuple
+
+import numpy as np
 from django.contrib.auth import get_user_model
-from apps.core.models import Movie, Genre, UserWatchHistory, RecommendationSession, RecommendationResult
-from django.utils import timezone
-from django.db.models.query import QuerySet
+from django.conf import settings
+from apps.core.models import Movie, RecommendationSession
+
+from .ann import get_ann_index
+from .cache import catalog_key, movie_similarity_cache, user_key, user_similarity_cache
+from .cold_start import get_cold_start_table
+from .collaborative import RatingMatrix, get_rating_matrix
+from .constants import GENRE_MAPPINGS
+from .cooccurrence import cooccurrence_scores
+from .diversity import DIVERSITY_POOL, clamp_diversity, mmr_order
+from .factorization import get_embedding_store
+from .feature_store import UNKNOWN, MovieFeatureStore, get_feature_store
+from .features import CandidateFeatures, movie_genre_names
+from .mood import analyze_mood
+from .persistence import save_recommendation_results
+from .precompute import load_precomputed
+from .profiling import span
+from .profile import UserProfile
+from .ranking import TopK, materialize
+from .response_cache import filter_signature, get_or_compute_response
+from .similarity_index import lookup_similar_movies
+from .text_similarity import SIMILAR_PLOT, TEXT_WEIGHT, get_text_index
+from .utils import top_k_indices
 
 User = get_user_model()
 
@@ -18,9 +38,44 @@ User = get_user_model()
 class RecommendationEngine:
     """Main recommendation engine implementing hybrid filtering."""
     
-    def __init__(self):
-        self.user_similarity_cache = {}
-        self.movie_similarity_cache = {}
+    MODES = ('hybrid', 'factors')
+    
+    def __init__(self, mode: Optional[str] = None):
+        self.mode = mode or settings.RECOMMENDER_ENGINE_MODE
+        if self.mode not in self.MODES:
+            raise ValueError(f"Unknown recommendation engine mode: {self.mode}")
+        # Shared per worker and backed by the Django cache across workers
+        self.user_similarity_cache = user_similarity_cache
+        self.movie_similarity_cache = movie_similarity_cache
+        self._rating_matrix = None
+        self._profiles = {}
+        # Worker-wide stores unless set (e.g. to a training split by evaluation)
+        self._feature_store = None
+        self._embedding_store = None
+    
+    @property
+    def rating_matrix(self) -> RatingMatrix:
+        """The worker's user x movie rating matrix, reloaded after ratings change."""
+        if self._rating_matrix is not None:
+            return self._rating_matrix
+        return get_rating_matrix()
+    
+    @property
+    def feature_store(self) -> MovieFeatureStore:
+        """The worker's columnar catalog, reloaded when the catalog changes."""
+        if self._feature_store is not None:
+            return self._feature_store
+        return get_feature_store()
+    
+    @property
+    def genre_bits(self) -> Dict[int, int]:
+        """Genre id -> bit position used in candidate genre bitmasks."""
+        return self.feature_store.genre_bits
+    
+    @property
+    def genre_name_masks(self) -> Dict[str, int]:
+        """Genre name -> single-bit genre mask."""
+        return self.feature_store.genre_name_masks
     
     def get_recommendations(
         self,
@@ -32,7 +87,10 @@ class RecommendationEngine:
         year_end: int = None,
         runtime_preference: str = None,
         include_local: bool = True,
-        limit: int = 20
+        limit: int = 20,
+        diversity: Optional[float] = None,
+        language: Optional[str] = None,
+        country: Optional[str] = None
     ) -> List[Dict[str, Any]]:
         """
         Get movie recommendations based on various criteria.
@@ -47,45 +105,108 @@ class RecommendationEngine:
             runtime_preference: 'short', 'medium', or 'long'
             include_local: Whether to include local movies
             limit: Maximum number of recommendations
+            diversity: MMR trade-off between relevance (0) and variety (1);
+                defaults to ``RECOMMENDER_DIVERSITY``
+            language: Guest's language, picks the cold-start table cell
+            country: Guest's country, picks the cold-start table cell
             
         Returns:
             List of movie recommendations with scores and reasons
         """
-        # Start with base queryset
-        queryset = Movie.objects.all()
+        # Catalog filters, applied to the feature store's columns
+        filters = {
+            'genres': genres, 'year_start': year_start, 'year_end': year_end,
+            'runtime_preference': runtime_preference, 'include_local': include_local
+        }
         
-        # Apply filters
-        queryset = self._apply_filters(
-            queryset, genres, year_start, year_end, 
-            runtime_preference, include_local
+        # Get recommendations based on user type, cached per filter signature
+        diversity = self._diversity(diversity)
+        signature = filter_signature(
+            genres=genres, mood_text=mood_text, year_start=year_start,
+            year_end=year_end, runtime_preference=runtime_preference,
+            include_local=include_local, limit=limit, diversity=diversity
         )
-        
-        # Get recommendations based on user type
-        if user and user.is_authenticated:
-            recommendations = self._get_user_recommendations(user, queryset, limit)
-        else:
-            recommendations = self._get_guest_recommendations(
-                queryset, mood_text, limit
-            )
+        with span('recommend'):
+            if user and user.is_authenticated:
+                # Plain rankings come from the nightly batch while it is fresh
+                recommendations = None
+                if not self._is_filtered(filters) and diversity == 0:
+                    with span('precomputed'):
+                        recommendations = load_precomputed(user, limit)
+                if recommendations is None:
+                    recommendations = get_or_compute_response(
+                        signature, self.mode,
+                        lambda: self._get_user_recommendations(user, filters, limit, diversity=diversity),
+                        user_id=user.id
+                    )
+            else:
+                # Unfiltered guests are served from the precomputed cold-start table
+                recommendations = self._get_cold_start_recommendations(
+                    filters, mood_text, language, country, limit, diversity
+                )
+                if recommendations is None:
+                    recommendations = get_or_compute_response(
+                        signature, self.mode,
+                        lambda: self._get_guest_recommendations(filters, mood_text, limit, diversity=diversity)
+                    )
         
         # Create or update recommendation session
-        session = self._create_recommendation_session(
-            user, session_token, genres, mood_text, 
-            year_start, year_end, runtime_preference, include_local
-        )
+        with span('session'):
+            session = self._create_recommendation_session(
+                user, session_token, genres, mood_text, 
+                year_start, year_end, runtime_preference, include_local
+            )
         
         # Save results
-        self._save_recommendation_results(session, recommendations)
+        with span('persist') as persist:
+            self._save_recommendation_results(session, recommendations)
+            persist.add_rows(len(recommendations))
         
         return recommendations
     
-    def get_user_recommendations(
-        self, 
-        user: "User", 
-        limit: int = 20
-    ) -> List[Dict[str, Any]]:
-        """Get personalized recommendations for authenticated user."""
-        return self._get_user_recommendations(user, Movie.objects.all(), limit)
+    def iter_recommendation_stages(
+        self,
+        user: Optional["User"] = None,
+        session_token: Optional[str] = None,
+        genres: List[str] = None,
+        mood_text: str = None,
+        year_start: int = None,
+        year_end: int = None,
+        runtime_preference: str = None,
+        include_local: bool = True,
+        limit: int = 20,
+        diversity: Optional[float] = None,
+        language: Optional[str] = None,
+        country: Optional[str] = None
+    ) -> Iterator[Tuple[str, List[Dict[str, Any]]]]:
+        """
+        Yield progressively refined recommendations as ``(stage, results)``.
+        
+        Stages are 'popular' (popularity and featured only), 'content' for
+        authenticated users (content scores, no collaborative filtering) and
+        'final', the result of ``get_recommendations`` for the same arguments.
+        """
+        filters = {
+            'genres': genres, 'year_start': year_start, 'year_end': year_end,
+            'runtime_preference': runtime_preference, 'include_local': include_local
+        }
+        
+        diversity = self._diversity(diversity)
+        
+        # Cheapest signal first, so the client has something to show
+        yield 'popular', self._get_guest_recommendations(filters, None, limit, diversity=diversity)
+        
+        if user and user.is_authenticated:
+            yield 'content', self._get_user_recommendations(
+                user, filters, limit, collaborative=False, diversity=diversity
+            )
+        
+        yield 'final', self.get_recommendations(
+            user=user, session_token=session_token, genres=genres,
+            mood_text=mood_text, year_start=year_start, year_end=year_end,
+            runtime_preference=runtime_preference, include_local=include_local,
+            limit=limit, diversity=diversity, language=language, country=country
+        )
     
     def get_similar_movies(
         self, 
@@ -93,358 +214,448 @@ class RecommendationEngine:
         limit: int = 6
     ) -> List[Dict[str, Any]]:
         """Get movies similar to a given movie."""
-        similar_movies = []
-        
-        # Get movies with similar genres
-        genre_ids = movie.genres.values_list('id', flat=True)
-        similar_queryset = Movie.objects.filter(
-            genres__id__in=genre_ids
-        ).exclude(id=movie.id).distinct()
-        
-        for similar_movie in similar_queryset[:limit * 2]:
-            similarity_score = self._calculate_movie_similarity(movie, similar_movie)
-            if similarity_score > 0.3:  # Minimum similarity threshold
-                similar_movies.append({
-                    'movie': similar_movie,
-                    'score': similarity_score,
-                    'reasons': self._get_similarity_reasons(movie, similar_movie)
-                })
-        
-        # Sort by similarity score and return top results
-        similar_movies.sort(key=lambda x: x['score'], reverse=True)
-        return similar_movies[:limit]
+        # Precomputed index: one indexed lookup
+        with span('similar-index'):
+            similar_movies = lookup_similar_movies(movie.id, limit)
+        if similar_movies:
+            return similar_movies
+        
+        # Approximate neighbours in embedding space
+        with span('similar-ann'):
+            similar_movies = self._get_ann_similar_movies(movie, limit)
+        if similar_movies:
+            return similar_movies
+        
+        # Movie not indexed yet; score candidates live
+        with span('similar-live') as live:
+            # Get movies with similar genres, from the feature store's bitmasks
+            store = self.feature_store
+            row = store.rows_of([movie.id])[0]
+            mask = int(store.genre_masks[row]) if row >= 0 else 0
+            shares_genre = (store.genre_masks & np.uint64(mask)) != 0
+            shares_genre &= store.ids != movie.id
+            candidate_ids = [int(movie_id) for movie_id in store.ids[shares_genre][:limit * 2]]
+            
+            top = TopK(limit, min_score=0.3)  # Minimum similarity threshold
+            for similar_movie in Movie.objects.in_bulk(candidate_ids).values():
+                similarity_score = self._calculate_movie_similarity(movie, similar_movie)
+                top.push(similarity_score, similar_movie.id, similar_movie)
+            
+            # Reasons only for the winners
+            ranked = top.ranked()
+            live.add_rows(len(ranked))
+            return materialize(
+                ranked,
+                lambda similar_movie: self._get_similarity_reasons(movie, similar_movie),
+                movies={movie_id: similar_movie for _, movie_id, similar_movie in ranked}
+            )
+    
+    def _get_ann_similar_movies(
+        self, 
+        movie: "Movie", 
+        limit: int
+    ) -> List[Dict[str, Any]]:
+        """Nearest movies in embedding space from the ANN index, if one is built."""
+        index = get_ann_index()
+        if index is None:
+            return []
+        
+        neighbours = [
+            (score, movie_id, None) for movie_id, score in index.query_movie(movie.id, k=limit)
+            if score > 0.3  # Minimum similarity threshold
+        ]
+        return materialize(neighbours, lambda _: ["Enjoyed by viewers who liked this movie"])
     
     def _get_user_recommendations(
         self, 
         user: "User", 
-        queryset: QuerySet["Movie"], 
-        limit: int
+        filters: Dict[str, Any], 
+        limit: int,
+        collaborative: bool = True,
+        diversity: float = 0.0
     ) -> List[Dict[str, Any]]:
         """Get personalized recommendations for authenticated user."""
-        recommendations = []
-        
-        # Get user's watch history and preferences
-        user_ratings = UserWatchHistory.objects.filter(user=user)
-        rated_movie_ids = user_ratings.values_list('movie_id', flat=True)
-        
-        # Exclude already rated movies
-        queryset = queryset.exclude(id__in=rated_movie_ids)
-        
-        # Get user's favorite genres
-        favorite_genres = self._get_user_favorite_genres(user)
-        
-        # Calculate recommendation scores
-        for movie in queryset[:limit * 3]:  # Get more candidates for better selection
-            score = 0
+        # Snapshot of the user's watch history and preferences
+        with span('profile'):
+            profile = self._get_user_profile(user)
+        
+        # Feature columns of every candidate, excluding already rated movies
+        features = self._candidate_features(filters, profile.rated_movie_ids)
+        if not len(features):
+            return []
+        
+        # Latent-factor scoring, for users covered by the trained embeddings
+        if self.mode == 'factors':
+            recommendations = self._get_factor_recommendations(profile, features, limit, diversity)
+            if recommendations is not None:
+                return recommendations
+        
+        # Content-based scoring
+        with span('content') as content:
+            content_scores = self._calculate_content_scores(features, profile)
+            content.add_rows(len(features))
+        scores = content_scores * 0.6
+        
+        # Collaborative filtering score
+        collab_scores = np.zeros(len(features))
+        if collaborative and profile.rating_count > 5:  # Need minimum ratings for collaborative filtering
+            with span('collaborative') as collab:
+                collab_scores = self._calculate_collaborative_scores(features, profile)
+                collab.add_rows(len(features))
+            scores += collab_scores * 0.4
+        
+        # Saved together with the user's saved movies
+        with span('cooccurrence'):
+            cooccurrence = self._calculate_cooccurrence_scores(features, profile)
+        scores += cooccurrence * 0.3
+        
+        # Local movie bonus
+        local_bonus = features.is_local & bool(user.include_local_movies)
+        scores += local_bonus * 0.2
+        
+        # Year preference
+        scores += self._calculate_year_preferences(features, profile) * 0.1
+        
+        def reasons(i: int) -> List[str]:
             reasons = []
-            
-            # Content-based scoring
-            content_score = self._calculate_content_score(movie, user, favorite_genres)
-            score += content_score * 0.6
-            if content_score > 0.5:
+            if content_scores[i] > 0.5:
                 reasons.append("Matches your favorite genres")
-            
-            # Collaborative filtering score
-            if user_ratings.count() > 5:  # Need minimum ratings for collaborative filtering
-                collab_score = self._calculate_collaborative_score(movie, user)
-                score += collab_score * 0.4
-                if collab_score > 0.5:
-                    reasons.append("Liked by users with similar taste")
-            
-            # Local movie bonus
-            if movie.is_local and user.include_local_movies:
-                score += 0.2
+            if collab_scores[i] > 0.5:
+                reasons.append("Liked by users with similar taste")
+            if cooccurrence[i] > 0.5:
+                reasons.append("Saved by people who saved movies you like")
+            if local_bonus[i]:
                 reasons.append("Local Tanzanian movie")
-            
-            # Year preference
-            year_score = self._calculate_year_preference(movie, user)
-            score += year_score * 0.1
-            
-            if score > 0.3:  # Minimum score threshold
-                recommendations.append({
-                    'movie': movie,
-                    'score': score,
-                    'reasons': reasons
-                })
+            return reasons
         
-        # Sort by score and return top results
-        recommendations.sort(key=lambda x: x['score'], reverse=True)
-        return recommendations[:limit]
+        return self._select_top(features, scores, limit, reasons, diversity=diversity)
     
     def _get_guest_recommendations(
         self, 
-        queryset: QuerySet["Movie"], 
+        filters: Dict[str, Any], 
         mood_text: str, 
-        limit: int
+        limit: int,
+        diversity: float = 0.0
     ) -> List[Dict[str, Any]]:
         """Get recommendations for guest users based on mood and popularity."""
-        recommendations = []
-        
         # Analyze mood text if provided
-        mood_keywords = self._analyze_mood_text(mood_text) if mood_text else []
-        
-        for movie in queryset[:limit * 2]:
-            score = 0
+        mood_keywords = self._analyze_mood_text(mood_text) if mood_text else {}
+        
+        # Feature columns of every candidate
+        features = self._candidate_features(filters)
+        if not len(features):
+            return []
+        
+        # Popularity score
+        with span('popularity') as popularity:
+            popularity_scores = self._calculate_popularity_scores(features)
+            popularity.add_rows(len(features))
+        scores = popularity_scores * 0.5
+        
+        # Mood matching
+        mood_scores = np.zeros(len(features))
+        if mood_keywords:
+            with span('mood') as mood:
+                mood_scores = self._calculate_mood_scores(features, mood_keywords)
+                mood.add_rows(len(features))
+            scores += mood_scores * 0.5
+        
+        # Featured movie bonus
+        scores += features.is_featured * 0.3
+        
+        def reasons(i: int) -> List[str]:
             reasons = []
-            
-            # Popularity score
-            popularity_score = self._calculate_popularity_score(movie)
-            score += popularity_score * 0.5
-            if popularity_score > 0.7:
+            if popularity_scores[i] > 0.7:
                 reasons.append("Highly rated by users")
-            
-            # Mood matching
-            if mood_keywords:
-                mood_score = self._calculate_mood_score(movie, mood_keywords)
-                score += mood_score * 0.5
-                if mood_score > 0.5:
-                    reasons.append("Matches your mood")
-            
-            # Featured movie bonus
-            if movie.is_featured:
-                score += 0.3
+            if mood_scores[i] > 0.5:
+                reasons.append("Matches your mood")
+            if features.is_featured[i]:
                 reasons.append("Featured movie")
-            
-            if score > 0.3:
-                recommendations.append({
-                    'movie': movie,
-                    'score': score,
-                    'reasons': reasons
-                })
+            return reasons
         
-        recommendations.sort(key=lambda x: x['score'], reverse=True)
-        return recommendations[:limit]
+        return self._select_top(features, scores, limit, reasons, diversity=diversity)
+    
+    @staticmethod
+    def _is_filtered(filters: Dict[str, Any]) -> bool:
+        """Whether the catalog filters narrow the candidates (precomputed lists assume none)."""
+        narrowed = any(filters[name] for name in ('genres', 'year_start', 'year_end', 'runtime_preference'))
+        return narrowed or not filters['include_local']
+    
+    def _get_cold_start_recommendations(
+        self,
+        filters: Dict[str, Any],
+        mood_text: str,
+        language: Optional[str],
+        country: Optional[str],
+        limit: int,
+        diversity: float = 0.0
+    ) -> Optional[List[Dict[str, Any]]]:
+        """Precomputed guest list for the region and mood, or ``None`` to score live."""
+        # The table only holds plain rankings with at most one mood
+        if self._is_filtered(filters) or diversity > 0:
+            return None
+        mood_keywords = self._analyze_mood_text(mood_text) if mood_text else {}
+        if len(mood_keywords) > 1:
+            return None
+        
+        with span('cold-start') as cold_start:
+            table = get_cold_start_table()
+            entries = table.lookup(language, country, next(iter(mood_keywords), '')) if table else None
+            if entries is None:
+                return None
+            
+            cold_start.add_rows(min(len(entries), limit))
+            return materialize(
+                [(score, movie_id, reasons) for movie_id, score, reasons in entries[:limit]],
+                list
+            )
+    
+    def _get_factor_recommendations(
+        self,
+        profile: UserProfile,
+        features: CandidateFeatures,
+        limit: int,
+        diversity: float = 0.0
+    ) -> Optional[List[Dict[str, Any]]]:
+        """Score candidates with one matrix-vector product over item embeddings."""
+        store = self._embedding_store if self._embedding_store is not None else get_embedding_store()
+        if store is None:
+            return None
+        
+        with span('factors') as factors:
+            scores = store.score(profile.user_id, features.ids)
+            factors.add_rows(len(features))
+        if scores is None:  # User not covered by the last training run
+            return None
+        
+        return self._select_top(
+            features, scores, limit,
+            lambda i: ["Popular with viewers who share your taste"],
+            min_score=0.0,
+            diversity=diversity
+        )
+    
+    def _select_top(
+        self,
+        features: CandidateFeatures,
+        scores: np.ndarray,
+        limit: int,
+        reasons: Callable[[int], List[str]],
+        min_score: float = 0.3,
+        diversity: float = 0.0
+    ) -> List[Dict[str, Any]]:
+        """
+        Pick the top ``limit`` candidates above the minimum score and load
+        them, re-ranked for variety (MMR) when ``diversity`` is set.
+        """
+        with span('select'):
+            eligible = np.flatnonzero(scores > min_score)
+            if diversity > 0:
+                pool = eligible[top_k_indices(scores[eligible], max(DIVERSITY_POOL, limit))]
+                winners = pool[mmr_order(
+                    scores[pool], features.genre_masks[pool], features.years[pool], limit, diversity
+                )]
+            else:
+                winners = eligible[top_k_indices(scores[eligible], limit)]
+            
+            # Dicts, movie rows and reasons for the winners only
+            return materialize(
+                [(scores[i], int(features.ids[i]), i) for i in winners],
+                reasons
+            )
+    
+    def _diversity(self, diversity: Optional[float]) -> float:
+        """Per-call diversity, or the configured default."""
+        return clamp_diversity(settings.RECOMMENDER_DIVERSITY if diversity is None else diversity)
+    
+    def _candidate_features(
+        self,
+        filters: Dict[str, Any],
+        exclude_ids: Iterable[int] = ()
+    ) -> CandidateFeatures:
+        """Feature columns of the filtered catalog, from the in-process store."""
+        store = self.feature_store
+        with span('filters') as filtering:
+            selected = self._apply_filters(store, **filters)
+            filtering.add_rows(len(store))
+        with span('candidates') as candidates:
+            features = store.candidates(selected, exclude_ids)
+            candidates.add_rows(len(features))
+        return features
     
     def _apply_filters(
         self, 
-        queryset: QuerySet["Movie"], 
-        genres: List[str], 
-        year_start: int, 
-        year_end: int, 
-        runtime_preference: str, 
-        include_local: bool
-    ) -> QuerySet["Movie"]:
-        """Apply various filters to the movie queryset."""
+        store: MovieFeatureStore, 
+        genres: List[str] = None, 
+        year_start: int = None, 
+        year_end: int = None, 
+        runtime_preference: str = None, 
+        include_local: bool = True
+    ) -> np.ndarray:
+        """Boolean mask of the catalog rows passing the filters."""
+        selected = store.all()
         
         # Genre filter
         if genres:
-            queryset = queryset.filter(genres__name__in=genres).distinct()
+            mask = 0
+            for name in genres:
+                mask |= store.genre_name_masks.get(name, 0)
+            selected &= (store.genre_masks & np.uint64(mask)) != 0
         
-        # Year filter
+        # Year filter (movies without a year never match a year bound)
         if year_start:
-            queryset = queryset.filter(year__gte=year_start)
+            selected &= store.years >= year_start
         if year_end:
-            queryset = queryset.filter(year__lte=year_end)
+            selected &= (store.years <= year_end) & (store.years > 0)
         
-        # Runtime filter
+        # Runtime filter (movies without a runtime are kept)
         if runtime_preference:
+            runtimes = store.runtimes
+            unknown = runtimes == UNKNOWN
             if runtime_preference == 'short':
-                queryset = queryset.filter(runtime__lte=90)
+                selected &= unknown | (runtimes <= 90)
             elif runtime_preference == 'medium':
-                queryset = queryset.filter(runtime__gt=90, runtime__lte=120)
+                selected &= unknown | ((runtimes > 90) & (runtimes <= 120))
             elif runtime_preference == 'long':
-                queryset = queryset.filter(runtime__gt=120)
+                selected &= unknown | (runtimes > 120)
         
         # Local movies filter
         if not include_local:
-            queryset = queryset.filter(is_local=False)
+            selected &= ~store.is_local
         
-        return queryset
+        return selected
     
-    def _get_user_favorite_genres(self, user: "User") -> List[str]:
-        """Get user's favorite genres based on watch history."""
-        user_ratings = UserWatchHistory.objects.filter(
-            user=user, 
-            rating__gte=4
-        ).select_related('movie')
-        
-        genre_counts = {}
-        for rating in user_ratings:
-            for genre in rating.movie.genres.all():
-                genre_counts[genre.name] = genre_counts.get(genre.name, 0) + 1
-        
-        # Return top 3 favorite genres
-        return sorted(genre_counts.items(), key=lambda x: x[1], reverse=True)[:3]
+    def _get_user_profile(self, user: "User") -> UserProfile:
+        """Get the user's profile snapshot, built at most once per engine."""
+        if user.id not in self._profiles:
+            self._profiles[user.id] = UserProfile.for_user(user)
+        return self._profiles[user.id]
+    
+    def _get_user_favorite_genres(self, user: "User") -> List[tuple]:
+        """Get user's top 3 favorite genres as (name, count) pairs."""
+        return self._get_user_profile(user).favorite_genres
     
-    def _calculate_content_score(
+    def _calculate_content_scores(
         self, 
-        movie: "Movie", 
-        user: "User", 
-        favorite_genres: List[tuple]
-    ) -> float:
-        """Calculate content-based recommendation score."""
-        score = 0
+        features: CandidateFeatures, 
+        profile: UserProfile
+    ) -> np.ndarray:
+        """Calculate content-based recommendation scores for all candidates."""
+        scores = np.zeros(len(features))
         
         # Genre matching
-        movie_genres = set(movie.genres.values_list('name', flat=True))
-        for genre_name, count in favorite_genres:
-            if genre_name in movie_genres:
-                score += count * 0.3
+        for genre_name, count in profile.favorite_genres:
+            mask = self.genre_name_masks.get(genre_name)
+            if mask:
+                scores += features.has_any_genre(mask) * (count * 0.3)
         
         # Rating quality
-        if movie.tmdb_rating:
-            score += (movie.tmdb_rating / 10) * 0.2
+        scores += (features.ratings / 10) * 0.2
         
-        return min(score, 1.0)
+        return np.minimum(scores, 1.0)
     
-    def _calculate_collaborative_score(self, movie: "Movie", user: "User") -> float:
-        """Calculate collaborative filtering score."""
+    def _calculate_collaborative_scores(
+        self, 
+        features: CandidateFeatures, 
+        profile: UserProfile
+    ) -> np.ndarray:
+        """Calculate collaborative filtering scores for all candidates."""
         # Find similar users
-        similar_users = self._find_similar_users(user)
+        similar_users = self._find_similar_users(profile.user_id)
         
         if not similar_users:
-            return 0
-        
-        # Calculate average rating from similar users
-        total_rating = 0
-        rating_count = 0
-        
-        for similar_user, similarity in similar_users:
-            try:
-                rating = UserWatchHistory.objects.get(
-                    user=similar_user, 
-                    movie=movie
-                ).rating
-                if rating:
-                    total_rating += rating * similarity
-                    rating_count += similarity
-            except UserWatchHistory.DoesNotExist:
-                continue
+            return np.zeros(len(features))
         
-        if rating_count > 0:
-            return (total_rating / rating_count) / 5  # Normalize to 0-1
-        return 0
+        # Similarity-weighted average of neighbour ratings, read from the matrix
+        return self.rating_matrix.neighbour_scores(similar_users, features.ids)
     
-    def _find_similar_users(self, user: "User") -> List[tuple]:
-        """Find users with similar taste."""
-        if user.id in self.user_similarity_cache:
-            return self.user_similarity_cache[user.id]
-        
-        user_ratings = UserWatchHistory.objects.filter(user=user)
-        similar_users = []
-        
-        # Get all other users who rated the same movies
-        other_users = User.objects.exclude(id=user.id)
-        
-        for other_user in other_users:
-            similarity = self._calculate_user_similarity(user, other_user)
-            if similarity > 0.3:  # Minimum similarity threshold
-                similar_users.append((other_user, similarity))
-        
-        # Sort by similarity and cache results
-        similar_users.sort(key=lambda x: x[1], reverse=True)
-        self.user_similarity_cache[user.id] = similar_users[:10]
-        
-        return self.user_similarity_cache[user.id]
+    def _calculate_cooccurrence_scores(
+        self, 
+        features: CandidateFeatures, 
+        profile: UserProfile
+    ) -> np.ndarray:
+        """Score candidates saved together with the user's saved movies."""
+        scores = np.zeros(len(features))
+        if not profile.saved_tmdb_ids:
+            return scores
+        
+        by_tmdb = cooccurrence_scores(profile.saved_tmdb_ids)
+        if not by_tmdb:
+            return scores
+        
+        # Match candidate TMDB ids against the partners with a sorted lookup
+        tmdb_ids = np.array(sorted(by_tmdb), dtype=np.int64)
+        values = np.array([by_tmdb[tmdb_id] for tmdb_id in tmdb_ids])
+        positions = np.minimum(np.searchsorted(tmdb_ids, features.tmdb_ids), len(tmdb_ids) - 1)
+        found = tmdb_ids[positions] == features.tmdb_ids
+        scores[found] = values[positions[found]]
+        return scores
     
-    def _calculate_user_similarity(self, user1: "User", user2: "User") -> float:
-        """Calculate similarity between two users using Pearson correlation."""
-        # Get movies rated by both users
-        user1_ratings = UserWatchHistory.objects.filter(user=user1)
-        user2_ratings = UserWatchHistory.objects.filter(user=user2)
-        
-        # Find common movies
-        user1_movies = {r.movie_id: r.rating for r in user1_ratings if r.rating}
-        user2_movies = {r.movie_id: r.rating for r in user2_ratings if r.rating}
-        
-        common_movies = set(user1_movies.keys()) & set(user2_movies.keys())
-        
-        if len(common_movies) < 3:  # Need minimum common movies
-            return 0
-        
-        # Calculate Pearson correlation
-        n = len(common_movies)
-        sum1 = sum(user1_movies[movie_id] for movie_id in common_movies)
-        sum2 = sum(user2_movies[movie_id] for movie_id in common_movies)
-        sum1_sq = sum(user1_movies[movie_id] ** 2 for movie_id in common_movies)
-        sum2_sq = sum(user2_movies[movie_id] ** 2 for movie_id in common_movies)
-        p_sum = sum(user1_movies[movie_id] * user2_movies[movie_id] for movie_id in common_movies)
-        
-        num = p_sum - (sum1 * sum2 / n)
-        den = math.sqrt((sum1_sq - sum1 ** 2 / n) * (sum2_sq - sum2 ** 2 / n))
-        
-        if den == 0:
-            return 0
-        
-        return max(0, num / den)  # Return non-negative similarity
+    def _find_similar_users(self, user_id: int) -> List[tuple]:
+        """Find users with similar taste as (user_id, similarity) pairs."""
+        # Keyed on the user's own rating version; drift from other users'
+        # new ratings is bounded by the cache timeout
+        return self.user_similarity_cache.get_or_compute(
+            user_key('neighbours', user_id),
+            lambda: self.rating_matrix.neighbours(user_id)
+        )
     
-    def _calculate_popularity_score(self, movie: "Movie") -> float:
-        """Calculate popularity score based on ratings and watch count."""
-        score = 0
-        
+    def _calculate_popularity_scores(self, features: CandidateFeatures) -> np.ndarray:
+        """Calculate popularity scores based on ratings and watch count."""
         # Rating score
-        if movie.tmdb_rating:
-            score += (movie.tmdb_rating / 10) * 0.6
-        
-        # Watch count score
-        watch_count = UserWatchHistory.objects.filter(movie=movie).count()
-        if watch_count > 0:
-            score += min(watch_count / 100, 1.0) * 0.4
-        
-        return score
-    
-    def _analyze_mood_text(self, mood_text: str) -> List[str]:
-        """Analyze mood text and extract keywords."""
-        # Simple keyword extraction - in production, use NLP libraries
-        mood_keywords = []
-        mood_text_lower = mood_text.lower()
-        
-        mood_mappings = {
-            'action': ['action', 'exciting', 'thrilling', 'adventure'],
-            'comedy': ['funny', 'humorous', 'comedy', 'laugh'],
-            'drama': ['dramatic', 'emotional', 'serious', 'deep'],
-            'romance': ['romantic', 'love', 'romance', 'relationship'],
-            'thriller': ['suspense', 'thrilling', 'mystery', 'crime'],
-            'horror': ['scary', 'horror', 'frightening', 'terrifying'],
-            'sci-fi': ['sci-fi', 'science fiction', 'futuristic', 'space'],
-            'family': ['family', 'kids', 'children', 'friendly']
-        }
+        scores = (features.ratings / 10) * 0.6
         
-        for genre, keywords in mood_mappings.items():
-            if any(keyword in mood_text_lower for keyword in keywords):
-                mood_keywords.append(genre)
+        # Watch count score, from the materialized per-movie counters
+        scores += np.minimum(features.watch_counts / 100, 1.0) * 0.4
         
-        return mood_keywords
+        return scores
+    
+    def _analyze_mood_text(self, mood_text: str) -> Dict[str, float]:
+        """Analyze mood text into weighted mood scores."""
+        return analyze_mood(mood_text)
     
-    def _calculate_mood_score(self, movie: "Movie", mood_keywords: List[str]) -> float:
-        """Calculate how well a movie matches given mood keywords."""
+    def _calculate_mood_scores(
+        self, 
+        features: CandidateFeatures, 
+        mood_keywords: Dict[str, float]
+    ) -> np.ndarray:
+        """Calculate how well each candidate matches the weighted mood keywords."""
         if not mood_keywords:
-            return 0
+            return np.zeros(len(features))
         
-        movie_genres = set(movie.genres.values_list('name', flat=True))
-        matches = sum(1 for keyword in mood_keywords if keyword in movie_genres)
+        matches = np.zeros(len(features))
+        for keyword, weight in mood_keywords.items():
+            mask = self.genre_name_masks.get(GENRE_MAPPINGS.get(keyword, keyword))
+            if mask:
+                matches += features.has_any_genre(mask) * weight
         
-        return matches / len(mood_keywords)
+        return matches / sum(mood_keywords.values())
     
-    def _calculate_year_preference(self, movie: "Movie", user: "User") -> float:
-        """Calculate year preference score based on user's watch history."""
-        user_movies = UserWatchHistory.objects.filter(user=user).select_related('movie')
-        
-        if not user_movies:
-            return 0
-        
-        # Calculate average year of user's watched movies
-        avg_year = sum(rating.movie.year for rating in user_movies) / len(user_movies)
+    def _calculate_year_preferences(
+        self, 
+        features: CandidateFeatures, 
+        profile: UserProfile
+    ) -> np.ndarray:
+        """Calculate year preference scores based on user's watch history."""
+        if profile.average_year is None:
+            return np.zeros(len(features))
         
         # Score based on how close the movie year is to user's preference
-        year_diff = abs(movie.year - avg_year)
-        if year_diff <= 5:
-            return 0.2
-        elif year_diff <= 10:
-            return 0.1
-        else:
-            return 0
+        year_diff = np.abs(features.years - profile.average_year)
+        with np.errstate(invalid='ignore'):
+            return np.select([year_diff <= 5, year_diff <= 10], [0.2, 0.1], default=0.0)
     
     def _calculate_movie_similarity(self, movie1: "Movie", movie2: "Movie") -> float:
         """Calculate similarity between two movies."""
-        cache_key = tuple(sorted([movie1.id, movie2.id]))
+        cache_key = catalog_key('movie_similarity', *sorted([movie1.id, movie2.id]))
         
-        if cache_key in self.movie_similarity_cache:
-            return self.movie_similarity_cache[cache_key]
+        cached = self.movie_similarity_cache.get(cache_key)
+        if cached is not None:
+            return cached
         
         # Genre similarity
-        genres1 = set(movie1.genres.values_list('name', flat=True))
-        genres2 = set(movie2.genres.values_list('name', flat=True))
+        genres1 = set(movie_genre_names(movie1.genres))
+        genres2 = set(movie_genre_names(movie2.genres))
         
         if not genres1 or not genres2:
             similarity = 0
@@ -454,13 +665,21 @@ class RecommendationEngine:
             similarity = intersection / union if union > 0 else 0
         
         # Year similarity (closer years = higher similarity)
-        year_diff = abs(movie1.year - movie2.year)
-        year_similarity = max(0, 1 - (year_diff / 50))  # 50 years = 0 similarity
+        year_similarity = 0
+        if movie1.year and movie2.year:
+            year_diff = abs(movie1.year - movie2.year)
+            year_similarity = max(0, 1 - (year_diff / 50))  # 50 years = 0 similarity
         
         # Combine similarities
         final_similarity = (similarity * 0.7) + (year_similarity * 0.3)
         
-        self.movie_similarity_cache[cache_key] = final_similarity
+        # Plot similarity from the offline TF-IDF index, if one is built
+        text_index = get_text_index()
+        if text_index is not None:
+            text_similarity = text_index.similarity(movie1.id, movie2.id)
+            final_similarity = final_similarity * (1 - TEXT_WEIGHT) + text_similarity * TEXT_WEIGHT
+        
+        self.movie_similarity_cache.set(cache_key, final_similarity)
         return final_similarity
     
     def _get_similarity_reasons(self, movie1: "Movie", movie2: "Movie") -> List[str]:
@@ -468,18 +687,22 @@ class RecommendationEngine:
         reasons = []
         
         # Genre reasons
-        genres1 = set(movie1.genres.values_list('name', flat=True))
-        genres2 = set(movie2.genres.values_list('name', flat=True))
+        genres1 = set(movie_genre_names(movie1.genres))
+        genres2 = set(movie_genre_names(movie2.genres))
         common_genres = genres1 & genres2
         
         if common_genres:
-            reasons.append(f"Both are {', '.join(common_genres)} movies")
+            reasons.append(f"Both are {', '.join(sorted(common_genres))} movies")
         
         # Year reason
-        year_diff = abs(movie1.year - movie2.year)
-        if year_diff <= 5:
+        if movie1.year and movie2.year and abs(movie1.year - movie2.year) <= 5:
             reasons.append("From the same era")
         
+        # Plot reason
+        text_index = get_text_index()
+        if text_index is not None and text_index.similarity(movie1.id, movie2.id) >= SIMILAR_PLOT:
+            reasons.append("Similar storyline")
+        
         return reasons
     
     def _create_recommendation_session(
@@ -510,7 +733,7 @@ class RecommendationEngine:
         else:
             session = RecommendationSession.objects.create(
                 user=user,
-                session_token=f"session_{user.id if user else 'guest'}_{int(time.time())}",
+                session_token=secrets.token_urlsafe(16),
                 genres=genres or [],
                 mood_text=mood_text or '',
                 year_start=year_start,
@@ -526,15 +749,5 @@ class RecommendationEngine:
         session: "RecommendationSession", 
         recommendations: List[Dict[str, Any]]
     ):
-        """Save recommendation results to database."""
-        # Clear existing results
-        RecommendationResult.objects.filter(session=session).delete()
-        
-        # Save new results
-        for rec in recommendations:
-            RecommendationResult.objects.create(
-                session=session,
-                movie=rec['movie'],
-                score=rec['score'],
-                reasons=rec['reasons']
-            ) 
\ No newline at end of file
+        """Save recommendation results to database (bulk or write-behind)."""
+        save_recommendation_results(session, recommendations)
@@ -0,0 +1,13 @@
+"""
+Offline evaluation and latency benchmarking of the recommendation engine.
+"""
+
+from .dataset import RatingDataset, relevant_items, temporal_split
+from .harness import MODES, compare, evaluate, format_table
+from .metrics import coverage, latency_percentiles, ndcg_at_k, precision_at_k, recall_at_k
+
+__all__ = [
+    'MODES', 'RatingDataset', 'compare', 'coverage', 'evaluate', 'format_table',
+    'latency_percentiles', 'ndcg_at_k', 'precision_at_k', 'recall_at_k',
+    'relevant_items', 'temporal_split',
+]
@@ -0,0 +1,237 @@
+"""
+Offline evaluation of the engine's scoring paths on a temporal split.
+
+Each mode is scored with an engine whose rating matrix, user profiles,
+user neighbours and (for ``factors``) embeddings are built from the
+training split only, so nothing from the held-out period leaks into the
+ranking. The engine's own scoring methods are called, so every weight and
+formula is the one served in production; the catalog features come from
+the feature store and winners are loaded from the database as usual.
+
+With ``end_to_end`` the rankings instead come from the public
+``get_recommendations``, so the precomputed rows, response cache, session
+and result writes of a real request are included. The precomputed rows and
+cached lists were not built from the training split, so that mode is for
+latency and query counts rather than quality. It needs real users, and its
+writes are rolled back.
+
+For each mode the harness reports precision@k, recall@k, NDCG@k and
+catalog coverage, the p50/p95/p99 latency of one ranking and the number
+of database queries it issued. ``compare`` flags regressions against a
+saved baseline run.
+"""
+
+from __future__ import annotations
+import time
+from collections import Counter
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+import numpy as np
+from django.db import connection, transaction
+from scipy import sparse
+
+from apps.core.models import User
+from ..collaborative import RatingMatrix
+from ..factorization import EmbeddingStore, train_als
+from ..feature_store import MovieFeatureStore, UNKNOWN
+from ..features import mask_to_names
+from ..profile import FAVORITE_GENRE_LIMIT, FAVORITE_MIN_RATING, UserProfile
+from .dataset import RatingDataset, relevant_items, temporal_split
+from .metrics import coverage, latency_percentiles, ndcg_at_k, precision_at_k, recall_at_k
+
+MODES = ('popular', 'hybrid', 'factors')  # 'popular' is the guest path, as a baseline
+QUALITY_METRICS = ('precision', 'recall', 'ndcg', 'coverage')
+LATENCY_METRICS = ('p50_ms', 'p95_ms', 'p99_ms', 'queries')
+
+# Regression thresholds used by ``compare``
+QUALITY_TOLERANCE = 0.02  # Relative drop
+LATENCY_TOLERANCE = 0.20  # Relative increase
+
+
+class EvaluationUser:
+    """Stand-in for users that only exist in a synthetic dataset."""
+
+    is_authenticated = True
+    include_local_movies = True
+
+    def __init__(self, user_id: int):
+        self.id = user_id
+
+
+class LocalCache:
+    """Per-run replacement for the shared similarity cache, so neighbours come from the training split."""
+
+    def __init__(self):
+        self._values: Dict[str, Any] = {}
+
+    def get_or_compute(self, key: str, compute: Callable[[], Any]) -> Any:
+        if key not in self._values:
+            self._values[key] = compute()
+        return self._values[key]
+
+
+class QueryCounter:
+    """Counts the queries run on the default connection while active."""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+    def __enter__(self) -> "QueryCounter":
+        self._wrapper = connection.execute_wrapper(self)
+        self._wrapper.__enter__()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._wrapper.__exit__(*exc_info)
+
+
+def build_profiles(train: RatingDataset, store: MovieFeatureStore) -> Dict[int, UserProfile]:
+    """``UserProfile`` of every training user, computed like ``UserProfile.build``."""
+    rows = store.rows_of(train.movie_ids)
+    user_ids, starts, counts = np.unique(train.user_ids, return_index=True, return_counts=True)
+    profiles = {}
+    for user_id, start, count in zip(user_ids, starts, counts):
+        mine = np.arange(start, start + count)  # Rows are sorted by user
+        years = store.years[rows[mine][rows[mine] >= 0]]
+        years = years[years != UNKNOWN]
+
+        genre_counts: Counter = Counter()
+        for row in rows[mine][(train.ratings[mine] >= FAVORITE_MIN_RATING) & (rows[mine] >= 0)]:
+            genre_counts.update(mask_to_names(store.genre_masks[row], store.genre_names))
+
+        profiles[int(user_id)] = UserProfile(
+            user_id=int(user_id),
+            rated_movie_ids=frozenset(int(movie_id) for movie_id in train.movie_ids[mine]),
+            rating_count=len(mine),
+            average_year=float(years.mean()) if len(years) else None,
+            favorite_genres=genre_counts.most_common(FAVORITE_GENRE_LIMIT),
+            saved_tmdb_ids=(),  # Saves are not part of the rating dataset
+        )
+    return profiles
+
+
+def train_embeddings(train: RatingDataset, factors: int = 32, iterations: int = 10) -> EmbeddingStore:
+    """ALS embeddings of the training split, held in memory."""
+    user_ids, user_rows = np.unique(train.user_ids, return_inverse=True)
+    movie_ids, movie_cols = np.unique(train.movie_ids, return_inverse=True)
+    interactions = sparse.csr_matrix(
+        (train.ratings / 5, (user_rows, movie_cols)), shape=(len(user_ids), len(movie_ids))
+    )
+    user_factors, item_factors = train_als(interactions, factors=factors, iterations=iterations)
+    return EmbeddingStore('evaluation', user_ids, movie_ids, user_factors, item_factors)
+
+
+def evaluation_engine(mode: str, train: RatingDataset, store: MovieFeatureStore):
+    """An engine that sees the training split only."""
+    from ..engine import RecommendationEngine
+
+    engine = RecommendationEngine('factors' if mode == 'factors' else 'hybrid')
+    engine._feature_store = store
+    engine._rating_matrix = RatingMatrix(train.user_ids, train.movie_ids, train.ratings)
+    engine._profiles = build_profiles(train, store)
+    engine.user_similarity_cache = LocalCache()
+    if mode == 'factors':
+        engine._embedding_store = train_embeddings(train)
+    return engine
+
+
+def rank(engine, mode: str, user, k: int, end_to_end: bool = False) -> List[Dict[str, Any]]:
+    """Top-``k`` recommendations of one user in ``mode``."""
+    if end_to_end:
+        return engine.get_recommendations(user=None if mode == 'popular' else user, limit=k)
+    if mode == 'popular':
+        return engine._get_guest_recommendations({}, None, k)
+    return engine._get_user_recommendations(user, {}, k)
+
+
+def evaluate(
+    dataset: RatingDataset,
+    store: MovieFeatureStore,
+    modes: Iterable[str] = MODES,
+    k: int = 10,
+    test_fraction: float = 0.2,
+    max_users: Optional[int] = None,
+    seed: int = 7,
+    end_to_end: bool = False
+) -> List[Dict[str, Any]]:
+    """One result row per mode, averaged over users with relevant held-out movies."""
+    train, test = temporal_split(dataset, test_fraction)
+    relevant = relevant_items(test)
+    user_ids = sorted(relevant)
+    if end_to_end:
+        # Sessions and results are written for the user, so synthetic ids can't be served
+        user_ids = [user_id for user_id in user_ids if user_id > 0]
+    if max_users and len(user_ids) > max_users:
+        user_ids = sorted(np.random.default_rng(seed).choice(user_ids, max_users, replace=False).tolist())
+
+    # Real users where they exist, so per-user settings apply
+    users = {user.id: user for user in User.objects.filter(id__in=[u for u in user_ids if u > 0])}
+
+    results = []
+    for mode in modes:
+        engine = evaluation_engine(mode, train, store)
+        precision, recall, ndcg, rankings, seconds, queries = [], [], [], [], [], []
+        with transaction.atomic():
+            for user_id in user_ids:
+                user = users.get(user_id) or EvaluationUser(user_id)
+                with QueryCounter() as counter:
+                    started = time.perf_counter()
+                    recommendations = rank(engine, mode, user, k, end_to_end)
+                    seconds.append(time.perf_counter() - started)
+                queries.append(counter.count)
+
+                ranked = [rec['movie'].id for rec in recommendations]
+                rankings.append(ranked)
+                precision.append(precision_at_k(ranked, relevant[user_id], k))
+                recall.append(recall_at_k(ranked, relevant[user_id], k))
+                ndcg.append(ndcg_at_k(ranked, relevant[user_id], k))
+            # Discard the sessions and results an end-to-end run wrote
+            transaction.set_rollback(True)
+
+        results.append(dict(
+            mode=mode,
+            users=len(user_ids),
+            precision=float(np.mean(precision)) if precision else 0.0,
+            recall=float(np.mean(recall)) if recall else 0.0,
+            ndcg=float(np.mean(ndcg)) if ndcg else 0.0,
+            coverage=coverage(rankings, len(store)),
+            queries=float(np.mean(queries)) if queries else 0.0,
+            **latency_percentiles(seconds)
+        ))
+    return results
+
+
+def format_table(results: List[Dict[str, Any]], k: int) -> str:
+    header = (
+        f"{'mode':<10}{'users':>7}{f'P@{k}':>8}{f'R@{k}':>8}{f'NDCG@{k}':>9}{'cover':>8}"
+        f"{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'queries':>9}"
+    )
+    lines = [header, '-' * len(header)]
+    for row in results:
+        lines.append(
+            f"{row['mode']:<10}{row['users']:>7}{row['precision']:>8.4f}{row['recall']:>8.4f}"
+            f"{row['ndcg']:>9.4f}{row['coverage']:>8.4f}{row['p50_ms']:>9.2f}{row['p95_ms']:>9.2f}"
+            f"{row['p99_ms']:>9.2f}{row['queries']:>9.1f}"
+        )
+    return '\n'.join(lines)
+
+
+def compare(results: List[Dict[str, Any]], baseline: List[Dict[str, Any]]) -> List[str]:
+    """Regressions of ``results`` against a baseline run of the same modes."""
+    previous = {row['mode']: row for row in baseline}
+    regressions = []
+    for row in results:
+        before = previous.get(row['mode'])
+        if before is None:
+            continue
+        for metric in QUALITY_METRICS:
+            if row[metric] < before[metric] * (1 - QUALITY_TOLERANCE):
+                regressions.append(f"{row['mode']}: {metric} {before[metric]:.4f} -> {row[metric]:.4f}")
+        for metric in LATENCY_METRICS:
+            if row[metric] > before[metric] * (1 + LATENCY_TOLERANCE) and row[metric] - before[metric] > 0.5:
+                regressions.append(f"{row['mode']}: {metric} {before[metric]:.2f} -> {row[metric]:.2f}")
+    return regressions
@@ -0,0 +1,50 @@
+"""
+Ranking quality and latency metrics.
+"""
+
+from __future__ import annotations
+from typing import Dict, Iterable, List, Sequence, Set
+
+import numpy as np
+
+
+def precision_at_k(ranked: Sequence[int], relevant: Set[int], k: int) -> float:
+    """Share of the top ``k`` recommendations that are relevant."""
+    if k <= 0:
+        return 0.0
+    return sum(1 for movie_id in ranked[:k] if movie_id in relevant) / k
+
+
+def recall_at_k(ranked: Sequence[int], relevant: Set[int], k: int) -> float:
+    """Share of the relevant movies found in the top ``k``."""
+    if not relevant:
+        return 0.0
+    return sum(1 for movie_id in ranked[:k] if movie_id in relevant) / len(relevant)
+
+
+def ndcg_at_k(ranked: Sequence[int], relevant: Set[int], k: int) -> float:
+    """Binary-relevance NDCG of the top ``k``."""
+    if not relevant:
+        return 0.0
+    discounts = 1.0 / np.log2(np.arange(2, k + 2))
+    gains = np.array([movie_id in relevant for movie_id in ranked[:k]], dtype=np.float64)
+    ideal = discounts[:min(len(relevant), k)].sum()
+    return float(gains @ discounts[:len(gains)] / ideal)
+
+
+def coverage(rankings: Iterable[Sequence[int]], catalog_size: int) -> float:
+    """Share of the catalog recommended to at least one user."""
+    if catalog_size <= 0:
+        return 0.0
+    seen = set()
+    for ranked in rankings:
+        seen.update(ranked)
+    return len(seen) / catalog_size
+
+
+def latency_percentiles(seconds: List[float]) -> Dict[str, float]:
+    """p50/p95/p99 in milliseconds."""
+    if not seconds:
+        return {'p50_ms': 0.0, 'p95_ms': 0.0, 'p99_ms': 0.0}
+    p50, p95, p99 = np.percentile(np.array(seconds) * 1000, [50, 95, 99])
+    return {'p50_ms': float(p50), 'p95_ms': float(p95), 'p99_ms': float(p99)}
@@ -0,0 +1,218 @@
+"""
+Implicit-feedback matrix factorization (ALS) and embedding serving.
+
+Training runs offline (see the ``train_factors`` management command) and
+writes user and item embeddings to a versioned directory of ``.npy``
+files (see ``artifacts``). Web workers memory-map the current version
+read-only and remap it after each training run, so the
+embedding pages are shared between forked gunicorn workers through the
+OS page cache, and scoring a user's candidates is one matrix-vector
+product.
+"""
+
+from __future__ import annotations
+import json
+import logging
+from pathlib import Path
+from typing import Dict, Optional
+
+import numpy as np
+from scipy import sparse
+
+from apps.core.models import Movie, SavedMovie, UserWatchHistory
+from .artifacts import DEFAULT_KEEP, artifact_loader, current_path, new_version, publish
+
+logger = logging.getLogger(__name__)
+
+FACTORS = 'factors'  # Artifact name
+
+# Interaction strength fed into the confidence weights c = 1 + alpha * r
+WATCHED_STRENGTH = 0.5
+SAVED_LIKED_STRENGTH = 1.0
+SAVED_WATCH_LATER_STRENGTH = 0.5
+
+
+def load_interactions() -> tuple:
+    """
+    Build the user x movie implicit-feedback matrix.
+
+    Returns ``(matrix, user_ids, movie_ids)`` where ``matrix`` is CSR and the
+    id arrays map its rows/columns back to database ids.
+    """
+    users, movies, strengths = [], [], []
+
+    # Watch history: rated movies weigh by rating, unrated ones are a weak signal
+    for user_id, movie_id, rating in UserWatchHistory.objects.values_list(
+        'user_id', 'movie_id', 'rating'
+    ).iterator():
+        users.append(user_id)
+        movies.append(movie_id)
+        strengths.append(rating / 5 if rating else WATCHED_STRENGTH)
+
+    # Saved movies are keyed by TMDB id; map them onto catalog movies
+    saved = list(SavedMovie.objects.values_list('user_id', 'tmdb_id', 'is_liked', 'is_watch_later'))
+    movie_by_tmdb = dict(
+        Movie.objects.filter(tmdb_id__in={row[1] for row in saved}).values_list('tmdb_id', 'id')
+    )
+    for user_id, tmdb_id, is_liked, is_watch_later in saved:
+        movie_id = movie_by_tmdb.get(tmdb_id)
+        if movie_id is None:
+            continue
+        users.append(user_id)
+        movies.append(movie_id)
+        strengths.append(
+            (SAVED_LIKED_STRENGTH if is_liked else 0.0)
+            + (SAVED_WATCH_LATER_STRENGTH if is_watch_later else 0.0)
+        )
+
+    user_ids, user_rows = np.unique(np.array(users, dtype=np.int64), return_inverse=True)
+    movie_ids, movie_cols = np.unique(np.array(movies, dtype=np.int64), return_inverse=True)
+    matrix = sparse.csr_matrix(
+        (np.array(strengths, dtype=np.float32), (user_rows, movie_cols)),
+        shape=(len(user_ids), len(movie_ids))
+    )
+    matrix.sum_duplicates()
+    matrix.eliminate_zeros()
+    return matrix, user_ids, movie_ids
+
+
+def _als_half_step(
+    interactions: sparse.csr_matrix,
+    fixed: np.ndarray,
+    alpha: float,
+    regularization: float
+) -> np.ndarray:
+    """Solve every row's factors given the other side's fixed factors."""
+    n_rows, n_factors = interactions.shape[0], fixed.shape[1]
+    gram = fixed.T @ fixed
+    reg = regularization * np.eye(n_factors)
+    solved = np.zeros((n_rows, n_factors), dtype=np.float64)
+
+    indptr, indices, data = interactions.indptr, interactions.indices, interactions.data
+    for row in range(n_rows):
+        start, end = indptr[row], indptr[row + 1]
+        if start == end:
+            continue
+        observed = fixed[indices[start:end]]
+        confidence = 1.0 + alpha * data[start:end]
+        # (Y'Y + Y'(C - I)Y + lambda I) x = Y'C p, with p = 1 on observed items
+        a = gram + (observed.T * (confidence - 1.0)) @ observed + reg
+        b = observed.T @ confidence
+        solved[row] = np.linalg.solve(a, b)
+    return solved
+
+
+def train_als(
+    interactions: sparse.csr_matrix,
+    factors: int = 32,
+    iterations: int = 15,
+    regularization: float = 0.1,
+    alpha: float = 40.0,
+    seed: int = 42
+) -> tuple:
+    """Alternating least squares for implicit feedback (Hu, Koren & Volinsky)."""
+    rng = np.random.default_rng(seed)
+    n_users, n_items = interactions.shape
+    user_factors = rng.normal(scale=0.01, size=(n_users, factors))
+    item_factors = rng.normal(scale=0.01, size=(n_items, factors))
+    by_item = interactions.T.tocsr()
+
+    for iteration in range(iterations):
+        user_factors = _als_half_step(interactions, item_factors, alpha, regularization)
+        item_factors = _als_half_step(by_item, user_factors, alpha, regularization)
+        logger.debug("ALS iteration %d/%d done", iteration + 1, iterations)
+
+    return user_factors.astype(np.float32), item_factors.astype(np.float32)
+
+
+def save_factors(
+    user_ids: np.ndarray,
+    movie_ids: np.ndarray,
+    user_factors: np.ndarray,
+    item_factors: np.ndarray,
+    metadata: Optional[Dict] = None,
+    keep: int = DEFAULT_KEEP
+) -> Path:
+    """Write a new embedding version and publish it to the workers."""
+    target = new_version(FACTORS)
+    version = target.name
+
+    np.save(target / 'user_ids.npy', user_ids.astype(np.int64))
+    np.save(target / 'movie_ids.npy', movie_ids.astype(np.int64))
+    np.save(target / 'user_factors.npy', np.ascontiguousarray(user_factors))
+    np.save(target / 'item_factors.npy', np.ascontiguousarray(item_factors))
+    (target / 'metadata.json').write_text(json.dumps(dict(metadata or {}, version=version)))
+
+    publish(FACTORS, target, keep=keep)
+    return target
+
+
+class EmbeddingStore:
+    """Read-only, memory-mapped user and item embeddings."""
+
+    def __init__(
+        self,
+        version: str,
+        user_ids: np.ndarray,
+        movie_ids: np.ndarray,
+        user_factors: np.ndarray,
+        item_factors: np.ndarray
+    ):
+        self.version = version
+        self.user_ids = user_ids
+        self.movie_ids = movie_ids
+        self.user_factors = user_factors
+        self.item_factors = item_factors
+
+    @classmethod
+    def load(cls, path: Optional[Path] = None) -> Optional["EmbeddingStore"]:
+        """Memory-map a version (by default the current one), or ``None`` if nothing was trained."""
+        path = Path(path) if path else current_path(FACTORS)
+        if path is None:
+            return None
+
+        return cls(
+            version=path.name,
+            user_ids=np.load(path / 'user_ids.npy'),
+            movie_ids=np.load(path / 'movie_ids.npy'),
+            user_factors=np.load(path / 'user_factors.npy', mmap_mode='r'),
+            item_factors=np.load(path / 'item_factors.npy', mmap_mode='r'),
+        )
+
+    def _rows(self, ids: np.ndarray, wanted: np.ndarray) -> np.ndarray:
+        """Row of each wanted id in the sorted ``ids`` array, ``-1`` if absent."""
+        wanted = np.asarray(wanted, dtype=np.int64)
+        if len(ids) == 0:
+            return np.full(len(wanted), -1, dtype=np.int64)
+        rows = np.minimum(np.searchsorted(ids, wanted), len(ids) - 1)
+        return np.where(ids[rows] == wanted, rows, -1)
+
+    def user_vector(self, user_id: int) -> Optional[np.ndarray]:
+        row = self._rows(self.user_ids, np.array([user_id]))[0]
+        return None if row < 0 else np.asarray(self.user_factors[row])
+
+    def item_rows(self, movie_ids: np.ndarray) -> np.ndarray:
+        return self._rows(self.movie_ids, movie_ids)
+
+    def score(self, user_id: int, movie_ids: np.ndarray) -> Optional[np.ndarray]:
+        """
+        Predicted preference of the user for each movie (0 for movies absent
+        from training), or ``None`` for users without embeddings.
+        """
+        vector = self.user_vector(user_id)
+        if vector is None:
+            return None
+
+        rows = self.item_rows(movie_ids)
+        scores = np.zeros(len(rows), dtype=np.float32)
+        known = rows >= 0
+        scores[known] = self.item_factors[rows[known]] @ vector
+        return scores
+
+
+_store_loader = artifact_loader(FACTORS, EmbeddingStore.load)
+
+
+def get_embedding_store() -> Optional[EmbeddingStore]:
+    """Process-wide embedding store, remapped after each training run (``None`` if untrained)."""
+    return _store_loader.get()
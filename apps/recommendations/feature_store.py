@@ -0,0 +1,172 @@
+"""
+In-process columnar store of the movie catalog's scoring features.
+
+Each worker holds the whole catalog as compact NumPy columns (int32 ids,
+uint16 years and runtimes, float32 ratings and counters, uint64 genre
+bitmasks, bool flags), about 40 bytes per movie, so a 100k-movie catalog
+is a few MB. Catalog filters become boolean masks over the columns and
+candidates are scored from them; only the winners of a ranking are loaded
+as ``Movie`` rows.
+
+The store is keyed on the catalog version (``cache.CATALOG``), which is
+bumped whenever a movie is saved or deleted, and reloads when it changes.
+Watch counts change without a catalog bump, so the store is also reloaded
+after ``MAX_AGE`` seconds.
+"""
+
+from __future__ import annotations
+import logging
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from apps.core.models import Movie
+from .cache import CATALOG, get_version
+from .features import CandidateFeatures, genre_bit_positions, genre_names_by_bit
+
+logger = logging.getLogger(__name__)
+
+MAX_AGE = 15 * 60  # Seconds before watch counts are refreshed
+UNKNOWN = 0  # Stored for a missing year or runtime
+
+
+class MovieFeatureStore:
+    """Feature columns of the whole catalog, sorted by movie id."""
+
+    def __init__(
+        self,
+        ids: np.ndarray,
+        tmdb_ids: np.ndarray,
+        years: np.ndarray,
+        runtimes: np.ndarray,
+        ratings: np.ndarray,
+        popularity: np.ndarray,
+        watch_counts: np.ndarray,
+        genre_masks: np.ndarray,
+        is_local: np.ndarray,
+        is_featured: np.ndarray,
+        genre_bits: Dict[int, int],
+        genre_names: List[str],
+        version: int = 0
+    ):
+        self.ids = ids
+        self.tmdb_ids = tmdb_ids
+        self.years = years
+        self.runtimes = runtimes
+        self.ratings = ratings
+        self.popularity = popularity
+        self.watch_counts = watch_counts
+        self.genre_masks = genre_masks
+        self.is_local = is_local
+        self.is_featured = is_featured
+        self.genre_bits = genre_bits
+        self.genre_names = genre_names
+        self.genre_name_masks = {name: 1 << bit for bit, name in enumerate(genre_names)}
+        self.version = version
+        self.loaded_at = time.monotonic()
+        self._tmdb_order = None
+
+    @classmethod
+    def load(cls, version: int = 0) -> "MovieFeatureStore":
+        """Read the catalog's feature columns with the candidate feature query."""
+        bits = genre_bit_positions()
+        features = CandidateFeatures.from_queryset(Movie.objects.all(), bits)
+        return cls(
+            ids=features.ids.astype(np.int32),
+            tmdb_ids=features.tmdb_ids.astype(np.int32),
+            years=np.nan_to_num(features.years, nan=UNKNOWN).astype(np.uint16),
+            # ``Movie`` records no runtime; the runtime filter keeps unknown runtimes
+            runtimes=np.full(len(features), UNKNOWN, dtype=np.uint16),
+            ratings=features.ratings.astype(np.float32),
+            popularity=features.popularity.astype(np.float32),
+            watch_counts=features.watch_counts.astype(np.float32),
+            genre_masks=features.genre_masks,
+            is_local=features.is_local,
+            is_featured=features.is_featured,
+            genre_bits=bits,
+            genre_names=genre_names_by_bit(),
+            version=version,
+        )
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(column.nbytes for column in (
+            self.ids, self.tmdb_ids, self.years, self.runtimes, self.ratings, self.popularity,
+            self.watch_counts, self.genre_masks, self.is_local, self.is_featured
+        ))
+
+    def rows_of(self, movie_ids: Iterable[int]) -> np.ndarray:
+        """Row of each movie id (-1 for ids not in the store)."""
+        movie_ids = np.fromiter(movie_ids, dtype=np.int64)
+        if not len(self.ids):
+            return np.full(len(movie_ids), -1, dtype=np.int64)
+        rows = np.minimum(np.searchsorted(self.ids, movie_ids), len(self.ids) - 1)
+        return np.where(self.ids[rows] == movie_ids, rows, -1)
+
+    def rows_of_tmdb(self, tmdb_ids: Iterable[int]) -> np.ndarray:
+        """Row of each TMDB id (-1 for ids not in the store)."""
+        tmdb_ids = np.fromiter(tmdb_ids, dtype=np.int64)
+        if not len(self.ids):
+            return np.full(len(tmdb_ids), -1, dtype=np.int64)
+        if self._tmdb_order is None:
+            self._tmdb_order = np.argsort(self.tmdb_ids, kind='stable')
+        ordered = self.tmdb_ids[self._tmdb_order]
+        positions = np.minimum(np.searchsorted(ordered, tmdb_ids), len(ordered) - 1)
+        return np.where(ordered[positions] == tmdb_ids, self._tmdb_order[positions], -1)
+
+    def all(self) -> np.ndarray:
+        return np.ones(len(self.ids), dtype=bool)
+
+    def candidates(self, selected: np.ndarray, exclude_ids: Iterable[int] = ()) -> CandidateFeatures:
+        """Scoring columns of the selected rows, minus ``exclude_ids``."""
+        selected = selected.copy()
+        excluded = self.rows_of(exclude_ids)
+        selected[excluded[excluded >= 0]] = False
+        rows = np.flatnonzero(selected)
+
+        years = self.years[rows].astype(np.float64)
+        years[years == UNKNOWN] = np.nan
+        return CandidateFeatures(
+            ids=self.ids[rows].astype(np.int64),
+            tmdb_ids=self.tmdb_ids[rows].astype(np.int64),
+            years=years,
+            ratings=self.ratings[rows].astype(np.float64),
+            is_local=self.is_local[rows],
+            is_featured=self.is_featured[rows],
+            popularity=self.popularity[rows].astype(np.float64),
+            watch_counts=self.watch_counts[rows].astype(np.float64),
+            genre_masks=self.genre_masks[rows],
+        )
+
+
+_store_lock = threading.Lock()
+_store: Optional[MovieFeatureStore] = None
+
+
+def _is_current(store: Optional[MovieFeatureStore], version: int) -> bool:
+    return store is not None and store.version == version and time.monotonic() - store.loaded_at < MAX_AGE
+
+
+def get_feature_store() -> MovieFeatureStore:
+    """Process-wide feature store, reloaded when the catalog version changes."""
+    global _store
+    version = get_version(CATALOG)
+    store = _store
+    if _is_current(store, version):
+        return store
+
+    with _store_lock:
+        if not _is_current(_store, version):
+            # Tagged with the version read before loading, so a bump during
+            # the load triggers another reload
+            _store = MovieFeatureStore.load(version)
+            logger.info(
+                "Loaded movie feature store: %d movies, %.1f MB (catalog v%d)",
+                len(_store), _store.nbytes / 1e6, version
+            )
+        return _store
@@ -0,0 +1,211 @@
+"""
+Columnar movie features for vectorized scoring.
+
+Genres are packed into a uint64 bitmask per movie (one bit per genre) so
+genre overlap between one movie and the whole catalog is a couple of
+bitwise operations and a popcount. ``Movie.genres`` is a JSON list of TMDB
+genre ids, names or ``{'id', 'name'}`` dicts; entries are matched to
+``Genre`` rows by name.
+"""
+
+from __future__ import annotations
+import logging
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from apps.core.models import Movie, Genre
+from .constants import GENRE_ALIASES, LOCAL_COUNTRIES, TMDB_GENRES
+
+logger = logging.getLogger(__name__)
+
+MAX_GENRE_BITS = 64
+
+
+def genre_bit_positions() -> Dict[int, int]:
+    """Map genre id -> bit position in the genre bitmask."""
+    genre_ids = Genre.objects.order_by('id').values_list('id', flat=True)
+    positions = {}
+    for position, genre_id in enumerate(genre_ids):
+        if position >= MAX_GENRE_BITS:
+            logger.warning(
+                "More than %d genres; extra genres are ignored in bitmasks", MAX_GENRE_BITS
+            )
+            break
+        positions[genre_id] = position
+    return positions
+
+
+def genre_names_by_bit() -> List[str]:
+    """Genre names indexed by bit position."""
+    bits = genre_bit_positions()
+    names = dict(Genre.objects.filter(id__in=bits).values_list('id', 'name'))
+    return [names[genre_id] for genre_id, _ in sorted(bits.items(), key=lambda x: x[1])]
+
+
+def genre_bits_by_name(bits: Dict[int, int]) -> Dict[str, int]:
+    """Lower-cased genre name (and TMDB alias) -> bit position."""
+    names = dict(Genre.objects.filter(id__in=bits).values_list('id', 'name'))
+    by_name = {names[genre_id].lower(): bit for genre_id, bit in bits.items() if genre_id in names}
+    for alias, name in GENRE_ALIASES.items():
+        if name in by_name:
+            by_name.setdefault(alias, by_name[name])
+    return by_name
+
+
+def _entry_name(entry: Any) -> Optional[str]:
+    if isinstance(entry, dict):
+        return entry.get('name') or _entry_name(entry.get('id'))
+    if isinstance(entry, int) and not isinstance(entry, bool):
+        return TMDB_GENRES.get(entry)
+    if isinstance(entry, str):
+        return TMDB_GENRES.get(int(entry)) if entry.isdigit() else entry.strip() or None
+    return None
+
+
+def movie_genre_names(genres: Any) -> List[str]:
+    """Genre names of a ``Movie.genres`` value."""
+    if not isinstance(genres, list):
+        return []
+    return [name for name in map(_entry_name, genres) if name]
+
+
+def genre_mask(genres: Any, bits_by_name: Dict[str, int]) -> int:
+    """Bitmask of a ``Movie.genres`` value."""
+    mask = 0
+    for name in movie_genre_names(genres):
+        bit = bits_by_name.get(name.lower())
+        if bit is not None:
+            mask |= 1 << bit
+    return mask
+
+
+def is_local_country(country: Optional[str]) -> bool:
+    return (country or '').strip().lower() in LOCAL_COUNTRIES
+
+
+def load_genre_masks(
+    movie_ids: np.ndarray,
+    bits: Optional[Dict[int, int]] = None
+) -> np.ndarray:
+    """Genre bitmask for each movie id, in the order given, in one query."""
+    if bits is None:
+        bits = genre_bit_positions()
+
+    masks = np.zeros(len(movie_ids), dtype=np.uint64)
+    if len(movie_ids) == 0:
+        return masks
+
+    bits_by_name = genre_bits_by_name(bits)
+    row_of = {int(movie_id): row for row, movie_id in enumerate(movie_ids)}
+    for movie_id, genres in Movie.objects.filter(id__in=row_of).values_list('id', 'genres').iterator():
+        masks[row_of[movie_id]] = np.uint64(genre_mask(genres, bits_by_name))
+    return masks
+
+
+def mask_to_names(mask: int, names_by_bit: List[str]) -> List[str]:
+    """Genre names set in ``mask``."""
+    mask = int(mask)
+    return [name for bit, name in enumerate(names_by_bit) if mask >> bit & 1]
+
+
+def popcount(values: np.ndarray) -> np.ndarray:
+    """Number of set bits in each element of a uint64 array."""
+    values = np.asarray(values, dtype=np.uint64)
+    if hasattr(np, 'bitwise_count'):  # NumPy >= 2.0
+        return np.bitwise_count(values).astype(np.int64)
+
+    # SWAR popcount for older NumPy
+    v = values - ((values >> np.uint64(1)) & np.uint64(0x5555555555555555))
+    v = (v & np.uint64(0x3333333333333333)) + ((v >> np.uint64(2)) & np.uint64(0x3333333333333333))
+    v = (v + (v >> np.uint64(4))) & np.uint64(0x0F0F0F0F0F0F0F0F)
+    return ((v * np.uint64(0x0101010101010101)) >> np.uint64(56)).astype(np.int64)
+
+
+def _column(values: List[Any], dtype, default=0) -> np.ndarray:
+    return np.array([default if v is None else v for v in values], dtype=dtype)
+
+
+class CandidateFeatures:
+    """Feature columns of a filtered catalog, loaded in a single query."""
+
+    def __init__(
+        self,
+        ids: np.ndarray,
+        tmdb_ids: np.ndarray,
+        years: np.ndarray,
+        ratings: np.ndarray,
+        is_local: np.ndarray,
+        is_featured: np.ndarray,
+        popularity: np.ndarray,
+        watch_counts: np.ndarray,
+        genre_masks: np.ndarray
+    ):
+        self.ids = ids
+        self.tmdb_ids = tmdb_ids
+        self.years = years
+        self.ratings = ratings
+        self.is_local = is_local
+        self.is_featured = is_featured
+        self.popularity = popularity
+        self.watch_counts = watch_counts
+        self.genre_masks = genre_masks
+
+    @classmethod
+    def from_queryset(
+        cls,
+        queryset,
+        bits: Optional[Dict[int, int]] = None
+    ) -> "CandidateFeatures":
+        """
+        Load the feature columns of every movie in ``queryset``.
+
+        One row per movie: the ``genres`` JSON is folded into a bitmask and
+        watch counts are read from the materialized ``MovieStats`` row in
+        the same query. Movies are local when their country is Tanzania;
+        the catalog has no featured flag, so none are featured.
+        """
+        if bits is None:
+            bits = genre_bit_positions()
+
+        rows = list(queryset.values_list(
+            'id', 'year', 'rating', 'country', 'popularity',
+            'stats__watch_count', 'genres', 'tmdb_id'
+        ).order_by('id'))
+        if not rows:
+            return cls.empty()
+
+        columns = list(zip(*rows))
+        bits_by_name = genre_bits_by_name(bits)
+        return cls(
+            ids=np.array(columns[0], dtype=np.int64),
+            tmdb_ids=_column(columns[7], np.int64, default=-1),
+            years=_column(columns[1], np.float64, default=np.nan),
+            ratings=_column(columns[2], np.float64),
+            is_local=np.array([is_local_country(country) for country in columns[3]], dtype=bool),
+            is_featured=np.zeros(len(rows), dtype=bool),
+            popularity=_column(columns[4], np.float64),
+            watch_counts=_column(columns[5], np.float64),
+            genre_masks=np.array([genre_mask(genres, bits_by_name) for genres in columns[6]], dtype=np.uint64),
+        )
+
+    @classmethod
+    def empty(cls) -> "CandidateFeatures":
+        return cls(
+            ids=np.zeros(0, dtype=np.int64),
+            tmdb_ids=np.zeros(0, dtype=np.int64),
+            years=np.zeros(0, dtype=np.float64),
+            ratings=np.zeros(0, dtype=np.float64),
+            is_local=np.zeros(0, dtype=bool),
+            is_featured=np.zeros(0, dtype=bool),
+            popularity=np.zeros(0, dtype=np.float64),
+            watch_counts=np.zeros(0, dtype=np.float64),
+            genre_masks=np.zeros(0, dtype=np.uint64),
+        )
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def has_any_genre(self, mask: int) -> np.ndarray:
+        """Boolean array: movie shares at least one genre with ``mask``."""
+        return (self.genre_masks & np.uint64(mask)) != 0
@@ -0,0 +1,207 @@
+"""
+Time-decayed implicit feedback per user.
+
+Watches (``UserWatchHistory``, weighted by rating) and saves (``SavedMovie``
+liked / watch-later flags) become per-user genre and movie weights that
+halve every ``RECOMMENDER_SIGNAL_HALF_LIFE_DAYS``. ``update_user_signals``
+reads only the rows added since its last run (a per-source high-water
+mark, trailing by ``checkpoints.SETTLE_LAG`` so late commits are not
+skipped), decays the touched users' stored weights to now and adds the new
+events. Genres come from the feature store's bitmasks, so no genre query
+is issued per event.
+
+All rows of a user share one ``updated_at``, so ranking a user's weights
+needs no decay and the favourite genres are a single indexed query.
+Edits to existing rows (a changed rating, an unliked movie) and deletions
+are not reflected until a ``--rebuild``.
+"""
+
+from __future__ import annotations
+import logging
+import math
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, List, Optional, Set, Tuple
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, FloatField, Sum
+from django.utils import timezone
+
+from apps.core.models import SavedMovie, UserGenreSignal, UserMovieSignal, UserWatchHistory
+from . import checkpoints
+from .cache import bump_user_version
+from .factorization import SAVED_LIKED_STRENGTH, SAVED_WATCH_LATER_STRENGTH, WATCHED_STRENGTH
+from .feature_store import MovieFeatureStore, get_feature_store
+
+logger = logging.getLogger(__name__)
+
+FAVORITE_MIN_RATING = 4  # Lower ratings are not a preference signal
+BATCH_SIZE = 5000  # New events read per batch
+MAX_MOVIES_PER_USER = 500  # Strongest movie weights kept per user
+MIN_WEIGHT = 0.01  # Weights decayed below this are dropped
+
+WATCH_CHECKPOINT = 'signals:watch_history'
+SAVED_CHECKPOINT = 'signals:saved_movie'
+
+# (user id, movie id, strength, time)
+Event = Tuple[int, int, float, datetime]
+
+
+def decay_rate() -> float:
+    """Exponential decay per second for the configured half-life."""
+    return math.log(2) / (settings.RECOMMENDER_SIGNAL_HALF_LIFE_DAYS * 86400)
+
+
+def decayed(weight: float, since: datetime, now: datetime, rate: float) -> float:
+    return weight * math.exp(-rate * max((now - since).total_seconds(), 0.0))
+
+
+def watch_strength(rating: Optional[float]) -> float:
+    """Unrated watches are a weak signal; low ratings are no signal at all."""
+    if rating is None:
+        return WATCHED_STRENGTH
+    return rating / 5 if rating >= FAVORITE_MIN_RATING else 0.0
+
+
+def _watch_events(high_water: int, batch_size: int) -> Tuple[List[Event], int]:
+    rows = list(checkpoints.settled_rows(
+        UserWatchHistory.objects.all(), high_water, 'watched_at'
+    ).order_by('id').values_list(
+        'id', 'user_id', 'movie_id', 'rating', 'watched_at'
+    )[:batch_size])
+    events = [
+        (user_id, movie_id, watch_strength(rating), watched_at)
+        for _, user_id, movie_id, rating, watched_at in rows
+    ]
+    return events, rows[-1][0] if rows else high_water
+
+
+def _saved_events(high_water: int, batch_size: int, store: MovieFeatureStore) -> Tuple[List[Event], int]:
+    rows = list(checkpoints.settled_rows(
+        SavedMovie.objects.all(), high_water, 'saved_at'
+    ).order_by('id').values_list(
+        'id', 'user_id', 'tmdb_id', 'media_type', 'is_liked', 'is_watch_later', 'saved_at'
+    )[:batch_size])
+
+    # Saves are keyed by TMDB id; only catalog movies carry genres
+    movie_rows = store.rows_of_tmdb(row[2] for row in rows)
+    events = []
+    for (_, user_id, _, media_type, is_liked, is_watch_later, saved_at), movie_row in zip(rows, movie_rows):
+        if media_type != 'movie' or movie_row < 0:
+            continue
+        strength = (
+            (SAVED_LIKED_STRENGTH if is_liked else 0.0)
+            + (SAVED_WATCH_LATER_STRENGTH if is_watch_later else 0.0)
+        )
+        events.append((user_id, int(store.ids[movie_row]), strength, saved_at))
+    return events, rows[-1][0] if rows else high_water
+
+
+def _event_deltas(
+    events: List[Event],
+    store: MovieFeatureStore,
+    now: datetime,
+    rate: float
+) -> Tuple[Dict[int, Dict[int, float]], Dict[int, Dict[int, float]]]:
+    """Per-user genre and movie weight increments, decayed to ``now``."""
+    genre_of_bit = {bit: genre_id for genre_id, bit in store.genre_bits.items()}
+    movie_rows = store.rows_of(event[1] for event in events)
+
+    genre_deltas: Dict[int, Dict[int, float]] = defaultdict(dict)
+    movie_deltas: Dict[int, Dict[int, float]] = defaultdict(dict)
+    for (user_id, movie_id, strength, happened_at), row in zip(events, movie_rows):
+        if strength <= 0:
+            continue
+        weight = decayed(strength, happened_at or now, now, rate)
+        movie_deltas[user_id][movie_id] = movie_deltas[user_id].get(movie_id, 0.0) + weight
+        if row < 0:
+            continue
+        mask = int(store.genre_masks[row])
+        for bit, genre_id in genre_of_bit.items():
+            if mask >> bit & 1:
+                genre_deltas[user_id][genre_id] = genre_deltas[user_id].get(genre_id, 0.0) + weight
+    return genre_deltas, movie_deltas
+
+
+def _merge(model, field: str, deltas: Dict[int, Dict[int, float]], now: datetime, rate: float, limit: Optional[int] = None):
+    """Decay the users' stored weights to ``now``, add the deltas and rewrite their rows."""
+    weights = {user_id: dict(items) for user_id, items in deltas.items()}
+    for user_id, key, weight, updated_at in model.objects.filter(user_id__in=weights).values_list(
+        'user_id', f'{field}_id', 'weight', 'updated_at'
+    ):
+        weights[user_id][key] = weights[user_id].get(key, 0.0) + decayed(weight, updated_at, now, rate)
+
+    rows = []
+    for user_id, items in weights.items():
+        kept = sorted(items.items(), key=lambda item: item[1], reverse=True)[:limit]
+        rows.extend(
+            model(user_id=user_id, weight=weight, updated_at=now, **{f'{field}_id': key})
+            for key, weight in kept if weight >= MIN_WEIGHT
+        )
+    model.objects.filter(user_id__in=weights).delete()
+    model.objects.bulk_create(rows, batch_size=1000)
+
+
+def update_user_signals(batch_size: int = BATCH_SIZE, rebuild: bool = False) -> int:
+    """Fold events added since the last run into the signals. Returns events processed."""
+    if rebuild:
+        UserGenreSignal.objects.all().delete()
+        UserMovieSignal.objects.all().delete()
+        checkpoints.reset(WATCH_CHECKPOINT, SAVED_CHECKPOINT)
+
+    store = get_feature_store()
+    rate = decay_rate()
+    sources = (
+        (WATCH_CHECKPOINT, lambda high_water: _watch_events(high_water, batch_size)),
+        (SAVED_CHECKPOINT, lambda high_water: _saved_events(high_water, batch_size, store)),
+    )
+
+    processed = 0
+    touched: Set[int] = set()
+    for checkpoint, read_batch in sources:
+        high_water = checkpoints.get_position(checkpoint)
+        while True:
+            events, last_id = read_batch(high_water)
+            if last_id == high_water:
+                break
+            now = timezone.now()
+            genre_deltas, movie_deltas = _event_deltas(events, store, now, rate)
+            # Weights and high-water mark move together
+            with transaction.atomic():
+                _merge(UserGenreSignal, 'genre', genre_deltas, now, rate)
+                _merge(UserMovieSignal, 'movie', movie_deltas, now, rate, limit=MAX_MOVIES_PER_USER)
+                checkpoints.set_position(checkpoint, last_id)
+            logger.info("User signals: %s rows %d-%d, %d users", checkpoint, high_water + 1, last_id, len(movie_deltas))
+            processed += len(events)
+            touched.update(movie_deltas)
+            high_water = last_id
+
+    # Cached profiles of the touched users are rebuilt from the new weights
+    for user_id in touched:
+        bump_user_version(user_id)
+    return processed
+
+
+def favorite_genres(user_id: int, limit: int) -> List[Tuple[str, float]]:
+    """The user's strongest genres as (name, weight now) pairs."""
+    now = timezone.now()
+    rate = decay_rate()
+    return [
+        (name, decayed(weight, updated_at, now, rate))
+        for name, weight, updated_at in UserGenreSignal.objects.filter(user_id=user_id).order_by(
+            '-weight'
+        ).values_list('genre__name', 'weight', 'updated_at')[:limit]
+    ]
+
+
+def weighted_average_year(user_id: int) -> Optional[float]:
+    """Release year averaged over the user's movies, recent interest weighing most."""
+    totals = UserMovieSignal.objects.filter(user_id=user_id, movie__year__isnull=False).aggregate(
+        weighted=Sum(F('weight') * F('movie__year'), output_field=FloatField()),
+        weight=Sum('weight')
+    )
+    if not totals['weight']:
+        return None
+    # All of a user's rows share updated_at, so the decay cancels out
+    return totals['weighted'] / totals['weight']
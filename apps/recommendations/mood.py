@@ -0,0 +1,70 @@
+"""
+Mood analysis shared by the recommendation engine and the analyzers module.
+
+All keywords from ``constants.MOOD_KEYWORDS`` (English and Swahili) are
+compiled at import into a single alternation regex, so a text is scanned
+once whatever the number of keywords. Results for repeated questionnaire
+inputs are memoized in an LRU cache.
+"""
+
+import re
+from functools import lru_cache
+from typing import Dict, List, Tuple
+
+from .constants import MOOD_KEYWORDS, MOOD_KEYWORD_WEIGHTS
+
+MOOD_CACHE_SIZE = 1024
+
+
+def _compile(keywords: Dict[str, List[str]]) -> Tuple["re.Pattern", Dict[str, List[Tuple[str, float]]]]:
+    moods_by_keyword: Dict[str, List[Tuple[str, float]]] = {}
+    for mood, mood_keywords in keywords.items():
+        for keyword in mood_keywords:
+            moods_by_keyword.setdefault(keyword.lower(), []).append(
+                (mood, MOOD_KEYWORD_WEIGHTS.get(keyword, 1.0))
+            )
+
+    # Longest first so phrases win over their first word
+    alternatives = sorted(moods_by_keyword, key=len, reverse=True)
+    pattern = re.compile(
+        r'(?<!\w)(?:' + '|'.join(r'\s+'.join(map(re.escape, k.split())) for k in alternatives) + r')(?!\w)'
+    )
+    return pattern, moods_by_keyword
+
+
+_PATTERN, _MOODS_BY_KEYWORD = _compile(MOOD_KEYWORDS)
+_MOOD_ORDER = {mood: position for position, mood in enumerate(MOOD_KEYWORDS)}
+
+
+def _normalize(text: str) -> str:
+    return ' '.join(text.lower().split())
+
+
+@lru_cache(maxsize=MOOD_CACHE_SIZE)
+def _analyze(text: str) -> Tuple[Tuple[str, float], ...]:
+    totals: Dict[str, float] = {}
+    for match in _PATTERN.finditer(text):
+        for mood, weight in _MOODS_BY_KEYWORD[_normalize(match.group(0))]:
+            totals[mood] = totals.get(mood, 0.0) + weight
+
+    if not totals:
+        return ()
+    strongest = max(totals.values())
+    ranked = sorted(totals.items(), key=lambda item: (-item[1], _MOOD_ORDER[item[0]]))
+    return tuple((mood, total / strongest) for mood, total in ranked)
+
+
+def analyze_mood(text: str) -> Dict[str, float]:
+    """Weighted mood scores (0-1, strongest mood = 1) detected in ``text``."""
+    if not text:
+        return {}
+    return dict(_analyze(_normalize(text)))
+
+
+def detect_moods(text: str) -> List[str]:
+    """Moods detected in ``text``, strongest first."""
+    return list(analyze_mood(text))
+
+
+def clear_cache():
+    _analyze.cache_clear()
@@ -0,0 +1,134 @@
+"""
+Cursor pagination over a ranked recommendation list.
+
+The first page scores the full ranking once and caches it (movie ids,
+scores, reasons and genre bitmasks) per session token and filter
+signature. Cursors are signed, opaque tokens pointing into that cached
+ranking, so later pages are a slice plus one query for the page's movies
+instead of a rescore. When the session has given feedback since the last
+page, the unserved tail is first reranked with its session preferences.
+"""
+
+from __future__ import annotations
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from django.core import signing
+from django.core.cache import cache
+
+from apps.core.models import Movie
+from .cache import KEY_PREFIX
+from .feature_store import get_feature_store
+from .session_model import SessionPreferences, get_preferences
+
+RANKING_SIZE = 200  # Recommendations scored for the first page and cached
+RANKING_TIMEOUT = 30 * 60
+CURSOR_SALT = 'recommendations.cursor'
+
+
+class CursorError(Exception):
+    """The cursor is malformed, tampered with, or its ranking has expired."""
+
+
+def _ranking_key(session_token: str, signature: str) -> str:
+    return f'{KEY_PREFIX}:ranking:{session_token}:{signature}'
+
+
+def encode_cursor(session_token: str, signature: str, offset: int) -> str:
+    return signing.dumps({'t': session_token, 's': signature, 'o': offset}, salt=CURSOR_SALT, compress=True)
+
+
+def decode_cursor(cursor: str) -> Tuple[str, str, int]:
+    try:
+        data = signing.loads(cursor, salt=CURSOR_SALT)
+        return str(data['t']), str(data['s']), int(data['o'])
+    except (signing.BadSignature, KeyError, TypeError, ValueError):
+        raise CursorError("Invalid cursor.")
+
+
+def _genre_masks(movie_ids: np.ndarray) -> np.ndarray:
+    store = get_feature_store()
+    if not len(store):
+        return np.zeros(len(movie_ids), dtype=np.uint64)
+    rows = store.rows_of(movie_ids)
+    return np.where(rows >= 0, store.genre_masks[rows], np.uint64(0))
+
+
+def store_ranking(session_token: str, signature: str, recommendations: List[Dict[str, Any]]):
+    """Cache a ranking as columns (ids, scores, genre masks, reasons) and a serving order."""
+    movie_ids = np.array([rec['movie'].id for rec in recommendations], dtype=np.int64)
+    ranking = {
+        'ids': movie_ids,
+        'scores': np.array([rec['score'] for rec in recommendations], dtype=np.float64),
+        'masks': _genre_masks(movie_ids),
+        'reasons': [rec['reasons'] for rec in recommendations],
+        'order': np.arange(len(movie_ids)),
+        'events': 0,  # Feedback events already applied to the order
+    }
+    cache.set(_ranking_key(session_token, signature), ranking, RANKING_TIMEOUT)
+
+
+def rerank_tail(ranking: Dict[str, Any], offset: int, preferences: SessionPreferences) -> np.ndarray:
+    """Serving order with the rows not served yet reordered by score plus session adjustment."""
+    order = ranking['order']
+    tail = order[offset:]
+    if preferences.excluded:
+        excluded = np.fromiter(preferences.excluded, dtype=np.int64)
+        tail = tail[~(ranking['ids'][tail, None] == excluded).any(axis=1)]
+    adjusted = ranking['scores'][tail] + preferences.adjustments(ranking['masks'][tail])
+    return np.concatenate([order[:offset], tail[np.argsort(-adjusted, kind='stable')]])
+
+
+def _next_cursor(session_token: str, signature: str, end: int, total: int) -> Optional[str]:
+    return encode_cursor(session_token, signature, end) if end < total else None
+
+
+def first_page(
+    session_token: str,
+    signature: str,
+    recommendations: List[Dict[str, Any]],
+    page_size: int
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """Cache the full ranking and return its first page and the next cursor."""
+    store_ranking(session_token, signature, recommendations)
+    page = recommendations[:page_size]
+    return page, _next_cursor(session_token, signature, page_size, len(recommendations))
+
+
+def page_from_cursor(cursor: str, page_size: int) -> Tuple[List[Dict[str, Any]], Optional[str], str]:
+    """The page a cursor points to, the next cursor, and the session token."""
+    session_token, signature, offset = decode_cursor(cursor)
+    key = _ranking_key(session_token, signature)
+    ranking = cache.get(key)
+    if ranking is None:
+        raise CursorError("Cursor expired; request the first page again.")
+
+    # React to feedback given since the ranking was last ordered
+    preferences = get_preferences(session_token)
+    if preferences is not None and preferences.events != ranking['events']:
+        ranking['order'] = rerank_tail(ranking, offset, preferences)
+        ranking['events'] = preferences.events
+        cache.set(key, ranking, RANKING_TIMEOUT)
+
+    rows = ranking['order'][offset:offset + page_size]
+    adjustments = np.zeros(len(rows))
+    if preferences is not None and len(rows):
+        adjustments = preferences.adjustments(ranking['masks'][rows])
+
+    movie_ids = [int(movie_id) for movie_id in ranking['ids'][rows]]
+    movies = Movie.objects.in_bulk(movie_ids)
+    page = []
+    for row, movie_id, adjustment in zip(rows, movie_ids, adjustments):
+        if movie_id not in movies:
+            continue
+        reasons = ranking['reasons'][row]
+        if adjustment > 0.1:
+            reasons = reasons + ["Similar to movies you liked this session"]
+        page.append({
+            'movie': movies[movie_id],
+            'score': float(ranking['scores'][row] + adjustment),
+            'reasons': reasons
+        })
+
+    end = offset + len(rows)
+    return page, _next_cursor(session_token, signature, end, len(ranking['order'])), session_token
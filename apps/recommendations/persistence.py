@@ -0,0 +1,129 @@
+"""
+Persistence of recommendation results.
+
+Results are written with one ``bulk_create``. With write-behind enabled
+(``RECOMMENDER_WRITE_BEHIND``), the payload is queued to an in-process
+buffer and a background thread writes batches of sessions, so the
+recommendation request does not wait on persistence at all.
+"""
+
+from __future__ import annotations
+import atexit
+import logging
+import queue
+import threading
+from typing import Any, Dict, List, Optional
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+
+from apps.core.models import RecommendationResult
+
+logger = logging.getLogger(__name__)
+
+FLUSH_INTERVAL = 2.0  # Seconds between background flushes
+MAX_BATCH = 100  # Sessions written per transaction
+MAX_PENDING = 5000  # Queued sessions before falling back to synchronous writes
+
+
+def _result_rows(session_id: int, recommendations: List[Dict[str, Any]]) -> List[RecommendationResult]:
+    return [
+        RecommendationResult(
+            session_id=session_id,
+            movie=rec['movie'],
+            score=rec['score'],
+            reasons=rec['reasons']
+        )
+        for rec in recommendations
+    ]
+
+
+def write_results(payloads: Dict[int, List[Dict[str, Any]]]):
+    """Replace the results of each session with one DELETE and one bulk INSERT."""
+    rows = []
+    for session_id, recommendations in payloads.items():
+        rows.extend(_result_rows(session_id, recommendations))
+
+    with transaction.atomic():
+        RecommendationResult.objects.filter(session_id__in=list(payloads)).delete()
+        RecommendationResult.objects.bulk_create(rows, batch_size=500)
+
+
+class WriteBehindBuffer:
+    """Queue of (session id, results) payloads flushed by a daemon thread."""
+
+    def __init__(self, flush_interval: float = FLUSH_INTERVAL, max_batch: int = MAX_BATCH):
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self._queue: "queue.Queue[tuple]" = queue.Queue(maxsize=MAX_PENDING)
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+
+    def _ensure_started(self):
+        # Started lazily so the thread is created in the worker, after fork
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name='recommendation-write-behind', daemon=True
+                )
+                self._thread.start()
+
+    def submit(self, session_id: int, recommendations: List[Dict[str, Any]]) -> bool:
+        """Queue a payload; ``False`` if the buffer is full."""
+        self._ensure_started()
+        try:
+            self._queue.put_nowait((session_id, recommendations))
+            return True
+        except queue.Full:
+            return False
+
+    def _drain(self, first: Optional[tuple] = None) -> Dict[int, List[Dict[str, Any]]]:
+        # Later payloads for the same session replace earlier ones
+        batch = {}
+        if first is not None:
+            batch[first[0]] = first[1]
+        while len(batch) < self.max_batch:
+            try:
+                session_id, recommendations = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            batch[session_id] = recommendations
+        return batch
+
+    def flush(self, first: Optional[tuple] = None):
+        """Write everything currently queued."""
+        while True:
+            batch = self._drain(first)
+            first = None
+            if not batch:
+                return
+            close_old_connections()
+            try:
+                write_results(batch)
+            except Exception:
+                logger.exception("Failed to persist %d recommendation sessions", len(batch))
+            finally:
+                close_old_connections()
+
+    def _run(self):
+        while True:
+            try:
+                first = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+            self.flush(first)
+
+
+write_behind_buffer = WriteBehindBuffer()
+atexit.register(write_behind_buffer.flush)
+
+
+def save_recommendation_results(session, recommendations: List[Dict[str, Any]]):
+    """Persist a session's results, write-behind when enabled."""
+    if getattr(settings, 'RECOMMENDER_WRITE_BEHIND', False):
+        if write_behind_buffer.submit(session.id, recommendations):
+            return
+        logger.warning("Write-behind buffer full; persisting recommendations synchronously")
+    write_results({session.id: recommendations})
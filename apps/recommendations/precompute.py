@@ -0,0 +1,147 @@
+"""
+Batch precomputation of per-user top-N recommendations.
+
+The parent process warms one engine (rating matrix, feature store) and
+forks a pool of workers, which inherit it copy-on-write and score chunks
+of users. The parent upserts each chunk's results into
+``PrecomputedRecommendation``. A user's rows are served until they go
+stale: older than ``RECOMMENDER_PRECOMPUTE_MAX_AGE`` or computed from an
+older user version (the user rated or saved a movie since).
+"""
+
+from __future__ import annotations
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from apps.core.models import PrecomputedRecommendation, User
+from .cache import get_user_version
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 200
+
+# (user id, user version, [(movie id, score, reasons)])
+UserResults = Tuple[int, int, List[Tuple[int, float, List[str]]]]
+
+_worker_engine = None
+
+
+def _score_chunk(user_ids: List[int], top_n: int) -> List[UserResults]:
+    results = []
+    for user in User.objects.filter(id__in=user_ids):
+        version = get_user_version(user.id)
+        recommendations = _worker_engine._get_user_recommendations(user, {}, top_n)
+        results.append((
+            user.id,
+            version,
+            [(rec['movie'].id, rec['score'], rec['reasons']) for rec in recommendations],
+        ))
+    return results
+
+
+def write_precomputed(results: List[UserResults]):
+    """Upsert the users' ranked rows and drop ranks beyond their new list."""
+    now = timezone.now()
+    rows = [
+        PrecomputedRecommendation(
+            user_id=user_id, movie_id=movie_id, rank=rank, score=score,
+            reasons=reasons, user_version=version, computed_at=now
+        )
+        for user_id, version, recommendations in results
+        for rank, (movie_id, score, reasons) in enumerate(recommendations)
+    ]
+    stale_tail = Q()
+    for user_id, _, recommendations in results:
+        stale_tail |= Q(user_id=user_id, rank__gte=len(recommendations))
+
+    with transaction.atomic():
+        PrecomputedRecommendation.objects.bulk_create(
+            rows,
+            batch_size=1000,
+            update_conflicts=True,
+            unique_fields=['user', 'rank'],
+            update_fields=['movie', 'score', 'reasons', 'user_version', 'computed_at'],
+        )
+        if results:
+            PrecomputedRecommendation.objects.filter(stale_tail).delete()
+
+
+def _chunks(user_ids: List[int], size: int) -> Iterator[List[int]]:
+    for start in range(0, len(user_ids), size):
+        yield user_ids[start:start + size]
+
+
+def precompute_recommendations(
+    user_ids: Optional[List[int]] = None,
+    top_n: Optional[int] = None,
+    workers: int = 1,
+    chunk_size: int = CHUNK_SIZE,
+    active_days: Optional[int] = None
+) -> int:
+    """Score users in chunks across ``workers`` processes. Returns users written."""
+    global _worker_engine
+    from .engine import RecommendationEngine
+
+    top_n = top_n or settings.RECOMMENDER_PRECOMPUTE_TOP_N
+
+    users = User.objects.filter(is_active=True)
+    if user_ids:
+        users = users.filter(id__in=user_ids)
+    if active_days:
+        users = users.filter(last_login__gte=timezone.now() - timedelta(days=active_days))
+    ids = list(users.order_by('id').values_list('id', flat=True))
+
+    # Shared read-only state, built once and inherited by the forked workers
+    _worker_engine = RecommendationEngine()
+    _worker_engine.rating_matrix
+    _worker_engine.feature_store
+
+    written = 0
+    if workers <= 1:
+        for chunk in _chunks(ids, chunk_size):
+            results = _score_chunk(chunk, top_n)
+            write_precomputed(results)
+            written += len(results)
+        return written
+
+    # Forked workers must open their own database connections
+    connections.close_all()
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('fork')) as pool:
+        futures = [pool.submit(_score_chunk, chunk, top_n) for chunk in _chunks(ids, chunk_size)]
+        for future in futures:
+            results = future.result()
+            write_precomputed(results)
+            written += len(results)
+            logger.info("Precomputed recommendations for %d/%d users", written, len(ids))
+    return written
+
+
+def load_precomputed(user, limit: int) -> Optional[List[Dict[str, Any]]]:
+    """A user's fresh precomputed recommendations, or ``None`` if missing or stale."""
+    rows = list(
+        PrecomputedRecommendation.objects.filter(user=user, rank__lt=limit).select_related('movie')
+    )
+    if not rows:
+        return None
+
+    max_age = timedelta(seconds=settings.RECOMMENDER_PRECOMPUTE_MAX_AGE)
+    head = rows[0]
+    if (
+        head.computed_at < timezone.now() - max_age
+        or head.user_version != get_user_version(user.id)
+        or (len(rows) < limit and limit > settings.RECOMMENDER_PRECOMPUTE_TOP_N)
+    ):
+        return None
+
+    return [
+        {'movie': row.movie, 'score': row.score, 'reasons': row.reasons}
+        for row in rows
+    ]
@@ -0,0 +1,98 @@
+"""
+Per-user profile snapshot consumed by the recommendation scoring functions.
+
+The snapshot is built with a few queries and cached per user under a
+versioned key, so scoring a whole candidate set never goes back to the
+user's watch history. Favourite genres and the preferred year come from the
+time-decayed signals (``implicit_signals``) once they have been built for
+the user, so recent activity outweighs old activity.
+"""
+
+from __future__ import annotations
+from typing import FrozenSet, List, Optional, Tuple
+
+from collections import Counter
+
+from django.core.cache import cache
+
+from apps.core.models import SavedMovie, UserWatchHistory
+from .cache import user_key
+from .feature_store import get_feature_store
+from .features import mask_to_names
+from .implicit_signals import FAVORITE_MIN_RATING, favorite_genres, weighted_average_year
+
+PROFILE_CACHE_TIMEOUT = 60 * 60
+PROFILE_CACHE_NAME = 'profile:2'  # Bumped whenever UserProfile's fields change
+FAVORITE_GENRE_LIMIT = 3
+SAVED_SEED_LIMIT = 20
+
+
+class UserProfile:
+    """Snapshot of the user data the engine scores against."""
+
+    def __init__(
+        self,
+        user_id: int,
+        rated_movie_ids: FrozenSet[int],
+        rating_count: int,
+        average_year: Optional[float],
+        favorite_genres: List[Tuple[str, int]],
+        saved_tmdb_ids: Tuple[int, ...]
+    ):
+        self.user_id = user_id
+        self.rated_movie_ids = rated_movie_ids
+        self.rating_count = rating_count
+        self.average_year = average_year
+        self.favorite_genres = favorite_genres
+        self.saved_tmdb_ids = saved_tmdb_ids
+
+    @classmethod
+    def build(cls, user) -> "UserProfile":
+        """Build the snapshot from the database."""
+        history = list(
+            UserWatchHistory.objects.filter(user=user).values_list('movie_id', 'movie__year')
+        )
+        years = [year for _, year in history if year is not None]
+
+        # Time-decayed preferences, if the signal builder has seen the user
+        favorites = favorite_genres(user.id, FAVORITE_GENRE_LIMIT)
+        average_year = weighted_average_year(user.id) if favorites else None
+        if not favorites:
+            # Top genres of highly rated movies, from the feature store's bitmasks
+            store = get_feature_store()
+            liked = UserWatchHistory.objects.filter(
+                user=user, rating__gte=FAVORITE_MIN_RATING
+            ).values_list('movie_id', flat=True)
+            genre_counts: Counter = Counter()
+            for row in store.rows_of(liked):
+                if row >= 0:
+                    genre_counts.update(mask_to_names(store.genre_masks[row], store.genre_names))
+            favorites = genre_counts.most_common(FAVORITE_GENRE_LIMIT)
+        if average_year is None and years:
+            average_year = sum(years) / len(years)
+
+        # Most recently saved movies seed the co-occurrence signal
+        saved_tmdb_ids = tuple(
+            SavedMovie.objects.filter(user=user, media_type='movie').order_by(
+                '-saved_at'
+            ).values_list('tmdb_id', flat=True)[:SAVED_SEED_LIMIT]
+        )
+
+        return cls(
+            user_id=user.id,
+            rated_movie_ids=frozenset(movie_id for movie_id, _ in history),
+            rating_count=len(history),
+            average_year=average_year,
+            favorite_genres=favorites,
+            saved_tmdb_ids=saved_tmdb_ids,
+        )
+
+    @classmethod
+    def for_user(cls, user) -> "UserProfile":
+        """Cached snapshot, rebuilt after the user's ratings change."""
+        key = user_key(PROFILE_CACHE_NAME, user.id)
+        profile = cache.get(key)
+        if profile is None:
+            profile = cls.build(user)
+            cache.set(key, profile, PROFILE_CACHE_TIMEOUT)
+        return profile
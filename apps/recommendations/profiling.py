@@ -0,0 +1,285 @@
+"""
+Stage-level profiling of the recommendation engine.
+
+Engine stages run inside ``span(name)`` context managers. When
+``RECOMMENDER_PROFILING`` is on, a span records its wall time, the
+queries it ran on the default connection and the rows they returned
+(where the driver reports a row count), plus any rows the stage reports
+itself (``span.add_rows``, e.g. candidates scanned in the feature store). Spans nest; a parent's figures include its
+children's.
+
+Each finished span goes to the current request's list, which
+``ServerTimingMiddleware`` (installed when profiling is on) turns into a
+``Server-Timing`` header, and to the worker's histogram. Workers publish their histogram to the Django
+cache at most every ``PUBLISH_INTERVAL`` seconds, so the
+``dump_recommendation_profile`` command can merge the figures of every
+worker. When profiling is off, ``span`` returns a shared no-op context.
+"""
+
+from __future__ import annotations
+import contextvars
+import os
+import socket
+import threading
+import time
+from bisect import bisect_left
+from typing import Any, Dict, List, Optional
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+
+from .cache import KEY_PREFIX, bump_version, get_version
+
+PROFILE = 'profile'  # Version scope; bumped to reset every worker's histogram
+BUCKET_BOUNDS_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+PUBLISH_INTERVAL = 30  # Seconds between publishing a worker's histogram
+WORKER_TIMEOUT = 24 * 60 * 60  # Published histograms of stopped workers expire
+REGISTRY_KEY = f'{KEY_PREFIX}:profile:workers'
+
+_request_spans: contextvars.ContextVar[Optional[List["Span"]]] = contextvars.ContextVar(
+    'recommendation_spans', default=None
+)
+
+
+class _NoopSpan:
+    """Stands in for a span when profiling is off."""
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, *exc_info):
+        pass
+
+    def add_rows(self, rows: int):
+        pass
+
+
+_NOOP = _NoopSpan()
+
+
+class Span:
+    """Wall time, queries and rows of one engine stage."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.queries = 0
+        self.rows = 0
+        self.duration_ms = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        result = execute(sql, params, many, context)
+        self.queries += 1
+        rowcount = getattr(context['cursor'], 'rowcount', -1)
+        if rowcount and rowcount > 0:
+            self.rows += rowcount
+        return result
+
+    def __enter__(self) -> "Span":
+        self._wrapper = connection.execute_wrapper(self)
+        self._wrapper.__enter__()
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.duration_ms = (time.perf_counter() - self._started) * 1000
+        self._wrapper.__exit__(None, None, None)
+        spans = _request_spans.get()
+        if spans is not None:
+            spans.append(self)
+        histogram.record(self)
+
+    def add_rows(self, rows: int):
+        """Count rows the stage touched outside the database."""
+        self.rows += int(rows)
+
+
+def span(name: str):
+    """Profile the enclosed stage under ``name`` (a Server-Timing token)."""
+    if not settings.RECOMMENDER_PROFILING:
+        return _NOOP
+    return Span(name)
+
+
+def _empty_stats() -> Dict[str, Any]:
+    return {
+        'count': 0, 'total_ms': 0.0, 'max_ms': 0.0, 'queries': 0, 'rows': 0,
+        'buckets': [0] * (len(BUCKET_BOUNDS_MS) + 1),
+    }
+
+
+def merge_stats(into: Dict[str, Dict[str, Any]], other: Dict[str, Dict[str, Any]]):
+    """Add the per-span figures of ``other`` to ``into``."""
+    for name, stats in other.items():
+        total = into.setdefault(name, _empty_stats())
+        for field in ('count', 'total_ms', 'queries', 'rows'):
+            total[field] += stats[field]
+        total['max_ms'] = max(total['max_ms'], stats['max_ms'])
+        total['buckets'] = [a + b for a, b in zip(total['buckets'], stats['buckets'])]
+
+
+def percentile_ms(stats: Dict[str, Any], percentile: float) -> float:
+    """Upper bound of the bucket holding the percentile (the maximum past the last bound)."""
+    threshold = stats['count'] * percentile / 100
+    seen = 0
+    for bound, count in zip(BUCKET_BOUNDS_MS, stats['buckets']):
+        seen += count
+        if seen >= threshold and seen:
+            return min(float(bound), stats['max_ms'])
+    return stats['max_ms']
+
+
+class Histogram:
+    """Per-worker latency buckets and totals per span name."""
+
+    def __init__(self):
+        self._stats: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._version: Optional[int] = None
+        self._published_at = 0.0
+
+    def record(self, finished: Span):
+        with self._lock:
+            stats = self._stats.setdefault(finished.name, _empty_stats())
+            stats['count'] += 1
+            stats['total_ms'] += finished.duration_ms
+            stats['max_ms'] = max(stats['max_ms'], finished.duration_ms)
+            stats['queries'] += finished.queries
+            stats['rows'] += finished.rows
+            stats['buckets'][bisect_left(BUCKET_BOUNDS_MS, finished.duration_ms)] += 1
+            due = time.monotonic() - self._published_at >= PUBLISH_INTERVAL
+            if due:
+                self._published_at = time.monotonic()
+        if due:
+            self.publish()
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return {name: dict(stats, buckets=list(stats['buckets'])) for name, stats in self._stats.items()}
+
+    def reset(self):
+        with self._lock:
+            self._stats = {}
+
+    @property
+    def worker(self) -> str:
+        # Read at publish time: workers may be forked after import
+        return f'{socket.gethostname()}:{os.getpid()}'
+
+    def publish(self):
+        """Write this worker's figures to the shared cache."""
+        version = get_version(PROFILE)
+        if version != self._version:
+            # Figures from before a reset are dropped
+            if self._version is not None:
+                self.reset()
+            self._version = version
+        worker = self.worker
+        cache.set(_worker_key(worker), {'version': version, 'stats': self.snapshot()}, WORKER_TIMEOUT)
+
+        # Checked on every publish, so a registration lost to a concurrent write is redone
+        workers = cache.get(REGISTRY_KEY) or []
+        if worker not in workers:
+            cache.set(REGISTRY_KEY, workers + [worker], WORKER_TIMEOUT)
+
+
+def _worker_key(worker: str) -> str:
+    return f'{KEY_PREFIX}:profile:worker:{worker}'
+
+
+histogram = Histogram()
+
+
+def collect() -> Dict[str, Dict[str, Any]]:
+    """Figures of every worker that published since the last reset, merged."""
+    version = get_version(PROFILE)
+    workers = cache.get(REGISTRY_KEY) or []
+    merged: Dict[str, Dict[str, Any]] = {}
+    for entry in cache.get_many([_worker_key(worker) for worker in workers]).values():
+        if entry['version'] == version:
+            merge_stats(merged, entry['stats'])
+    return merged
+
+
+def reset_all():
+    """Clear the published figures; each worker drops its own at its next publish."""
+    bump_version(PROFILE)
+    cache.delete(REGISTRY_KEY)
+
+
+def format_table(stats: Dict[str, Dict[str, Any]]) -> str:
+    """One line per span, slowest total first."""
+    header = (
+        f"{'span':<16}{'count':>8}{'mean ms':>10}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+        f"{'max ms':>10}{'queries':>9}{'rows':>10}"
+    )
+    lines = [header, '-' * len(header)]
+    for name, row in sorted(stats.items(), key=lambda item: item[1]['total_ms'], reverse=True):
+        count = max(row['count'], 1)
+        lines.append(
+            f"{name:<16}{row['count']:>8}{row['total_ms'] / count:>10.2f}{percentile_ms(row, 50):>9.2f}"
+            f"{percentile_ms(row, 95):>9.2f}{percentile_ms(row, 99):>9.2f}{row['max_ms']:>10.2f}"
+            f"{row['queries'] / count:>9.1f}{row['rows'] / count:>10.1f}"
+        )
+    return '\n'.join(lines)
+
+
+def server_timing(spans: List[Span]) -> str:
+    """``Server-Timing`` header value of the request's spans."""
+    return ', '.join(
+        f'{finished.name};dur={finished.duration_ms:.2f};desc="{finished.queries} queries, {finished.rows} rows"'
+        for finished in spans
+    )
+
+
+def _add_server_timing(response, spans: List[Span]):
+    if spans:
+        response['Server-Timing'] = server_timing(spans)
+    return response
+
+
+class ServerTimingMiddleware:
+    """
+    Adds the request's engine spans as a ``Server-Timing`` header.
+
+    Installed only when ``RECOMMENDER_PROFILING`` is on, and runs natively
+    in both sync and async stacks. Spans of a streamed response finish
+    after its headers are sent, so they reach the histogram only.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not settings.RECOMMENDER_PROFILING:
+            return self.get_response(request)
+
+        spans: List[Span] = []
+        token = _request_spans.set(spans)
+        try:
+            response = self.get_response(request)
+        finally:
+            _request_spans.reset(token)
+        return _add_server_timing(response, spans)
+
+    async def __acall__(self, request):
+        if not settings.RECOMMENDER_PROFILING:
+            return await self.get_response(request)
+
+        # Sync views run in a thread with a copy of this context, which
+        # shares the list
+        spans: List[Span] = []
+        token = _request_spans.set(spans)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _request_spans.reset(token)
+        return _add_server_timing(response, spans)
@@ -0,0 +1,80 @@
+"""
+Shared top-K ranking helpers for the recommendation engine.
+
+Scores are kept as bare ``(score, movie_id)`` entries: in a bounded heap
+when candidates are scored one at a time, or picked with
+``utils.top_k_indices`` when they are scored as an array. Result dicts,
+movie rows and reasons are only built for the final winners.
+"""
+
+from __future__ import annotations
+import heapq
+import itertools
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from apps.core.models import Movie
+
+# (score, movie id, payload passed to the reasons callback)
+Ranked = Tuple[float, int, Any]
+
+
+class TopK:
+    """Bounded min-heap of the ``k`` best-scoring candidates seen so far."""
+
+    def __init__(self, k: int, min_score: Optional[float] = None):
+        self.k = k
+        self.min_score = min_score
+        self._heap: List[tuple] = []
+        self._order = itertools.count()
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def push(self, score: float, movie_id: int, payload: Any = None) -> bool:
+        """Offer a candidate; ``False`` if it was rejected."""
+        if self.k <= 0 or (self.min_score is not None and score <= self.min_score):
+            return False
+        # On equal scores the earlier candidate ranks higher, as with a stable sort
+        entry = (score, -next(self._order), movie_id, payload)
+        if len(self._heap) < self.k:
+            heapq.heappush(self._heap, entry)
+            return True
+        if entry > self._heap[0]:
+            heapq.heapreplace(self._heap, entry)
+            return True
+        return False
+
+    def ranked(self) -> List[Ranked]:
+        """Winners, best first."""
+        return [
+            (score, movie_id, payload)
+            for score, _, movie_id, payload in sorted(self._heap, reverse=True)
+        ]
+
+
+def materialize(
+    ranked: Sequence[Ranked],
+    reasons: Callable[[Any], List[str]],
+    movies: Optional[Dict[int, "Movie"]] = None
+) -> List[Dict[str, Any]]:
+    """
+    Build ``{'movie', 'score', 'reasons'}`` dicts for the winners only.
+
+    ``reasons`` is called with each winner's payload. Movies not in
+    ``movies`` are loaded with one ``in_bulk`` query; winners whose movie no
+    longer exists are dropped.
+    """
+    movies = dict(movies or {})
+    missing = [movie_id for _, movie_id, _ in ranked if movie_id not in movies]
+    if missing:
+        movies.update(Movie.objects.in_bulk(missing))
+
+    return [
+        {
+            'movie': movies[movie_id],
+            'score': float(score),
+            'reasons': reasons(payload)
+        }
+        for score, movie_id, payload in ranked
+        if movie_id in movies
+    ]
@@ -0,0 +1,76 @@
+"""
+Cache of computed recommendation lists keyed by the request's filters.
+
+Filters are normalized (genre order, blank values, mood text reduced to the
+detected moods) and hashed into a signature, so equivalent questionnaire
+answers share one entry. Guest entries are keyed by the catalog version;
+authenticated users get their own keys that also carry their user version,
+so rating or saving a movie invalidates only that user's entries.
+"""
+
+from __future__ import annotations
+import hashlib
+import json
+from typing import Any, Callable, Dict, List, Optional
+
+from django.conf import settings
+
+from .cache import CATALOG, KEY_PREFIX, get_or_compute_locked, get_user_version, get_version
+from .diversity import clamp_diversity
+from .mood import analyze_mood
+
+RUNTIME_PREFERENCES = ('short', 'medium', 'long')
+
+
+def normalize_filters(
+    genres: Optional[List[str]] = None,
+    mood_text: Optional[str] = None,
+    year_start: Optional[int] = None,
+    year_end: Optional[int] = None,
+    runtime_preference: Optional[str] = None,
+    include_local: bool = True,
+    limit: int = 20,
+    diversity: Optional[float] = None
+) -> Dict[str, Any]:
+    """Canonical form of the filters, equal for requests with equal results."""
+    moods = analyze_mood(mood_text) if mood_text else {}
+    return {
+        'genres': sorted({genre.strip() for genre in genres or [] if genre and genre.strip()}),
+        'moods': sorted((mood, round(weight, 3)) for mood, weight in moods.items()),
+        # Falsy years and unknown runtimes are ignored by the engine's filters
+        'year_start': int(year_start) if year_start else None,
+        'year_end': int(year_end) if year_end else None,
+        'runtime': runtime_preference if runtime_preference in RUNTIME_PREFERENCES else None,
+        'include_local': bool(include_local),
+        'limit': int(limit),
+        'diversity': round(clamp_diversity(
+            settings.RECOMMENDER_DIVERSITY if diversity is None else diversity
+        ), 2),
+    }
+
+
+def filter_signature(**filters) -> str:
+    """Stable hash of the normalized filters."""
+    canonical = json.dumps(normalize_filters(**filters), sort_keys=True, separators=(',', ':'))
+    return hashlib.sha1(canonical.encode('utf-8')).hexdigest()
+
+
+def response_key(signature: str, mode: str, user_id: Optional[int] = None) -> str:
+    """Versioned key of a recommendation list for a guest or a user."""
+    key = f'{KEY_PREFIX}:response:{mode}:{signature}:c{get_version(CATALOG)}'
+    if user_id is not None:
+        key += f':u{user_id}:v{get_user_version(user_id)}'
+    return key
+
+
+def get_or_compute_response(
+    signature: str,
+    mode: str,
+    compute: Callable[[], List[Dict[str, Any]]],
+    user_id: Optional[int] = None
+) -> List[Dict[str, Any]]:
+    """Cached recommendation list, computed once per cold key."""
+    timeout = settings.RECOMMENDER_RESPONSE_CACHE_TIMEOUT
+    if not timeout:
+        return compute()
+    return get_or_compute_locked(response_key(signature, mode, user_id), compute, timeout)
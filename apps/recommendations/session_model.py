@@ -0,0 +1,85 @@
+"""
+Real-time session preferences built from recommendation feedback.
+
+Each feedback event ('liked', 'watched', 'disliked') moves a per-session
+weight vector over genre bits towards or away from the movie's genres.
+Pages of a cached ranking (see ``pagination``) are reranked with that
+vector before they are sliced, using only the genre bitmasks cached with
+the ranking, so feedback shows up on the next page without touching the
+catalog. Preferences are a few hundred bytes held in the shared cache (not
+a worker-local LRU, since they change on every event) so every worker
+sees the latest vector; updates hold the session's cache lock so
+concurrent events are not lost.
+"""
+
+from __future__ import annotations
+from typing import Optional, Set
+
+import numpy as np
+from django.core.cache import cache
+
+from .cache import KEY_PREFIX, locked
+from .feature_store import get_feature_store
+from .features import MAX_GENRE_BITS
+
+ACTION_WEIGHTS = {'liked': 1.0, 'watched': 0.5, 'disliked': -1.0}
+EXCLUDED_ACTIONS = ('watched', 'disliked')  # Not recommended again in the session
+FEEDBACK_WEIGHT = 0.3  # Max score change from session preferences
+SESSION_TIMEOUT = 30 * 60
+UPDATE_LOCK_TIMEOUT = 5  # Seconds; an update is a cache round trip
+
+
+def genre_matrix(masks: np.ndarray) -> np.ndarray:
+    """(n, MAX_GENRE_BITS) 0/1 matrix of the bits set in each mask."""
+    masks = np.ascontiguousarray(masks, dtype='<u8')
+    bits = np.unpackbits(masks.view(np.uint8).reshape(-1, 8), axis=1, bitorder='little')
+    return bits.astype(np.float32)
+
+
+class SessionPreferences:
+    """Genre weight vector and excluded movies of one recommendation session."""
+
+    def __init__(self, weights: Optional[np.ndarray] = None, excluded: Optional[Set[int]] = None):
+        self.weights = weights if weights is not None else np.zeros(MAX_GENRE_BITS, dtype=np.float32)
+        self.excluded = excluded or set()
+        self.events = 0
+
+    def apply(self, action: str, movie_id: int, genre_mask: int):
+        """Fold one feedback event into the preferences."""
+        self.weights += ACTION_WEIGHTS.get(action, 0.0) * genre_matrix(np.array([genre_mask]))[0]
+        if action in EXCLUDED_ACTIONS:
+            self.excluded.add(int(movie_id))
+        self.events += 1
+
+    def adjustments(self, genre_masks: np.ndarray) -> np.ndarray:
+        """Score change for each candidate: mean genre weight, squashed to +-FEEDBACK_WEIGHT."""
+        genres = genre_matrix(genre_masks)
+        counts = np.maximum(genres.sum(axis=1), 1.0)
+        return FEEDBACK_WEIGHT * np.tanh(genres @ self.weights / counts)
+
+
+def _key(session_token: str) -> str:
+    return f'{KEY_PREFIX}:session_preferences:{session_token}'
+
+
+def get_preferences(session_token: str) -> Optional[SessionPreferences]:
+    return cache.get(_key(session_token))
+
+
+def is_new_feedback(session_token: str, movie_id: int, action: str) -> bool:
+    """Whether the event is the first of its kind for the movie in the session (resubmits are ignored)."""
+    return cache.add(f'{KEY_PREFIX}:feedback:{session_token}:{movie_id}:{action}', 1, SESSION_TIMEOUT)
+
+
+def record_feedback(session_token: str, movie_id: int, action: str) -> SessionPreferences:
+    """Update the session's preferences with a feedback event."""
+    store = get_feature_store()
+    row = store.rows_of([movie_id])[0]
+    genre_mask = int(store.genre_masks[row]) if row >= 0 else 0
+
+    key = _key(session_token)
+    with locked(key, UPDATE_LOCK_TIMEOUT):
+        preferences = cache.get(key) or SessionPreferences()
+        preferences.apply(action, movie_id, genre_mask)
+        cache.set(key, preferences, SESSION_TIMEOUT)
+    return preferences
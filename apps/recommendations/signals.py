@@ -0,0 +1,97 @@
+"""
+Signal receivers keeping recommendation caches and counters consistent
+with the database.
+"""
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from apps.core.models import Movie, SavedMovie, UserWatchHistory
+from . import counters, trending
+from .cache import CATALOG, RATINGS, bump_user_version, bump_version
+
+
+@receiver(post_save, sender=UserWatchHistory)
+@receiver(post_delete, sender=UserWatchHistory)
+def invalidate_user_caches(sender, instance, **kwargs):
+    """A rating changed: drop the user's cached profile and derived data."""
+    bump_user_version(instance.user_id)
+    # After commit, so workers reloading the rating matrix see the new row
+    transaction.on_commit(lambda: bump_version(RATINGS))
+
+
+@receiver(post_save, sender=SavedMovie)
+@receiver(post_delete, sender=SavedMovie)
+def invalidate_saved_movie_caches(sender, instance, **kwargs):
+    """A saved movie changed: drop the user's cached recommendation lists."""
+    bump_user_version(instance.user_id)
+
+
+@receiver(post_save, sender=Movie)
+@receiver(post_delete, sender=Movie)
+def invalidate_catalog_caches(sender, instance, **kwargs):
+    """The catalog changed: drop cached movie similarities and recommendation lists."""
+    bump_version(CATALOG)
+
+
+@receiver(pre_save, sender=UserWatchHistory)
+def remember_previous_rating(sender, instance, **kwargs):
+    """Keep the stored rating so post_save can apply the counter delta."""
+    instance._previous_rating = None
+    if instance.pk:
+        instance._previous_rating = sender.objects.filter(pk=instance.pk).values_list(
+            'rating', flat=True
+        ).first()
+
+
+@receiver(post_save, sender=UserWatchHistory)
+def count_watch_history_save(sender, instance, created, **kwargs):
+    old_rating = None if created else getattr(instance, '_previous_rating', None)
+    counters.adjust(
+        instance.movie_id,
+        watch_count=1 if created else 0,
+        **counters.rating_deltas(old_rating, instance.rating)
+    )
+
+
+@receiver(post_delete, sender=UserWatchHistory)
+def count_watch_history_delete(sender, instance, **kwargs):
+    counters.adjust(
+        instance.movie_id,
+        watch_count=-1,
+        **counters.rating_deltas(instance.rating, None)
+    )
+
+
+@receiver(post_save, sender=SavedMovie)
+def count_saved_movie_save(sender, instance, created, **kwargs):
+    if created:
+        counters.adjust_saved(instance.tmdb_id, 1)
+
+
+@receiver(post_delete, sender=SavedMovie)
+def count_saved_movie_delete(sender, instance, **kwargs):
+    counters.adjust_saved(instance.tmdb_id, -1)
+
+
+@receiver(post_save, sender=UserWatchHistory)
+def count_trending_watch(sender, instance, created, **kwargs):
+    # Counted once the write commits, so a rolled-back watch never trends
+    movie_id = instance.movie_id
+    if created:
+        transaction.on_commit(lambda: trending.record_event(movie_id, 'watched'))
+    old_rating = getattr(instance, '_previous_rating', None)
+    rated_well = instance.rating is not None and instance.rating >= trending.MIN_TRENDING_RATING
+    if rated_well and (old_rating is None or old_rating < trending.MIN_TRENDING_RATING):
+        transaction.on_commit(lambda: trending.record_event(movie_id, 'rated'))
+
+
+@receiver(post_save, sender=SavedMovie)
+def count_trending_save(sender, instance, created, **kwargs):
+    if not created or instance.media_type != 'movie':
+        return
+    # Saves are keyed by TMDB id; only catalog movies can trend
+    movie_id = Movie.objects.filter(tmdb_id=instance.tmdb_id).values_list('id', flat=True).first()
+    if movie_id is not None:
+        transaction.on_commit(lambda: trending.record_event(movie_id, 'saved'))
@@ -0,0 +1,245 @@
+"""
+Precomputed item-item similarity index.
+
+Each movie's top-K most similar movies are computed offline (genre Jaccard
+plus year proximity, blended with overview TF-IDF similarity when the
+text index is built; the same formula as
+``RecommendationEngine._calculate_movie_similarity``) and stored in the
+``MovieSimilarity`` table, so the movie detail endpoint needs a single
+indexed lookup instead of scoring candidates per request.
+``MovieSimilarityState`` records when each list was computed; incremental
+updates recompute movies added or edited since.
+"""
+
+from __future__ import annotations
+import logging
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+from django.db import transaction
+from django.db.models import Count, F, Min, Q
+from django.utils import timezone
+
+from apps.core.models import Movie, MovieSimilarity, MovieSimilarityState
+from .features import genre_bit_positions, genre_names_by_bit, load_genre_masks, mask_to_names, popcount
+from .text_similarity import SIMILAR_PLOT, TEXT_WEIGHT, TextIndex, get_text_index
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TOP_K = 20
+MIN_SIMILARITY = 0.3  # Minimum similarity threshold, as in get_similar_movies
+GENRE_WEIGHT = 0.7
+YEAR_WEIGHT = 0.3
+YEAR_SPAN = 50  # 50 years = 0 year similarity
+SAME_ERA_YEARS = 5
+
+
+class SimilarityCatalog:
+    """Movie ids, years, genre bitmasks and overview vectors loaded once for index builds."""
+
+    def __init__(
+        self,
+        ids: np.ndarray,
+        years: np.ndarray,
+        masks: np.ndarray,
+        genre_names: List[str],
+        text_index: Optional[TextIndex] = None
+    ):
+        self.ids = ids
+        self.years = years
+        self.masks = masks
+        self.genre_counts = popcount(masks)
+        self.genre_names = genre_names
+        self.row_of = {int(movie_id): row for row, movie_id in enumerate(ids)}
+        self.text_index = text_index
+        # Lists computed from this catalog are current as of its load
+        self.loaded_at = timezone.now()
+        if text_index is not None:
+            # Text index row of each catalog row (-1 for movies added since its build)
+            self.text_rows = np.array([
+                -1 if text_index.row_of(movie_id) is None else text_index.row_of(movie_id) for movie_id in ids
+            ], dtype=np.int64)
+
+    @classmethod
+    def load(cls) -> "SimilarityCatalog":
+        rows = list(Movie.objects.order_by('id').values_list('id', 'year'))
+        ids = np.array([r[0] for r in rows], dtype=np.int64)
+        years = np.array(
+            [r[1] if r[1] is not None else np.nan for r in rows], dtype=np.float64
+        )
+        bits = genre_bit_positions()
+        return cls(ids, years, load_genre_masks(ids, bits), genre_names_by_bit(), get_text_index())
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def scores_for(self, row: int) -> np.ndarray:
+        """Similarity of movie ``row`` against the whole catalog."""
+        mask = self.masks[row]
+        intersection = popcount(self.masks & mask)
+        union = self.genre_counts + self.genre_counts[row] - intersection
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            genre_similarity = np.where(union > 0, intersection / union, 0.0)
+            year_similarity = np.maximum(0, 1 - np.abs(self.years - self.years[row]) / YEAR_SPAN)
+        year_similarity = np.nan_to_num(year_similarity, nan=0.0)
+
+        scores = genre_similarity * GENRE_WEIGHT + year_similarity * YEAR_WEIGHT
+        candidates = intersection > 0
+        text_similarity = self.text_scores(row)
+        if text_similarity is not None:
+            scores = scores * (1 - TEXT_WEIGHT) + text_similarity * TEXT_WEIGHT
+            candidates |= text_similarity >= SIMILAR_PLOT
+
+        # Only movies sharing a genre or a storyline are candidates
+        scores[~candidates] = -1.0
+        scores[row] = -1.0
+        return scores
+
+    def text_scores(self, row: int) -> Optional[np.ndarray]:
+        """Overview similarity of movie ``row`` against the catalog (``None`` without a text index)."""
+        if self.text_index is None:
+            return None
+        indexed = self.text_index.scores(int(self.ids[row]))
+        return np.where(self.text_rows >= 0, indexed[self.text_rows], 0.0)
+
+    def neighbours(self, row: int, top_k: int) -> List[tuple]:
+        """Top ``top_k`` (row, score) pairs above the similarity threshold."""
+        scores = self.scores_for(row)
+        candidates = np.flatnonzero(scores > MIN_SIMILARITY)
+        if candidates.size > top_k:
+            top = np.argpartition(-scores[candidates], top_k - 1)[:top_k]
+            candidates = candidates[top]
+        candidates = candidates[np.argsort(-scores[candidates], kind='stable')]
+        return [(int(c), float(scores[c])) for c in candidates]
+
+    def reasons(self, row1: int, row2: int) -> List[str]:
+        """Same reasons as ``RecommendationEngine._get_similarity_reasons``."""
+        reasons = []
+        common_genres = mask_to_names(self.masks[row1] & self.masks[row2], self.genre_names)
+        if common_genres:
+            reasons.append(f"Both are {', '.join(common_genres)} movies")
+
+        year_diff = abs(self.years[row1] - self.years[row2])
+        if year_diff <= SAME_ERA_YEARS:
+            reasons.append("From the same era")
+
+        if self.text_index is not None and self.text_index.similarity(
+            int(self.ids[row1]), int(self.ids[row2])
+        ) >= SIMILAR_PLOT:
+            reasons.append("Similar storyline")
+        return reasons
+
+
+def _write_rows(catalog: SimilarityCatalog, rows: Iterable[int], top_k: int) -> int:
+    """Recompute and replace the index entries of the given catalog rows."""
+    rows = list(rows)
+    entries = []
+    for row in rows:
+        for rank, (other, score) in enumerate(catalog.neighbours(row, top_k)):
+            entries.append(MovieSimilarity(
+                movie_id=int(catalog.ids[row]),
+                similar_movie_id=int(catalog.ids[other]),
+                rank=rank,
+                score=score,
+                reasons=catalog.reasons(row, other)
+            ))
+
+    movie_ids = [int(catalog.ids[r]) for r in rows]
+    with transaction.atomic():
+        MovieSimilarity.objects.filter(movie_id__in=movie_ids).delete()
+        MovieSimilarity.objects.bulk_create(entries, batch_size=1000)
+        MovieSimilarityState.objects.bulk_create(
+            [MovieSimilarityState(movie_id=movie_id, computed_at=catalog.loaded_at) for movie_id in movie_ids],
+            batch_size=1000,
+            update_conflicts=True,
+            unique_fields=['movie'],
+            update_fields=['computed_at']
+        )
+    return len(entries)
+
+
+def build_similarity_index(top_k: int = DEFAULT_TOP_K, batch_size: int = 500) -> int:
+    """Rebuild the whole index. Returns the number of entries written."""
+    catalog = SimilarityCatalog.load()
+    written = 0
+    for start in range(0, len(catalog), batch_size):
+        written += _write_rows(catalog, range(start, min(start + batch_size, len(catalog))), top_k)
+
+    # Drop entries of movies that no longer exist in the catalog
+    MovieSimilarity.objects.exclude(movie_id__in=Movie.objects.values('id')).delete()
+    logger.info("Built similarity index: %d movies, %d entries", len(catalog), written)
+    return written
+
+
+def stale_movie_ids() -> List[int]:
+    """Movies whose similarity list is missing or older than their last edit."""
+    return list(Movie.objects.filter(
+        Q(similarity_state__isnull=True) | Q(updated_at__gt=F('similarity_state__computed_at'))
+    ).values_list('id', flat=True))
+
+
+def update_similarity_index(
+    movie_ids: Optional[Iterable[int]] = None,
+    top_k: int = DEFAULT_TOP_K
+) -> int:
+    """
+    Incrementally add movies to the index.
+
+    Computes neighbour lists for ``movie_ids`` (by default, movies never
+    computed or edited since their list was) and recomputes the lists of
+    existing movies whose top-K those movies would enter, plus the lists
+    that already hold them (an edit can lower or drop their score there).
+    Returns the number of entries written.
+    """
+    catalog = SimilarityCatalog.load()
+    if movie_ids is None:
+        movie_ids = stale_movie_ids()
+
+    new_rows = {catalog.row_of[int(mid)] for mid in movie_ids if int(mid) in catalog.row_of}
+    if not new_rows:
+        return 0
+
+    # Current list size and weakest score for every indexed movie
+    current: Dict[int, tuple] = {
+        entry['movie_id']: (entry['size'], entry['weakest'])
+        for entry in MovieSimilarity.objects.values('movie_id').annotate(
+            size=Count('id'), weakest=Min('score')
+        )
+    }
+
+    affected = set(new_rows)
+    for row in new_rows:
+        scores = catalog.scores_for(row)
+        for other in np.flatnonzero(scores > MIN_SIMILARITY):
+            size, weakest = current.get(int(catalog.ids[other]), (0, 0.0))
+            if size < top_k or scores[other] > weakest:
+                affected.add(int(other))
+
+    # Lists holding an edited movie, where it may have to move down or out
+    holders = MovieSimilarity.objects.filter(
+        similar_movie_id__in=[int(catalog.ids[row]) for row in new_rows]
+    ).values_list('movie_id', flat=True).distinct()
+    affected.update(catalog.row_of[movie_id] for movie_id in holders if movie_id in catalog.row_of)
+
+    written = _write_rows(catalog, sorted(affected), top_k)
+    logger.info(
+        "Updated similarity index: %d new movies, %d lists recomputed",
+        len(new_rows), len(affected)
+    )
+    return written
+
+
+def lookup_similar_movies(movie_id: int, limit: int) -> List[Dict[str, Any]]:
+    """Indexed neighbours of ``movie_id`` in recommendation dict format."""
+    entries = MovieSimilarity.objects.filter(movie_id=movie_id).select_related(
+        'similar_movie'
+    ).order_by('rank')[:limit]
+    return [
+        {
+            'movie': entry.similar_movie,
+            'score': entry.score,
+            'reasons': entry.reasons
+        }
+        for entry in entries
+    ]
@@ -0,0 +1,144 @@
+"""
+Tests for the recommendations app.
+"""
+
+import tempfile
+import time
+
+import numpy as np
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from apps.core.models import (
+    Genre, Movie, MovieSimilarity, RecommendationResult, RecommendationSession, User, UserWatchHistory
+)
+from apps.recommendations.ann import EXACT_SEARCH_BELOW, LSHIndex, exact_top_k
+from apps.recommendations.cache import CATALOG, COLD_START, bump_version
+from apps.recommendations.cold_start import ColdStartTable, cold_start_path, get_cold_start_table
+from apps.recommendations.evaluation import RatingDataset, evaluate
+from apps.recommendations.feature_store import get_feature_store
+from apps.recommendations.persistence import write_results
+from apps.recommendations.similarity_index import build_similarity_index, update_similarity_index
+
+
+class WriteResultsTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='reader', password='secret')
+        self.session = RecommendationSession.objects.create(user=self.user)
+        self.movie = Movie.objects.create(tmdb_id=1, title='Kati Yetu', rating=7.5, year=2020)
+
+    def test_results_keep_their_reasons(self):
+        write_results({self.session.id: [
+            {'movie': self.movie, 'score': 0.9, 'reasons': ['Matches your mood']}
+        ]})
+
+        result = RecommendationResult.objects.get(session=self.session)
+        self.assertEqual(result.score, 0.9)
+        self.assertEqual(result.reasons, ['Matches your mood'])
+
+    def test_rewrite_replaces_previous_results(self):
+        write_results({self.session.id: [{'movie': self.movie, 'score': 0.9, 'reasons': []}]})
+        write_results({self.session.id: [{'movie': self.movie, 'score': 0.4, 'reasons': ['Popular']}]})
+
+        self.assertEqual(
+            list(self.session.results.values_list('score', 'reasons')),
+            [(0.4, ['Popular'])]
+        )
+
+
+class LSHIndexTests(SimpleTestCase):
+    def setUp(self):
+        rng = np.random.default_rng(7)
+        self.vectors = rng.standard_normal((EXACT_SEARCH_BELOW + 500, 16)).astype(np.float32)
+        self.ids = np.arange(len(self.vectors)) + 1000
+
+    def test_candidates_are_the_probed_buckets(self):
+        index = LSHIndex.build(self.ids, self.vectors, n_tables=4, n_bits=10)
+        query = index.vectors[3]
+
+        expected = set()
+        for table in range(index.n_tables):
+            code = int(((index.planes[table] @ query) > 0) @ index._bit_weights)
+            for probe in [code] + [code ^ (1 << bit) for bit in range(index.n_bits)]:
+                expected.update(index.order[table][index.codes[table] == probe].tolist())
+
+        self.assertEqual(index._candidates(query, probe_radius=1).tolist(), sorted(expected))
+
+    def test_small_index_is_searched_exactly(self):
+        index = LSHIndex.build(self.ids[:500], self.vectors[:500])
+        query = self.vectors[10]
+
+        exact = exact_top_k(index.vectors, query, 10)
+        self.assertEqual(
+            [movie_id for movie_id, _ in index.query(query, k=10)],
+            [int(index.ids[row]) for row in exact]
+        )
+
+
+class EndToEndEvaluationTests(TestCase):
+    def setUp(self):
+        for name in ('Action', 'Comedy', 'Drama'):
+            Genre.objects.create(name=name, icon_name=name.lower(), color_primary='#000000')
+        movies = [
+            Movie.objects.create(
+                tmdb_id=i, title=f'Movie {i}', genres=['Action'] if i % 2 else ['Drama'],
+                rating=6.0 + i % 4, year=2000 + i, country='US', vote_count=50
+            )
+            for i in range(1, 21)
+        ]
+        bump_version(CATALOG)
+        for n in range(3):
+            user = User.objects.create_user(username=f'rater{n}', password='secret')
+            for movie in movies[n:n + 8]:
+                UserWatchHistory.objects.create(user=user, movie=movie, rating=5)
+
+    def test_ranks_through_get_recommendations_and_rolls_back(self):
+        results = evaluate(
+            RatingDataset.from_database(), get_feature_store(),
+            modes=('popular', 'hybrid'), k=5, end_to_end=True
+        )
+
+        self.assertEqual([row['mode'] for row in results], ['popular', 'hybrid'])
+        self.assertTrue(all(row['users'] == 3 for row in results))
+        self.assertTrue(all(row['queries'] > 0 for row in results))
+        self.assertFalse(RecommendationSession.objects.exists())
+
+
+class ColdStartTableTests(SimpleTestCase):
+    def test_table_reloaded_after_each_rebuild(self):
+        self.addCleanup(bump_version, COLD_START)  # Later tests reload from the real path
+        with tempfile.TemporaryDirectory() as directory, override_settings(RECOMMENDER_ARTIFACT_DIR=directory):
+            ColdStartTable({('', '', ''): [(1, 0.9, [])]}, time.time()).save(cold_start_path())
+            bump_version(COLD_START)
+            first = get_cold_start_table()
+            self.assertEqual(first.lookup('sw', 'tz'), [(1, 0.9, [])])
+            self.assertIs(get_cold_start_table(), first)
+
+            ColdStartTable({('', '', ''): [(2, 0.8, [])]}, time.time()).save(cold_start_path())
+            bump_version(COLD_START)
+            self.assertEqual(get_cold_start_table().lookup(None, None), [(2, 0.8, [])])
+
+
+class SimilarityIndexUpdateTests(TestCase):
+    def setUp(self):
+        for name in ('Action', 'Drama'):
+            Genre.objects.create(name=name, icon_name=name.lower(), color_primary='#000000')
+        self.first = Movie.objects.create(tmdb_id=1, title='First', genres=['Action'], year=2000)
+        self.second = Movie.objects.create(tmdb_id=2, title='Second', genres=['Action'], year=2001)
+        self.third = Movie.objects.create(tmdb_id=3, title='Third', genres=['Action'], year=2003)
+        build_similarity_index()
+
+    def neighbours(self, movie):
+        return list(
+            MovieSimilarity.objects.filter(movie=movie).order_by('rank').values_list('similar_movie_id', flat=True)
+        )
+
+    def test_edited_movie_leaves_lists_it_no_longer_belongs_to(self):
+        self.assertIn(self.second.id, self.neighbours(self.first))
+
+        self.second.genres = ['Drama']
+        self.second.year = 1950
+        self.second.save()
+        update_similarity_index()
+
+        self.assertEqual(self.neighbours(self.first), [self.third.id])
+        self.assertEqual(self.neighbours(self.second), [])
@@ -0,0 +1,235 @@
+"""
+Plot similarity from TF-IDF vectors of movie overviews.
+
+Overviews (English or Swahili; both stop-word lists apply) are
+tokenized into unigrams and bigrams, hashed into
+``N_FEATURES`` dimensions with a stable hash, weighted by sublinear TF x
+IDF and L2-normalized. The build runs offline (``build_text_index``) and
+writes the CSR matrix and its CSC transpose (the inverted index) as
+``.npy`` files in a versioned artifact directory (see ``artifacts``) that
+workers memory-map.
+
+Pairwise similarity is a dot product of two sparse rows, with no database
+access. Neighbour queries walk the postings of the query's strongest
+terms only, then rescore those candidates exactly.
+"""
+
+from __future__ import annotations
+import json
+import logging
+import re
+import zlib
+from pathlib import Path
+from typing import Iterable, List, Optional, Tuple
+
+import numpy as np
+from scipy import sparse
+
+from apps.core.models import Movie
+from .artifacts import artifact_loader
+from .utils import top_k_indices
+
+logger = logging.getLogger(__name__)
+
+TEXT_INDEX = 'text'  # Artifact name
+N_FEATURES = 1 << 18
+MIN_TOKEN_LENGTH = 2
+MAX_DF = 0.5  # Terms in more than half of the overviews carry no plot signal
+QUERY_TERMS = 24  # Strongest query terms whose postings are walked
+TEXT_WEIGHT = 0.2  # Share of plot similarity in the combined movie similarity
+SIMILAR_PLOT = 0.3  # Plot similarity worth mentioning as a reason
+
+ARRAYS = ('ids', 'indptr', 'indices', 'data', 'postings_indptr', 'postings_rows', 'postings_data')
+
+STOP_WORDS = frozenset("""
+a an and are as at be but by for from has have he her his in is it its of on or she that the
+their they this to was were who will with after about into when while over him them then
+na ya wa za la kwa ni katika kama lakini au huku hii hiyo huyo yeye wao baada kabla pia sana
+ili hadi bila kuwa alikuwa walikuwa anataka mmoja
+""".split())
+
+_TOKEN = re.compile(r'\w+', re.UNICODE)
+
+
+def tokenize(text: str) -> List[str]:
+    """Lower-cased words without stop words or digits-only tokens."""
+    return [
+        token for token in _TOKEN.findall((text or '').lower())
+        if len(token) >= MIN_TOKEN_LENGTH and token not in STOP_WORDS and not token.isdigit()
+    ]
+
+
+def _feature(term: str) -> int:
+    # crc32 is stable across processes, unlike hash()
+    return zlib.crc32(term.encode('utf-8')) % N_FEATURES
+
+
+def hashed_terms(text: str) -> List[int]:
+    """Hashed unigram and bigram features of ``text``."""
+    tokens = tokenize(text)
+    terms = tokens + [f'{first} {second}' for first, second in zip(tokens, tokens[1:])]
+    return [_feature(term) for term in terms]
+
+
+def vectorize(documents: Iterable[str]) -> sparse.csr_matrix:
+    """L2-normalized TF-IDF rows of the documents."""
+    rows, cols, counts = [], [], []
+    n_docs = 0
+    for row, text in enumerate(documents):
+        features, tf = np.unique(np.array(hashed_terms(text), dtype=np.int64), return_counts=True)
+        rows.append(np.full(len(features), row, dtype=np.int64))
+        cols.append(features)
+        counts.append(tf)
+        n_docs = row + 1
+
+    if not n_docs:
+        return sparse.csr_matrix((0, N_FEATURES), dtype=np.float32)
+
+    matrix = sparse.csr_matrix(
+        (
+            1.0 + np.log(np.concatenate(counts).astype(np.float32)),
+            (np.concatenate(rows), np.concatenate(cols))
+        ),
+        shape=(n_docs, N_FEATURES),
+        dtype=np.float32
+    )
+
+    # Smoothed IDF; overly common terms are dropped
+    df = np.bincount(matrix.indices, minlength=N_FEATURES)
+    idf = np.log((1 + n_docs) / (1 + df)).astype(np.float32) + 1.0
+    idf[df > max(1, MAX_DF * n_docs)] = 0.0
+    matrix = matrix.multiply(idf).tocsr()
+    matrix.eliminate_zeros()
+
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    norms[norms == 0] = 1.0
+    return sparse.csr_matrix(sparse.diags(1.0 / norms, dtype=np.float32) @ matrix)
+
+
+class TextIndex:
+    """Memory-mapped TF-IDF rows plus their inverted (term -> rows) index."""
+
+    def __init__(
+        self,
+        ids: np.ndarray,
+        indptr: np.ndarray,
+        indices: np.ndarray,
+        data: np.ndarray,
+        postings_indptr: np.ndarray,
+        postings_rows: np.ndarray,
+        postings_data: np.ndarray
+    ):
+        self.ids = ids
+        self.indptr = indptr
+        self.indices = indices
+        self.data = data
+        self.postings_indptr = postings_indptr
+        self.postings_rows = postings_rows
+        self.postings_data = postings_data
+        self._row_of = None
+
+    @classmethod
+    def build(cls, ids: np.ndarray, documents: Iterable[str]) -> "TextIndex":
+        matrix = vectorize(documents)
+        matrix.sort_indices()
+        postings = matrix.tocsc()
+        postings.sort_indices()
+        return cls(
+            ids=np.asarray(ids, dtype=np.int64),
+            indptr=matrix.indptr.astype(np.int64),
+            indices=matrix.indices.astype(np.int32),
+            data=matrix.data.astype(np.float32),
+            postings_indptr=postings.indptr.astype(np.int64),
+            postings_rows=postings.indices.astype(np.int32),
+            postings_data=postings.data.astype(np.float32),
+        )
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def save(self, path: Path):
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        for name in ARRAYS:
+            np.save(path / f'{name}.npy', np.ascontiguousarray(getattr(self, name)))
+        (path / 'meta.json').write_text(json.dumps({
+            'size': len(self), 'n_features': N_FEATURES, 'nnz': int(len(self.data)),
+        }))
+
+    @classmethod
+    def load(cls, path: Path, mmap: bool = True) -> "TextIndex":
+        path = Path(path)
+        mode = 'r' if mmap else None
+        return cls(**{name: np.load(path / f'{name}.npy', mmap_mode=mode) for name in ARRAYS})
+
+    def row_of(self, movie_id: int) -> Optional[int]:
+        if self._row_of is None:
+            self._row_of = {int(movie_id): row for row, movie_id in enumerate(self.ids)}
+        return self._row_of.get(int(movie_id))
+
+    def _vector(self, row: int) -> Tuple[np.ndarray, np.ndarray]:
+        start, end = self.indptr[row], self.indptr[row + 1]
+        return self.indices[start:end], self.data[start:end]
+
+    def similarity(self, movie_id1: int, movie_id2: int) -> float:
+        """Cosine similarity of two movies' overviews (0 if either is unindexed)."""
+        row1, row2 = self.row_of(movie_id1), self.row_of(movie_id2)
+        if row1 is None or row2 is None:
+            return 0.0
+        terms1, weights1 = self._vector(row1)
+        terms2, weights2 = self._vector(row2)
+        _, at1, at2 = np.intersect1d(terms1, terms2, assume_unique=True, return_indices=True)
+        return float(np.dot(weights1[at1], weights2[at2]))
+
+    def scores(self, movie_id: int, max_terms: Optional[int] = None) -> np.ndarray:
+        """
+        Dot products of one movie against every indexed row, from the
+        postings of its terms (its ``max_terms`` strongest ones if given,
+        which makes the scores a lower bound).
+        """
+        scores = np.zeros(len(self.ids), dtype=np.float32)
+        row = self.row_of(movie_id)
+        if row is None:
+            return scores
+        terms, weights = self._vector(row)
+        if max_terms is not None and len(terms) > max_terms:
+            strongest = np.argpartition(-weights, max_terms - 1)[:max_terms]
+            terms, weights = terms[strongest], weights[strongest]
+        if len(terms) == 0:
+            return scores
+
+        starts, ends = self.postings_indptr[terms], self.postings_indptr[terms + 1]
+        postings = np.concatenate([np.arange(start, end) for start, end in zip(starts, ends)])
+        contributions = np.repeat(weights, ends - starts) * self.postings_data[postings]
+        scores += np.bincount(self.postings_rows[postings], weights=contributions, minlength=len(self.ids)).astype(np.float32)
+        return scores
+
+    def similar(self, movie_id: int, k: int = 10) -> List[Tuple[int, float]]:
+        """Top-``k`` (movie_id, similarity) pairs by plot, excluding the movie itself."""
+        row = self.row_of(movie_id)
+        if row is None:
+            return []
+
+        # Candidates from the strongest terms' postings, then exact rescoring
+        partial = self.scores(movie_id, max_terms=QUERY_TERMS)
+        partial[row] = 0.0
+        shortlist = top_k_indices(partial, k * 4)
+        shortlist = shortlist[partial[shortlist] > 0]
+        exact = [(int(self.ids[other]), self.similarity(movie_id, int(self.ids[other]))) for other in shortlist]
+        exact.sort(key=lambda pair: pair[1], reverse=True)
+        return exact[:k]
+
+
+def build_text_index() -> TextIndex:
+    """Vectorize every movie's overview."""
+    rows = list(Movie.objects.order_by('id').values_list('id', 'overview'))
+    ids = np.array([row[0] for row in rows], dtype=np.int64)
+    return TextIndex.build(ids, (overview or '' for _, overview in rows))
+
+
+_index_loader = artifact_loader(TEXT_INDEX, TextIndex.load)
+
+
+def get_text_index() -> Optional[TextIndex]:
+    """Process-wide text index, remapped after each build (``None`` if unbuilt)."""
+    return _index_loader.get()
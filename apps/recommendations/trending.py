@@ -0,0 +1,167 @@
+"""
+In-house trending movies from our own saves, ratings and feedback.
+
+Events are counted in hourly buckets, one sorted set per hour in Redis
+(``ZINCRBY``, expiring after the longest window), or in a per-process
+fallback when the cache is not Redis or Redis is unavailable. A window
+score sums the buckets it spans, each weighted by exponential decay on its
+age, which Redis does server-side with one ``ZUNIONSTORE``.
+
+Requests never compute a window: ``get_trending`` serves a precomputed
+ranked list from the cache and, once it is older than
+``REFRESH_INTERVAL``, starts a background refresh in one worker (the
+others keep serving the previous list).
+"""
+
+from __future__ import annotations
+import logging
+import threading
+import time
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+from django.core.cache import cache, caches
+from django.core.cache.backends.redis import RedisCache
+
+from .cache import KEY_PREFIX
+
+logger = logging.getLogger(__name__)
+
+BUCKET_SECONDS = 60 * 60
+# Window -> (hours spanned, half-life in hours)
+WINDOWS = {'24h': (24, 6.0), '7d': (7 * 24, 48.0)}
+RETENTION_HOURS = max(hours for hours, _ in WINDOWS.values()) + 1
+EVENT_WEIGHTS = {'saved': 3.0, 'liked': 2.0, 'rated': 2.0, 'watched': 1.0}
+MIN_TRENDING_RATING = 4  # Ratings from here up count as a 'rated' event
+# Counted from recommendation feedback; saves, ratings and watches are
+# counted from the rows they write (see ``signals``), never twice
+FEEDBACK_EVENTS = ('liked',)
+TOP_N = 200  # Movies kept in each precomputed list
+REFRESH_INTERVAL = 60  # Seconds a precomputed list is served before a refresh
+
+
+def _bucket_key(hour: int) -> str:
+    return f'{KEY_PREFIX}:trending:bucket:{hour}'
+
+
+def _list_key(window: str) -> str:
+    return f'{KEY_PREFIX}:trending:list:{window}'
+
+
+def _current_hour(now: Optional[float] = None) -> int:
+    return int((now or time.time()) // BUCKET_SECONDS)
+
+
+def _decay_weights(window: str, hour: int) -> Dict[int, float]:
+    """Bucket hour -> weight for a window ending at ``hour``."""
+    hours, half_life = WINDOWS[window]
+    return {hour - age: 0.5 ** (age / half_life) for age in range(hours)}
+
+
+class LocalCounters:
+    """Per-process hourly buckets, used when Redis is not available."""
+
+    def __init__(self):
+        self._buckets: Dict[int, Counter] = {}
+        self._lock = threading.Lock()
+
+    def incr(self, hour: int, movie_id: int, amount: float):
+        with self._lock:
+            self._buckets.setdefault(hour, Counter())[movie_id] += amount
+            for stale in [h for h in self._buckets if h <= hour - RETENTION_HOURS]:
+                del self._buckets[stale]
+
+    def top(self, weights: Dict[int, float], limit: int) -> List[Tuple[int, float]]:
+        scores: Counter = Counter()
+        with self._lock:
+            for hour, weight in weights.items():
+                for movie_id, count in self._buckets.get(hour, {}).items():
+                    scores[movie_id] += count * weight
+        return scores.most_common(limit)
+
+
+class RedisCounters:
+    """Hourly buckets as Redis sorted sets."""
+
+    def __init__(self, client):
+        self.client = client
+
+    def incr(self, hour: int, movie_id: int, amount: float):
+        key = _bucket_key(hour)
+        pipeline = self.client.pipeline()
+        pipeline.zincrby(key, amount, movie_id)
+        pipeline.expire(key, RETENTION_HOURS * BUCKET_SECONDS)
+        pipeline.execute()
+
+    def top(self, weights: Dict[int, float], limit: int) -> List[Tuple[int, float]]:
+        target = f'{KEY_PREFIX}:trending:union:{threading.get_ident()}'
+        pipeline = self.client.pipeline()
+        pipeline.zunionstore(target, {_bucket_key(hour): weight for hour, weight in weights.items()})
+        pipeline.zrevrange(target, 0, limit - 1, withscores=True)
+        pipeline.delete(target)
+        _, ranked, _ = pipeline.execute()
+        return [(int(movie_id), float(score)) for movie_id, score in ranked]
+
+
+local_counters = LocalCounters()
+
+
+def _redis_counters() -> Optional[RedisCounters]:
+    backend = caches['default']
+    if isinstance(backend, RedisCache):
+        return RedisCounters(backend._cache.get_client(write=True))
+    return None
+
+
+def record_event(movie_id: int, event: str, now: Optional[float] = None):
+    """Count one event for a catalog movie in the current hour's bucket."""
+    amount = EVENT_WEIGHTS.get(event)
+    if not amount:
+        return
+    hour = _current_hour(now)
+    try:
+        counters = _redis_counters()
+        if counters is not None:
+            counters.incr(hour, movie_id, amount)
+            return
+    except Exception:
+        logger.warning("Trending counters unavailable in Redis; counting locally", exc_info=True)
+    local_counters.incr(hour, movie_id, amount)
+
+
+def compute_trending(window: str, limit: int = TOP_N, now: Optional[float] = None) -> List[Tuple[int, float]]:
+    """Decayed ``(movie_id, score)`` ranking of a window, best first."""
+    weights = _decay_weights(window, _current_hour(now))
+    try:
+        counters = _redis_counters()
+        if counters is not None:
+            return counters.top(weights, limit)
+    except Exception:
+        logger.warning("Trending counters unavailable in Redis; ranking local counts", exc_info=True)
+    return local_counters.top(weights, limit)
+
+
+def refresh_trending():
+    """Recompute and cache the ranked list of every window."""
+    for window in WINDOWS:
+        cache.set(_list_key(window), {'computed_at': time.time(), 'ranked': compute_trending(window)}, None)
+
+
+def _refresh_in_background():
+    # One worker refreshes; the lock expires with the interval
+    if cache.add(f'{_list_key("refresh")}:lock', 1, REFRESH_INTERVAL):
+        threading.Thread(target=refresh_trending, name='trending-refresh', daemon=True).start()
+
+
+def get_trending(window: str = '24h') -> List[Tuple[int, float]]:
+    """Precomputed ``(movie_id, score)`` ranking of a window."""
+    if window not in WINDOWS:
+        raise ValueError(f"Unknown trending window: {window}")
+
+    entry = cache.get(_list_key(window))
+    if entry is None:
+        refresh_trending()
+        entry = cache.get(_list_key(window)) or {'ranked': []}
+    elif time.time() - entry['computed_at'] > REFRESH_INTERVAL:
+        _refresh_in_background()
+    return entry['ranked']
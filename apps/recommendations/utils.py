@@ -2,6 +2,9 @@
 Utility functions for the recommendation engine.
 """
 
+import numpy as np
+
+
 def normalize_score(score, min_score=0, max_score=1):
     """Normalize a score to 0-1 range."""
     if max_score == min_score:
@@ -14,4 +17,16 @@ def safe_divide(a, b):
     try:
         return a / b
     except ZeroDivisionError:
-        return 0 
\ No newline at end of file
+        return 0
+
+
+def top_k_indices(scores, k):
+    """Indices of the ``k`` highest scores, best first (argpartition + sort of k)."""
+    scores = np.asarray(scores)
+    if k <= 0 or scores.size == 0:
+        return np.zeros(0, dtype=np.int64)
+    if scores.size > k:
+        candidates = np.argpartition(-scores, k - 1)[:k]
+    else:
+        candidates = np.arange(scores.size)
+    return candidates[np.argsort(-scores[candidates], kind='stable')]
@@ -240,6 +240,31 @@ AUTH_USER_MODEL = 'core.User'
 TMDB_API_KEY = config('TMDB_API_KEY', default='')
 IMDB_API_KEY = config('IMDB_API_KEY', default='')
 
+# Recommendation engine
+# 'hybrid' scores content + collaborative signals live; 'factors' scores
+# with the latent factors written by the train_factors command
+RECOMMENDER_ENGINE_MODE = config('RECOMMENDER_ENGINE_MODE', default='hybrid')
+RECOMMENDER_ARTIFACT_DIR = BASE_DIR / config('RECOMMENDER_ARTIFACT_DIR', default='var/recommender')
+# Persist recommendation results from a background thread instead of in the request
+RECOMMENDER_WRITE_BEHIND = config('RECOMMENDER_WRITE_BEHIND', default=False, cast=bool)
+# Seconds computed recommendation lists are cached per filter signature (0 disables)
+RECOMMENDER_RESPONSE_CACHE_TIMEOUT = config('RECOMMENDER_RESPONSE_CACHE_TIMEOUT', default=300, cast=int)
+# Per-user top-N written by the precompute_recommendations command, and how
+# long (seconds) those rows are served before falling back to live scoring.
+# Requests for more than N rows are scored live; the API's first page ranks
+# pagination.RANKING_SIZE (200) movies, so N should be at least that.
+RECOMMENDER_PRECOMPUTE_TOP_N = config('RECOMMENDER_PRECOMPUTE_TOP_N', default=200, cast=int)
+RECOMMENDER_PRECOMPUTE_MAX_AGE = config('RECOMMENDER_PRECOMPUTE_MAX_AGE', default=36 * 60 * 60, cast=int)
+# Default MMR diversity of recommendation lists: 0 ranks by score only, 1 by variety only
+RECOMMENDER_DIVERSITY = config('RECOMMENDER_DIVERSITY', default=0.0, cast=float)
+# Half-life (days) of watch/save events in the time-decayed user signals
+RECOMMENDER_SIGNAL_HALF_LIFE_DAYS = config('RECOMMENDER_SIGNAL_HALF_LIFE_DAYS', default=90, cast=float)
+# Time engine stages (Server-Timing header, per-worker histograms dumped by
+# the dump_recommendation_profile command); off costs one settings check per stage
+RECOMMENDER_PROFILING = config('RECOMMENDER_PROFILING', default=False, cast=bool)
+if RECOMMENDER_PROFILING:
+    MIDDLEWARE.append('apps.recommendations.profiling.ServerTimingMiddleware')
+
 # Authentication backends
 AUTHENTICATION_BACKENDS = [
     'django.contrib.auth.backends.ModelBackend',
@@ -7,10 +7,19 @@ For more information on this file, see
 https://docs.djangoproject.com/en/5.0/howto/deployment/wsgi/
 """
 
+import logging
 import os
 
 from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'movierecommender.settings.production')
 
-application = get_wsgi_application() 
\ No newline at end of file
+application = get_wsgi_application()
+
+# Load the recommendation feature store at worker start rather than on the
+# first request; if the database is not reachable yet it loads on first use
+try:
+    from apps.recommendations.feature_store import get_feature_store
+    get_feature_store()
+except Exception:
+    logging.getLogger(__name__).warning("Feature store not preloaded", exc_info=True)
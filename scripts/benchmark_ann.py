@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Recall vs latency benchmark of the movie ANN index against exact search.
+
+Generates a synthetic clustered catalog (200k movies by default), builds
+LSH indexes with a few configurations and compares their top-k results
+and query latency with brute-force cosine search.
+
+Usage: python scripts/benchmark_ann.py [--movies 200000] [--dim 32] [--k 10]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+# Add project root to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from apps.recommendations.ann import LSHIndex, _normalize, exact_top_k
+
+
+CONFIGS = [
+    # (tables, bits, probe radius)
+    (4, 14, 0),
+    (8, 12, 0),
+    (8, 12, 1),
+    (12, 14, 1),
+    (16, 16, 1),
+]
+
+
+def synthetic_catalog(n_movies, dim, n_clusters, seed):
+    """Movie vectors drawn around cluster centres, like genre/taste groups."""
+    rng = np.random.default_rng(seed)
+    centres = rng.standard_normal((n_clusters, dim)).astype(np.float32)
+    assignment = rng.integers(0, n_clusters, n_movies)
+    noise = rng.standard_normal((n_movies, dim)).astype(np.float32) * 0.6
+    return np.arange(1, n_movies + 1), centres[assignment] + noise
+
+
+def percentile_ms(samples, q):
+    return np.percentile(np.array(samples) * 1000, q)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--movies', type=int, default=200_000)
+    parser.add_argument('--dim', type=int, default=32)
+    parser.add_argument('--clusters', type=int, default=200)
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--k', type=int, default=10)
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    print(f"🎬 Synthetic catalog: {args.movies} movies x {args.dim} dims")
+    ids, vectors = synthetic_catalog(args.movies, args.dim, args.clusters, args.seed)
+    unit = _normalize(vectors)
+    rng = np.random.default_rng(args.seed + 1)
+    query_rows = rng.choice(args.movies, args.queries, replace=False)
+
+    # Exact baseline (the query movie itself is excluded from both result sets)
+    truth, exact_times = [], []
+    for row in query_rows:
+        started = time.perf_counter()
+        top = exact_top_k(unit, unit[row], args.k + 1)
+        exact_times.append(time.perf_counter() - started)
+        truth.append(set(int(ids[r]) for r in top if r != row))
+
+    header = f"{'method':<24}{'build s':>9}{'recall@k':>10}{'p50 ms':>9}{'p95 ms':>9}{'speedup':>9}"
+    print(header)
+    print('-' * len(header))
+    exact_p50 = percentile_ms(exact_times, 50)
+    print(f"{'exact':<24}{'-':>9}{1.0:>10.3f}{exact_p50:>9.2f}{percentile_ms(exact_times, 95):>9.2f}{1.0:>9.1f}")
+
+    for tables, bits, radius in CONFIGS:
+        started = time.perf_counter()
+        index = LSHIndex.build(ids, vectors, n_tables=tables, n_bits=bits, seed=args.seed)
+        build_seconds = time.perf_counter() - started
+
+        recalls, times = [], []
+        for row, expected in zip(query_rows, truth):
+            started = time.perf_counter()
+            found = index.query_movie(int(ids[row]), k=args.k, probe_radius=radius)
+            times.append(time.perf_counter() - started)
+            recalls.append(len(expected & {movie_id for movie_id, _ in found}) / len(expected))
+
+        p50 = percentile_ms(times, 50)
+        name = f"lsh t={tables} b={bits} r={radius}"
+        print(f"{name:<24}{build_seconds:>9.2f}{np.mean(recalls):>10.3f}{p50:>9.2f}"
+              f"{percentile_ms(times, 95):>9.2f}{exact_p50 / p50:>9.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark of mood detection: compiled single-pass analyzer vs the
+previous implementations.
+
+Compares the old engine substring scan, the old ``analyzers.detect_mood``
+(a fresh ``\\b`` regex per keyword per call) and ``mood.analyze_mood``
+with a cold and a warm memo cache.
+
+Usage: python scripts/benchmark_mood.py [--iterations 20000]
+"""
+
+import argparse
+import os
+import re
+import sys
+import time
+
+# Add project root to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from apps.recommendations import mood
+from apps.recommendations.constants import MOOD_KEYWORDS
+
+
+SAMPLES = [
+    "I want something funny and light to watch with the kids tonight",
+    "A deep emotional love story, maybe a bit romantic",
+    "Nataka filamu ya kutisha yenye mizimu",
+    "science fiction in space with aliens and a big battle",
+    "A suspense thriller about a crime mystery in the city",
+    "Kitu cha kuchekesha na familia",
+    "Exciting adventure, lots of action and fights",
+    "something relaxing",
+]
+
+LEGACY_ENGINE_MAPPINGS = {
+    'action': ['action', 'exciting', 'thrilling', 'adventure'],
+    'comedy': ['funny', 'humorous', 'comedy', 'laugh'],
+    'drama': ['dramatic', 'emotional', 'serious', 'deep'],
+    'romance': ['romantic', 'love', 'romance', 'relationship'],
+    'thriller': ['suspense', 'thrilling', 'mystery', 'crime'],
+    'horror': ['scary', 'horror', 'frightening', 'terrifying'],
+    'sci-fi': ['sci-fi', 'science fiction', 'futuristic', 'space'],
+    'family': ['family', 'kids', 'children', 'friendly']
+}
+
+
+def legacy_engine(text):
+    """The engine's former substring scan."""
+    text = text.lower()
+    return [
+        genre for genre, keywords in LEGACY_ENGINE_MAPPINGS.items()
+        if any(keyword in text for keyword in keywords)
+    ]
+
+
+def legacy_analyzers(text):
+    """The former ``analyzers.detect_mood`` (run over the merged keyword table)."""
+    text = text.lower()
+    detected = set()
+    for name, keywords in MOOD_KEYWORDS.items():
+        for keyword in keywords:
+            if re.search(r'\b' + re.escape(keyword) + r'\b', text):
+                detected.add(name)
+    return list(detected)
+
+
+def compiled_cold(text):
+    mood.clear_cache()
+    return mood.analyze_mood(text)
+
+
+def run(func, iterations):
+    started = time.perf_counter()
+    for i in range(iterations):
+        func(SAMPLES[i % len(SAMPLES)])
+    return (time.perf_counter() - started) / iterations * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--iterations', type=int, default=20_000)
+    args = parser.parse_args()
+
+    keyword_count = sum(len(keywords) for keywords in MOOD_KEYWORDS.values())
+    print(f"🎭 {len(SAMPLES)} sample texts, {keyword_count} keywords, {args.iterations} iterations")
+
+    methods = [
+        ('legacy engine (substr)', legacy_engine),
+        ('legacy analyzers (re)', legacy_analyzers),
+        ('compiled, cold cache', compiled_cold),
+        ('compiled, warm cache', mood.analyze_mood),
+    ]
+    header = f"{'method':<26}{'us/call':>10}"
+    print(header)
+    print('-' * len(header))
+    for name, func in methods:
+        print(f"{name:<26}{run(func, args.iterations):>10.2f}")
+
+    print()
+    for text in SAMPLES:
+        print(f"{text[:50]!r:<54} {mood.analyze_mood(text)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -30,7 +30,6 @@ class MoodSelector {
   constructor() {
     this.selectedMoods = new Set();
     this.isAnalyzing = false;
-    this.analysisDuration = 4500; // 4.5 seconds
     this.init();
   }
 
@@ -106,18 +105,26 @@ class MoodSelector {
     analyzeBtn.classList.add('analyzing');
 
     try {
-      // Simulate analysis delay
-      await this.simulateAnalysis();
+      // Stream recommendations, showing each refined stage as it arrives
+      let shown = false;
+      try {
+        await this.streamMoodRecommendations(movies => {
+          this.displayCuratedResults(movies, !shown);
+          shown = true;
+        });
+      } catch (error) {
+        console.warn('Recommendation stream failed:', error);
+      }
       
-      // Fetch recommendations based on selected moods
-      const recommendations = await this.fetchMoodRecommendations();
+      // Fall back to TMDB discover when the catalog has nothing to offer
+      if (!shown) {
+        const recommendations = await this.fetchMoodRecommendations();
+        this.displayCuratedResults(recommendations);
+      }
       
       // Store preferences
       await this.storeMoodPreferences();
       
-      // Display results
-      this.displayCuratedResults(recommendations);
-      
       // Reset selections
       this.resetSelections();
       
@@ -133,9 +140,43 @@ class MoodSelector {
     }
   }
 
-  async simulateAnalysis() {
-    return new Promise(resolve => {
-      setTimeout(resolve, this.analysisDuration);
+  streamMoodRecommendations(onStage) {
+    // Server-sent events: 'popular' first, then refined stages, then 'done'
+    const params = new URLSearchParams({
+      mood: Array.from(this.selectedMoods).join(' '),
+      session_token: this.getSessionId(),
+      limit: 8
+    });
+
+    return new Promise((resolve, reject) => {
+      const source = new EventSource(`/api/recommendations/stream/?${params}`);
+      let latest = [];
+
+      const handleStage = (event) => {
+        const data = JSON.parse(event.data);
+        if (data.movies.length > 0) {
+          latest = data.movies.map(movie => ({
+            // Cards use TMDB ids for trailers and saving
+            id: movie.tmdb_id || movie.id,
+            title: movie.title,
+            poster_path: movie.poster_path,
+            overview: movie.overview,
+            release_date: movie.year ? String(movie.year) : null,
+            vote_average: movie.rating
+          }));
+          onStage(latest, data.stage);
+        }
+      };
+
+      ['popular', 'content', 'final'].forEach(stage => source.addEventListener(stage, handleStage));
+      source.addEventListener('done', () => {
+        source.close();
+        resolve(latest);
+      });
+      source.addEventListener('error', () => {
+        source.close();
+        reject(new Error('Recommendation stream failed'));
+      });
     });
   }
 
@@ -209,7 +250,7 @@ class MoodSelector {
     return token ? token.value : '';
   }
 
-  displayCuratedResults(recommendations) {
+  displayCuratedResults(recommendations, scroll = true) {
     const curatedSection = document.getElementById('curatedSection');
     const curatedGrid = document.getElementById('curatedGrid');
     
@@ -241,7 +282,9 @@ class MoodSelector {
 
     // Show the curated section
     curatedSection.style.display = 'block';
-    curatedSection.scrollIntoView({ behavior: 'smooth', block: 'start' });
+    if (scroll) {
+      curatedSection.scrollIntoView({ behavior: 'smooth', block: 'start' });
+    }
   }
 
   createMovieCard(movie) {